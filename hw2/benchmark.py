@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import logging
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from dependency_visualizer import DependencyAnalyzer
+
+BENCH_GROUP = "bench"
+BENCH_VERSION = "1.0"
+
+def _pom(artifact_id: str, parent_id: Optional[str], dependencies: List[str]) -> str:
+    """Build the POM of a synthetic artifact."""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<project xmlns="http://maven.apache.org/POM/4.0.0">']
+    if parent_id:
+        lines += ["  <parent>",
+                  f"    <groupId>{BENCH_GROUP}</groupId>",
+                  f"    <artifactId>{parent_id}</artifactId>",
+                  f"    <version>{BENCH_VERSION}</version>",
+                  "  </parent>"]
+    else:
+        lines += [f"  <groupId>{BENCH_GROUP}</groupId>",
+                  f"  <version>{BENCH_VERSION}</version>"]
+    lines.append(f"  <artifactId>{artifact_id}</artifactId>")
+    lines.append("  <dependencies>")
+    for dependency in dependencies:
+        # Versions come from the parent, like in real multi-module builds
+        version = "${project.version}" if parent_id else BENCH_VERSION
+        lines += ["    <dependency>",
+                  f"      <groupId>{BENCH_GROUP}</groupId>",
+                  f"      <artifactId>{dependency}</artifactId>",
+                  f"      <version>{version}</version>",
+                  "    </dependency>"]
+    lines += ["  </dependencies>", "</project>", ""]
+    return "\n".join(lines)
+
+def _metadata(artifact_id: str) -> str:
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<metadata><groupId>{BENCH_GROUP}</groupId>'
+            f'<artifactId>{artifact_id}</artifactId><versioning><latest>{BENCH_VERSION}</latest>'
+            f'<release>{BENCH_VERSION}</release><versions><version>{BENCH_VERSION}</version>'
+            f'</versions></versioning></metadata>\n')
+
+def generate_repository(root_dir: str, artifacts: int, fanout: int, depth: int,
+                        shared_parents: int = 0, seed: int = 0) -> str:
+    """
+    Generate a synthetic Maven repository on disk.
+
+    Artifacts are spread over depth + 1 levels whose sizes grow by the
+    fan-out. Every artifact of a level is a dependency of at least one
+    artifact of the level above, and dependencies are topped up with random
+    artifacts of the next level to ``fanout``, so artifacts are shared
+    between several dependents.
+
+    Args:
+        root_dir: Directory to write the repository to
+        artifacts: Total number of artifacts
+        fanout: Dependencies per artifact
+        depth: Number of dependency levels below the root
+        shared_parents: Number of parent POMs the artifacts inherit from
+        seed: Random seed for the graph shape
+
+    Returns:
+        Root package in group:artifact:version format
+    """
+    rng = random.Random(seed)
+    # Level sizes grow by the fan-out, like a real dependency tree
+    weights = [max(fanout, 1) ** level for level in range(1, depth + 1)]
+    remaining = max(artifacts - 1, 0)
+    levels: List[List[str]] = [["root"]]
+    for level, weight in enumerate(weights, 1):
+        size = remaining if level == depth else round(remaining * weight / sum(weights[level - 1:]))
+        levels.append([f"l{level}-a{i}" for i in range(max(size, 1))])
+        remaining -= size
+
+    parents = [f"parent{i}" for i in range(shared_parents)]
+    poms: Dict[str, str] = {}
+    for parent_id in parents:
+        poms[parent_id] = _pom(parent_id, None, [])
+    for level, artifact_ids in enumerate(levels):
+        next_level = levels[level + 1] if level + 1 < len(levels) else []
+        # Every artifact of the next level gets at least one dependent
+        covering: Dict[str, List[str]] = {artifact_id: [] for artifact_id in artifact_ids}
+        for i, dependency in enumerate(next_level):
+            covering[artifact_ids[i % len(artifact_ids)]].append(dependency)
+        for artifact_id in artifact_ids:
+            dependencies = covering[artifact_id]
+            extra = [d for d in rng.sample(next_level, min(fanout, len(next_level))) if d not in dependencies]
+            dependencies += extra[:max(fanout - len(dependencies), 0)]
+            parent_id = rng.choice(parents) if parents else None
+            poms[artifact_id] = _pom(artifact_id, parent_id, dependencies)
+
+    for artifact_id, pom in poms.items():
+        directory = os.path.join(root_dir, BENCH_GROUP, artifact_id)
+        os.makedirs(os.path.join(directory, BENCH_VERSION), exist_ok=True)
+        with open(os.path.join(directory, BENCH_VERSION, f"{artifact_id}-{BENCH_VERSION}.pom"), "w") as f:
+            f.write(pom)
+        with open(os.path.join(directory, "maven-metadata.xml"), "w") as f:
+            f.write(_metadata(artifact_id))
+    return f"{BENCH_GROUP}:root:{BENCH_VERSION}"
+
+class _RepositoryHandler(SimpleHTTPRequestHandler):
+    """Serves repository files with an artificial per-request latency."""
+
+    def __init__(self, *args, latency: float = 0.0, **kwargs):
+        self.latency = latency
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+class MavenRepositoryServer:
+    """Serves a directory as a Maven repository over local HTTP."""
+
+    def __init__(self, root_dir: str, latency: float = 0.0):
+        """
+        Initialize the server.
+
+        Args:
+            root_dir: Repository directory
+            latency: Delay added to every request in seconds
+        """
+        handler = partial(_RepositoryHandler, directory=root_dir, latency=latency)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MavenRepositoryServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+def run_benchmark(artifacts: int = 500, fanout: int = 5, depth: int = 4, shared_parents: int = 3,
+                  latency: float = 0.0, parse_workers: int = 0, seed: int = 0) -> dict:
+    """
+    Crawl a generated repository and measure the crawler.
+
+    Args:
+        artifacts: Total number of artifacts
+        fanout: Dependencies per artifact
+        depth: Number of dependency levels below the root
+        shared_parents: Number of parent POMs the artifacts inherit from
+        latency: Delay added to every request in seconds
+        parse_workers: Passed to DependencyAnalyzer
+        seed: Random seed for the graph shape
+
+    Returns:
+        Parameters and results: artifacts crawled, wall time,
+        artifacts/sec, peak traced memory and request count
+    """
+    root_dir = tempfile.mkdtemp(prefix="maven-bench-")
+    try:
+        root = generate_repository(root_dir, artifacts, fanout, depth, shared_parents, seed)
+        with MavenRepositoryServer(root_dir, latency) as server:
+            tracemalloc.start()
+            start = time.perf_counter()
+            with DependencyAnalyzer(server.url, depth, parse_workers=parse_workers) as analyzer:
+                analyzer.collect_batch([root])
+            wall_time = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(root_dir)
+
+    crawled = len(analyzer.dependencies)
+    return {
+        "parameters": {"artifacts": artifacts, "fanout": fanout, "depth": depth,
+                       "shared_parents": shared_parents, "latency": latency,
+                       "parse_workers": parse_workers, "seed": seed},
+        "artifacts_crawled": crawled,
+        "wall_time": wall_time,
+        "artifacts_per_sec": crawled / wall_time if wall_time else 0.0,
+        "peak_memory_mb": peak / (1024 * 1024),
+        "requests": len(analyzer.stats.latencies),
+    }
+
+def main():
+    """Main entry point for the crawl benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the dependency crawler against a local synthetic Maven repository",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--artifacts", type=int, default=500, help="Total number of artifacts")
+    parser.add_argument("--fanout", type=int, default=5, help="Dependencies per artifact")
+    parser.add_argument("--depth", type=int, default=4, help="Dependency levels below the root")
+    parser.add_argument("--shared-parents", type=int, default=3, help="Number of shared parent POMs")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--parse-workers", type=int, default=0, help="POM parsing processes")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the graph shape")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for run in range(args.repeat):
+        result = run_benchmark(args.artifacts, args.fanout, args.depth, args.shared_parents,
+                               args.latency_ms / 1000, args.parse_workers, args.seed)
+        results.append(result)
+        print(f"run {run + 1}: {result['artifacts_crawled']} artifacts in {result['wall_time']:.2f}s, "
+              f"{result['artifacts_per_sec']:.1f} artifacts/sec, "
+              f"peak memory {result['peak_memory_mb']:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
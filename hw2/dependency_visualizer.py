@@ -1,11 +1,23 @@
+import io
 import os
+import re
+import json
+import time
+import bisect
+import hashlib
 import argparse
+import tempfile
+import subprocess
 import requests
 import xml.etree.ElementTree as ET
-from subprocess import run, CalledProcessError
-from typing import Dict, List, Tuple
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import quoteattr
 import logging
 
+from graph_store import GraphStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -21,21 +33,484 @@ class POMParseError(DependencyAnalyzerError):
     """Raised when POM file cannot be parsed."""
     pass
 
+POM_PROPERTY_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+def extract_dependencies(pom_content: str) -> List[Tuple[str, str, str]]:
+    """
+    Extract direct dependencies from POM content in a single streaming pass.
+
+    Only the project coordinates and the <parent>, <properties> and
+    <dependencies> sections are read; other sections such as <build>,
+    <reporting> or <dependencyManagement> are skipped and released as soon
+    as they end. Tags are matched by local name, so POMs with any namespace
+    or none are handled. ${...} placeholders are substituted from the
+    properties and project/parent coordinates.
+
+    Defined at module level so it can run in a process pool.
+
+    Args:
+        pom_content: Content of POM file
+
+    Returns:
+        List of tuples (group_id, artifact_id, version)
+
+    Raises:
+        POMParseError: If POM file cannot be parsed
+    """
+    coordinates = ("groupId", "artifactId", "version")
+    path: List[str] = []
+    project: Dict[str, str] = {}
+    parent: Dict[str, str] = {}
+    properties: Dict[str, str] = {}
+    raw_deps: List[Dict[str, str]] = []
+    current: Optional[Dict[str, str]] = None
+
+    try:
+        for event, elem in ET.iterparse(io.StringIO(pom_content), events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                path.append(tag)
+                if len(path) == 3 and path[1] == "dependencies" and tag == "dependency":
+                    current = {}
+                continue
+
+            level = len(path)
+            text = (elem.text or "").strip()
+            if level == 2:
+                if tag in coordinates:
+                    project[tag] = text
+                # Drop the finished top-level section, e.g. a large <build>
+                elem.clear()
+            elif level == 3:
+                if path[1] == "properties":
+                    properties[tag] = text
+                elif path[1] == "parent" and tag in coordinates:
+                    parent[tag] = text
+                elif current is not None and tag == "dependency":
+                    raw_deps.append(current)
+                    current = None
+            elif level == 4 and current is not None and tag in coordinates:
+                current[tag] = text
+            path.pop()
+    except ET.ParseError as e:
+        raise POMParseError(f"Failed to parse POM content: {str(e)}")
+
+    values = dict(properties)
+    for name in coordinates:
+        value = project.get(name) or parent.get(name)
+        if value:
+            values[f"project.{name}"] = values[f"pom.{name}"] = value
+        if parent.get(name):
+            values[f"project.parent.{name}"] = parent[name]
+    values.setdefault("version", values.get("project.version", ""))
+
+    def substitute(value: str) -> str:
+        return POM_PROPERTY_PATTERN.sub(lambda m: values.get(m.group(1), m.group(0)), value)
+
+    deps = []
+    for dep in raw_deps:
+        if not all(dep.get(name) for name in coordinates):
+            logger.warning("Skipping incomplete dependency entry")
+            continue
+        deps.append((substitute(dep["groupId"]), substitute(dep["artifactId"]), substitute(dep["version"])))
+    return deps
+
+class VersionResolutionError(DependencyAnalyzerError):
+    """Raised when a version range cannot be resolved."""
+    pass
+
+def write_json_atomic(path: str, data) -> None:
+    """
+    Write JSON to a file so that readers never see a partial file.
+
+    The data is written to a temporary file in the same directory, synced
+    to disk and renamed over the target.
+
+    Args:
+        path: Target file path
+        data: JSON-serializable data
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class CrawlStats:
+    """
+    Collects telemetry about a dependency crawl.
+
+    Records per-request latency and transferred bytes, retries, failures by
+    HTTP status code (or exception name when there is no response), cache
+    hits and misses per cache, and the fan-out of packages at each depth.
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.bytes_received = 0
+        self.retries = 0
+        self.failures: Counter = Counter()
+        self.cache_hits: Counter = Counter()
+        self.cache_misses: Counter = Counter()
+        # depth -> [packages, dependencies]
+        self.fanout: Dict[int, List[int]] = {}
+        self.started = time.perf_counter()
+
+    def record_request(self, latency: float, size: int) -> None:
+        self.latencies.append(latency)
+        self.bytes_received += size
+
+    def record_retry(self) -> None:
+        self.retries += 1
+
+    def record_failure(self, reason) -> None:
+        self.failures[str(reason)] += 1
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        (self.cache_hits if hit else self.cache_misses)[cache] += 1
+
+    def record_fanout(self, depth: int, dependencies: int) -> None:
+        counts = self.fanout.setdefault(depth, [0, 0])
+        counts[0] += 1
+        counts[1] += dependencies
+
+    def _percentile(self, ordered: List[float], fraction: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        """Return the statistics as a JSON-serializable dictionary."""
+        ordered = sorted(self.latencies)
+        caches = sorted(set(self.cache_hits) | set(self.cache_misses))
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "requests": len(ordered),
+            "bytes_received": self.bytes_received,
+            "latency": {
+                "total": sum(ordered),
+                "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p50": self._percentile(ordered, 0.5),
+                "p95": self._percentile(ordered, 0.95),
+                "max": ordered[-1] if ordered else 0.0,
+            },
+            "retries": self.retries,
+            "failures": dict(self.failures),
+            "cache": {cache: {"hits": self.cache_hits[cache], "misses": self.cache_misses[cache]}
+                      for cache in caches},
+            "fanout": {str(depth): {"packages": packages, "dependencies": deps,
+                                    "mean": deps / packages if packages else 0.0}
+                       for depth, (packages, deps) in sorted(self.fanout.items())},
+        }
+
+    def summary(self) -> str:
+        """Format the statistics as a text table."""
+        data = self.to_dict()
+        latency = data["latency"]
+        rows = [
+            ("Elapsed", f"{data['elapsed']:.2f}s"),
+            ("Requests", str(data["requests"])),
+            ("Bytes received", str(data["bytes_received"])),
+            ("Latency mean/p50/p95/max",
+             f"{latency['mean'] * 1000:.0f}/{latency['p50'] * 1000:.0f}/"
+             f"{latency['p95'] * 1000:.0f}/{latency['max'] * 1000:.0f} ms"),
+            ("Retries", str(data["retries"])),
+        ]
+        for reason, count in sorted(data["failures"].items()):
+            rows.append((f"Failures ({reason})", str(count)))
+        for cache, counts in data["cache"].items():
+            rows.append((f"Cache {cache} hits/misses", f"{counts['hits']}/{counts['misses']}"))
+        for depth, counts in data["fanout"].items():
+            rows.append((f"Depth {depth} packages/fan-out", f"{counts['packages']}/{counts['mean']:.1f}"))
+
+        width = max(len(name) for name, _ in rows)
+        return "\n".join(f"{name.ljust(width)}  {value}" for name, value in rows)
+
+    def write_json(self, path: str) -> None:
+        """Write the statistics to a JSON report."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+class VersionResolver:
+    """
+    Resolves Maven version ranges and LATEST/RELEASE through maven-metadata.xml.
+
+    Metadata is fetched once per groupId:artifactId for the lifetime of the
+    resolver and can optionally be persisted to a JSON file with a TTL.
+    Versions are kept sorted by Maven ordering so a range is resolved with
+    binary search.
+    """
+
+    QUALIFIERS = {
+        "alpha": 0, "a": 0, "beta": 1, "b": 1, "milestone": 2, "m": 2,
+        "rc": 3, "cr": 3, "snapshot": 4, "": 5, "ga": 5, "final": 5, "release": 5, "sp": 6
+    }
+    RANGE_PATTERN = re.compile(r"([\[(])([^\[\]()]*)([\])])")
+
+    def __init__(self, repo_url: str, fetch_text: Callable[[str], str],
+                 cache_path: Optional[str] = None, ttl: float = 86400,
+                 stats: Optional[CrawlStats] = None):
+        """
+        Initialize the resolver.
+
+        Args:
+            repo_url: Base URL of the Maven repository
+            fetch_text: Function returning the body of a URL, raising
+                DependencyAnalyzerError on failure
+            cache_path: JSON file to persist metadata between runs
+            ttl: Seconds a persisted metadata entry stays valid
+            stats: Telemetry to record metadata cache hits and misses in
+        """
+        self.repo_url = repo_url.rstrip('/')
+        self.fetch_text = fetch_text
+        self.stats = stats
+        self.cache_path = cache_path
+        self.ttl = ttl
+        # groupId:artifactId -> (sort keys, versions, latest, release), None if unavailable
+        self._metadata: Dict[str, Optional[Tuple[list, List[str], Optional[str], Optional[str]]]] = {}
+        self._persisted: Dict[str, dict] = {}
+        if cache_path:
+            self._load_cache()
+
+    @classmethod
+    def version_key(cls, version: str) -> tuple:
+        """
+        Build a sort key following Maven version ordering.
+
+        Numbers compare numerically and rank above qualifiers; known
+        qualifiers compare as alpha < beta < milestone < rc < snapshot <
+        release < sp; trailing zeros are ignored, so 1.0 == 1.
+        """
+        items = []
+        for token in re.findall(r"\d+|[a-zA-Z]+", version.lower()):
+            if token.isdigit():
+                items.append((2, int(token), ""))
+            elif token in cls.QUALIFIERS:
+                items.append((1, cls.QUALIFIERS[token], ""))
+            else:
+                items.append((1, 7, token))
+        # Zeros before a qualifier or the end do not change the version
+        normalized = []
+        for item in reversed(items):
+            if item == (2, 0, "") and (not normalized or normalized[-1][0] == 1):
+                continue
+            normalized.append(item)
+        normalized.reverse()
+        normalized.append((1, cls.QUALIFIERS[""], ""))
+        return tuple(normalized)
+
+    @classmethod
+    def is_dynamic(cls, version: Optional[str]) -> bool:
+        """Return True for versions that need metadata to resolve."""
+        if not version:
+            return False
+        return version in ("LATEST", "RELEASE") or version.startswith(("[", "("))
+
+    def _load_cache(self) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                persisted = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metadata cache {self.cache_path}: {str(e)}")
+            return
+        now = time.time()
+        self._persisted = {ga: entry for ga, entry in persisted.items()
+                           if now - entry["fetched_at"] < self.ttl}
+
+    def save_cache(self) -> None:
+        """Persist fetched metadata to the cache file."""
+        if self.cache_path:
+            write_json_atomic(self.cache_path, self._persisted)
+
+    def _parse_metadata(self, metadata: str) -> Tuple[List[str], Optional[str], Optional[str]]:
+        try:
+            root = ET.fromstring(metadata)
+        except ET.ParseError as e:
+            raise VersionResolutionError(f"Failed to parse metadata: {str(e)}")
+        versions, latest, release = [], None, None
+        for elem in root.iter():
+            tag = elem.tag.rsplit("}", 1)[-1]
+            text = (elem.text or "").strip()
+            if not text:
+                continue
+            if tag == "version":
+                versions.append(text)
+            elif tag == "latest":
+                latest = text
+            elif tag == "release":
+                release = text
+        return versions, latest, release
+
+    def _versions(self, group_id: str, artifact_id: str):
+        ga = f"{group_id}:{artifact_id}"
+        if ga in self._metadata:
+            if self.stats:
+                self.stats.record_cache("metadata", True)
+            return self._metadata[ga]
+
+        entry = self._persisted.get(ga)
+        if self.stats:
+            self.stats.record_cache("metadata", entry is not None)
+        if entry is None:
+            url = f"{self.repo_url}/{group_id.replace('.', '/')}/{artifact_id}/maven-metadata.xml"
+            try:
+                versions, latest, release = self._parse_metadata(self.fetch_text(url))
+            except DependencyAnalyzerError as e:
+                logger.warning(f"No metadata for {ga}: {str(e)}")
+                self._metadata[ga] = None
+                return None
+            entry = {"fetched_at": time.time(), "versions": versions, "latest": latest, "release": release}
+            self._persisted[ga] = entry
+
+        versions = sorted(set(entry["versions"]), key=self.version_key)
+        self._metadata[ga] = ([self.version_key(v) for v in versions], versions,
+                              entry["latest"], entry["release"])
+        return self._metadata[ga]
+
+    def _highest_in_range(self, keys: list, versions: List[str], spec: str) -> Optional[str]:
+        """Find the highest version inside a single range such as [1.2,2.0)."""
+        match = self.RANGE_PATTERN.fullmatch(spec.strip())
+        if not match:
+            raise VersionResolutionError(f"Invalid version range: {spec}")
+        lower_bracket, bounds, upper_bracket = match.groups()
+        if "," not in bounds:
+            # [1.0] pins an exact version
+            key = self.version_key(bounds.strip())
+            index = bisect.bisect_left(keys, key)
+            return versions[index] if index < len(keys) and keys[index] == key else None
+
+        lower, upper = (bound.strip() for bound in bounds.split(",", 1))
+        if upper:
+            upper_key = self.version_key(upper)
+            end = (bisect.bisect_right if upper_bracket == "]" else bisect.bisect_left)(keys, upper_key)
+        else:
+            end = len(keys)
+        if lower:
+            lower_key = self.version_key(lower)
+            start = (bisect.bisect_left if lower_bracket == "[" else bisect.bisect_right)(keys, lower_key)
+        else:
+            start = 0
+        return versions[end - 1] if end > start else None
+
+    def resolve(self, group_id: str, artifact_id: str, version: str) -> str:
+        """
+        Resolve a version specification to a concrete version.
+
+        Plain versions are returned unchanged without any lookup.
+
+        Args:
+            group_id: Maven group ID
+            artifact_id: Maven artifact ID
+            version: Version, range (e.g. [1.2,2.0)), LATEST or RELEASE
+
+        Returns:
+            Concrete version
+
+        Raises:
+            VersionResolutionError: If no available version matches
+        """
+        if not self.is_dynamic(version):
+            return version
+
+        metadata = self._versions(group_id, artifact_id)
+        if metadata is None or not metadata[1]:
+            raise VersionResolutionError(f"No versions available for {group_id}:{artifact_id}")
+        keys, versions, latest, release = metadata
+
+        if version == "LATEST":
+            return latest or versions[-1]
+        if version == "RELEASE":
+            if release:
+                return release
+            releases = [v for v in versions if not v.endswith("-SNAPSHOT")]
+            if not releases:
+                raise VersionResolutionError(f"No release versions for {group_id}:{artifact_id}")
+            return releases[-1]
+
+        # A union like (,1.0],[1.2,) resolves to the highest match of any part
+        candidates = [self._highest_in_range(keys, versions, spec)
+                      for spec in re.findall(r"[\[(][^\[\]()]*[\])]", version)]
+        candidates = [c for c in candidates if c is not None]
+        if not candidates:
+            raise VersionResolutionError(f"No version of {group_id}:{artifact_id} matches {version}")
+        return max(candidates, key=self.version_key)
+
 class DependencyAnalyzer:
     """Analyzes Maven package dependencies by fetching and parsing POM files."""
     
-    def __init__(self, repo_url: str, max_depth: int):
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, repo_url: str, max_depth: int, checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: int = 500, metadata_cache_path: Optional[str] = None,
+                 metadata_ttl: float = 86400, parse_workers: int = 0, max_retries: int = 0,
+                 retry_backoff: float = 0.5, store: Optional[GraphStore] = None,
+                 store_max_age: Optional[float] = None):
         """
         Initialize the dependency analyzer.
         
         Args:
             repo_url: Base URL of the Maven repository
             max_depth: Maximum depth of dependency analysis
+            checkpoint_path: File to periodically save the crawl state to
+            checkpoint_interval: Number of POM fetches between checkpoints
+            metadata_cache_path: JSON file to persist maven-metadata.xml lookups
+            metadata_ttl: Seconds a persisted metadata entry stays valid
+            parse_workers: Number of processes to parse POMs in; 0 parses
+                them in the crawling process
+            max_retries: Number of retries for timeouts, connection errors
+                and 429/5xx responses
+            retry_backoff: Delay before the first retry in seconds, doubled
+                for each further retry
+            store: Persistent graph store to reuse and record crawl results
+            store_max_age: Refetch packages stored more than this many
+                seconds ago
         """
         self.repo_url = repo_url.rstrip('/')
         self.max_depth = max_depth
         self.dependencies: Dict[str, List[Tuple[str, str, str]]] = {}
         self.processed_packages = set()
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.completed_roots: List[str] = []
+        self._current_root: Optional[str] = None
+        self._frontier: deque = deque()
+        self._visited = set()
+        self._since_checkpoint = 0
+        # package key -> frontier entry of packages whose POM could not be fetched;
+        # they are not checkpointed as processed, so a resumed crawl retries them
+        self._failed_fetches: Dict[str, Tuple[str, str, str, int]] = {}
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = CrawlStats()
+        self.resolver = VersionResolver(self.repo_url, self.fetch_text, metadata_cache_path, metadata_ttl,
+                                        self.stats)
+        self.store = store
+        self.store_max_age = store_max_age
+        self.parse_workers = parse_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # package key -> (parse future, POM hash)
+        self._pending_parses: Dict[str, Tuple[Future, Optional[str]]] = {}
+
+    def __enter__(self) -> "DependencyAnalyzer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the POM parsing processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self._pending_parses.clear()
 
     def fetch_pom(self, group_id: str, artifact_id: str, version: str) -> str:
         """
@@ -54,12 +529,45 @@ class DependencyAnalyzer:
         """
         group_path = group_id.replace(".", "/")
         url = f"{self.repo_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.pom"
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            raise POMFetchError(f"Failed to fetch POM from {url}: {str(e)}")
+        return self.fetch_text(url)
+
+    def fetch_text(self, url: str) -> str:
+        """
+        Fetch a file from the Maven repository.
+
+        Args:
+            url: File URL
+
+        Returns:
+            Content of the file as string
+
+        Raises:
+            POMFetchError: If the file cannot be fetched
+        """
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = requests.get(url, timeout=10)
+                response.raise_for_status()
+                text = response.text
+            except requests.exceptions.RequestException as e:
+                self.stats.record_request(time.perf_counter() - start, 0)
+                status = getattr(e.response, "status_code", None)
+                if isinstance(e, requests.exceptions.HTTPError):
+                    transient = status is not None and (status == 429 or status >= 500)
+                else:
+                    transient = isinstance(e, (requests.exceptions.ConnectionError,
+                                               requests.exceptions.Timeout))
+                if transient and attempt < self.max_retries:
+                    attempt += 1
+                    self.stats.record_retry()
+                    time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                    continue
+                self.stats.record_failure(status or type(e).__name__)
+                raise POMFetchError(f"Failed to fetch {url}: {str(e)}")
+            self.stats.record_request(time.perf_counter() - start, len(text.encode("utf-8")))
+            return text
 
     def parse_pom(self, pom_content: str) -> List[Tuple[str, str, str]]:
         """
@@ -74,58 +582,287 @@ class DependencyAnalyzer:
         Raises:
             POMParseError: If POM file cannot be parsed
         """
+        return extract_dependencies(pom_content)
+
+    def _package_dependencies(self, group_id: str, artifact_id: str, version: str,
+                              depth: int) -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Return the dependencies of a package, fetching its POM only once per session.
+
+        Returns:
+            List of dependencies, or None if the package could not be processed
+        """
+        package_key = f"{group_id}:{artifact_id}:{version}"
+        if package_key in self.dependencies:
+            self.stats.record_cache("pom", True)
+            return self.dependencies[package_key]
+        if package_key in self.processed_packages and package_key not in self._pending_parses:
+            return None
+        self.stats.record_cache("pom", False)
+
+        pending = self._pending_parses.pop(package_key, None)
+        if pending is None:
+            stored = self._stored_dependencies(package_key)
+            if stored is not None:
+                return stored
+            self.processed_packages.add(package_key)
+            logger.info(f"Processing dependencies for {package_key} at depth {depth}")
+
         try:
-            root = ET.fromstring(pom_content)
-            namespace = {'mvn': 'http://maven.apache.org/POM/4.0.0'}
-            deps = []
-            
-            for dep in root.findall('.//mvn:dependency', namespace):
-                group_elem = dep.find('mvn:groupId', namespace)
-                artifact_elem = dep.find('mvn:artifactId', namespace)
-                version_elem = dep.find('mvn:version', namespace)
-                
-                if None in (group_elem, artifact_elem, version_elem):
-                    logger.warning("Skipping incomplete dependency entry")
-                    continue
-                    
-                deps.append((
-                    group_elem.text,
-                    artifact_elem.text,
-                    version_elem.text
-                ))
-            return deps
-        except ET.ParseError as e:
-            raise POMParseError(f"Failed to parse POM content: {str(e)}")
+            if pending is not None:
+                future, pom_hash = pending
+                parsed = future.result()
+            else:
+                self._since_checkpoint += 1
+                try:
+                    pom = self.fetch_pom(group_id, artifact_id, version)
+                except POMFetchError:
+                    self._failed_fetches[package_key] = (group_id, artifact_id, version, depth)
+                    raise
+                pom_hash = self._pom_hash(pom)
+                parsed = self.parse_pom(pom)
+            dependencies = [self._resolve(dep) for dep in parsed]
+            self.dependencies[package_key] = dependencies
+            if self.store is not None:
+                self.store.add_package(package_key, pom_hash, dependencies)
+            return dependencies
+        except DependencyAnalyzerError as e:
+            logger.error(f"Error processing {package_key}: {str(e)}")
+            return None
+
+    def _stored_dependencies(self, package_key: str) -> Optional[List[Tuple[str, str, str]]]:
+        """Load the dependencies of a package from the persistent store, if present."""
+        if self.store is None:
+            return None
+        dependencies = self.store.get_dependencies(package_key, self.store_max_age)
+        self.stats.record_cache("store", dependencies is not None)
+        if dependencies is None:
+            return None
+        dependencies = [tuple(dep) for dep in dependencies]
+        self.dependencies[package_key] = dependencies
+        return dependencies
+
+    def _pom_hash(self, pom: str) -> Optional[str]:
+        if self.store is None:
+            return None
+        return hashlib.sha256(pom.encode("utf-8")).hexdigest()
+
+    def _resolve(self, dependency: Tuple[str, str, str]) -> Tuple[str, str, str]:
+        """Replace a version range or LATEST/RELEASE with a concrete version."""
+        group_id, artifact_id, version = dependency
+        try:
+            return group_id, artifact_id, self.resolver.resolve(group_id, artifact_id, version)
+        except VersionResolutionError as e:
+            logger.warning(str(e))
+            return dependency
 
     def collect_dependencies(self, group_id: str, artifact_id: str, version: str, depth: int = 0) -> None:
         """
-        Recursively collect dependencies for a package.
-        
+        Collect dependencies for a package breadth-first.
+
+        Packages fetched earlier in the session, including for other roots,
+        are taken from ``dependencies`` instead of being fetched again.
+
         Args:
             group_id: Maven group ID
             artifact_id: Maven artifact ID
             version: Package version
             depth: Current depth in dependency tree
         """
-        if depth > self.max_depth:
-            return
-            
-        package_key = f"{group_id}:{artifact_id}:{version}"
-        if package_key in self.processed_packages:
-            return
-            
-        self.processed_packages.add(package_key)
-        logger.info(f"Processing dependencies for {package_key} at depth {depth}")
-        
+        self._current_root = f"{group_id}:{artifact_id}:{version}"
+        self._frontier = deque([(group_id, artifact_id, version, depth)])
+        self._visited = set()
+        self._crawl()
+
+    def _prefetch_level(self) -> None:
+        """
+        Fetch the POMs of the current frontier level and queue them for parsing.
+
+        Parsing runs in the process pool while the remaining POMs of the
+        level are still being fetched.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.parse_workers)
+        level = self._frontier[0][3]
+        for group_id, artifact_id, version, depth in self._frontier:
+            if depth != level:
+                break
+            package_key = f"{group_id}:{artifact_id}:{version}"
+            if (depth > self.max_depth or package_key in self.dependencies
+                    or package_key in self.processed_packages):
+                continue
+            if self._stored_dependencies(package_key) is not None:
+                continue
+            self.processed_packages.add(package_key)
+            logger.info(f"Processing dependencies for {package_key} at depth {depth}")
+            self._since_checkpoint += 1
+            try:
+                pom = self.fetch_pom(group_id, artifact_id, version)
+            except DependencyAnalyzerError as e:
+                logger.error(f"Error processing {package_key}: {str(e)}")
+                self._failed_fetches[package_key] = (group_id, artifact_id, version, depth)
+                continue
+            self._pending_parses[package_key] = (self._executor.submit(extract_dependencies, pom),
+                                                 self._pom_hash(pom))
+
+    def _crawl(self) -> None:
+        """Process the frontier until it is empty, checkpointing along the way."""
         try:
-            pom = self.fetch_pom(group_id, artifact_id, version)
-            dependencies = self.parse_pom(pom)
-            self.dependencies[package_key] = dependencies
-            
-            for dep in dependencies:
-                self.collect_dependencies(*dep, depth + 1)
-        except DependencyAnalyzerError as e:
-            logger.error(f"Error processing {package_key}: {str(e)}")
+            while self._frontier:
+                # The entry stays in the frontier until it is fully processed
+                group_id, artifact_id, version, depth = self._frontier[0]
+                package_key = f"{group_id}:{artifact_id}:{version}"
+                if (self.parse_workers and depth <= self.max_depth and package_key not in self.processed_packages
+                        and package_key not in self.dependencies):
+                    self._prefetch_level()
+                if depth <= self.max_depth and package_key not in self._visited:
+                    self._visited.add(package_key)
+                    dependencies = self._package_dependencies(group_id, artifact_id, version, depth)
+                    if dependencies is not None:
+                        self.stats.record_fanout(depth, len(dependencies))
+                    if dependencies is not None and depth < self.max_depth:
+                        self._frontier.extend((*dep, depth + 1) for dep in dependencies)
+                self._frontier.popleft()
+
+                # Fetches are counted where they happen, the state is only consistent here
+                if self.checkpoint_path and self._since_checkpoint >= self.checkpoint_interval:
+                    self.save_checkpoint()
+        except KeyboardInterrupt:
+            if self.checkpoint_path and self._frontier:
+                # Forget the interrupted package so it is fetched again on resume
+                group_id, artifact_id, version, _ = self._frontier[0]
+                package_key = f"{group_id}:{artifact_id}:{version}"
+                if package_key not in self.dependencies:
+                    self.processed_packages.discard(package_key)
+                    self._visited.discard(package_key)
+                self.save_checkpoint()
+                logger.info(f"Crawl interrupted, state saved to {self.checkpoint_path}")
+            raise
+
+    def save_checkpoint(self) -> None:
+        """
+        Save the crawl state to the checkpoint file.
+
+        The file is replaced atomically, so an interrupted write never
+        leaves a corrupted checkpoint behind.
+        """
+        state = {
+            "version": self.CHECKPOINT_VERSION,
+            "repo_url": self.repo_url,
+            "max_depth": self.max_depth,
+            "completed_roots": self.completed_roots,
+            "current_root": self._current_root,
+            "frontier": list(self._frontier),
+            "visited": list(self._visited),
+            # Queued parses are lost on restart, so those packages are fetched again
+            "processed_packages": list(self.processed_packages - self._pending_parses.keys()
+                                       - self._failed_fetches.keys()),
+            "failed_fetches": list(self._failed_fetches.values()),
+            "dependencies": self.dependencies,
+        }
+        write_json_atomic(self.checkpoint_path, state)
+        self._since_checkpoint = 0
+        logger.debug(f"Checkpoint saved to {self.checkpoint_path}")
+
+    def load_checkpoint(self) -> bool:
+        """
+        Restore the crawl state from the checkpoint file.
+
+        Returns:
+            True if a checkpoint was loaded, False if the file does not exist
+
+        Raises:
+            DependencyAnalyzerError: If the checkpoint is unreadable or was
+                written for a different repository or depth
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            raise DependencyAnalyzerError(f"Failed to read checkpoint {self.checkpoint_path}: {str(e)}")
+        if state.get("version") != self.CHECKPOINT_VERSION:
+            raise DependencyAnalyzerError(f"Unsupported checkpoint version: {state.get('version')}")
+        if state["repo_url"] != self.repo_url or state["max_depth"] != self.max_depth:
+            raise DependencyAnalyzerError("Checkpoint was written for a different repository or depth")
+
+        self.completed_roots = state["completed_roots"]
+        self._current_root = state["current_root"]
+        self._frontier = deque(tuple(entry) for entry in state["frontier"])
+        self._visited = set(state["visited"])
+        self.processed_packages = set(state["processed_packages"])
+        self.dependencies = {key: [tuple(dep) for dep in deps] for key, deps in state["dependencies"].items()}
+        # Failed fetches are queued again, e.g. after the network came back
+        self._failed_fetches = {}
+        for group_id, artifact_id, version, depth in state.get("failed_fetches", []):
+            self._visited.discard(f"{group_id}:{artifact_id}:{version}")
+            self._frontier.append((group_id, artifact_id, version, depth))
+        logger.info(f"Resumed from {self.checkpoint_path}: {len(self.dependencies)} packages, "
+                    f"{len(self._frontier)} pending")
+        return True
+
+    def dependency_graph(self, package_key: str) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Extract the graph of one root package from the collected dependencies.
+
+        Args:
+            package_key: Root package in group:artifact:version format
+
+        Returns:
+            Dependencies reachable from the root within max_depth
+        """
+        graph: Dict[str, List[Tuple[str, str, str]]] = {}
+        level = [package_key]
+        for _ in range(self.max_depth + 1):
+            next_level = []
+            for key in level:
+                if key in graph or key not in self.dependencies:
+                    continue
+                graph[key] = self.dependencies[key]
+                next_level.extend(":".join(dep) for dep in graph[key])
+            level = next_level
+        return graph
+
+    def collect_batch(self, packages: List[str]) -> Dict[str, Dict[str, List[Tuple[str, str, str]]]]:
+        """
+        Collect dependencies for several root packages in one session.
+
+        Shared artifacts are fetched once; ``dependencies`` holds the
+        combined graph afterwards.
+
+        Args:
+            packages: Root packages in group:artifact:version format
+
+        Returns:
+            Graph of each root package, keyed by the root package
+        """
+        graphs = {}
+        for package in packages:
+            try:
+                group_id, artifact_id, version = package.split(":")
+            except ValueError:
+                raise DependencyAnalyzerError(f"Package must be in format 'group:artifact:version': {package}")
+            version = self.resolver.resolve(group_id, artifact_id, version)
+            root_key = f"{group_id}:{artifact_id}:{version}"
+            crawled = True
+            if root_key == self._current_root and self._frontier:
+                # Interrupted crawl, or fetches retried after resuming a completed one
+                self._crawl()
+            elif package not in self.completed_roots:
+                self.collect_dependencies(group_id, artifact_id, version)
+            else:
+                crawled = False
+            if crawled:
+                if package not in self.completed_roots:
+                    self.completed_roots.append(package)
+                if self.checkpoint_path:
+                    self.save_checkpoint()
+            graphs[package] = self.dependency_graph(root_key)
+        self.resolver.save_cache()
+        if self.store is not None:
+            self.store.flush()
+        return graphs
 
 class GraphVisualizer:
     """Generates and visualizes dependency graphs using PlantUML."""
@@ -141,6 +878,222 @@ class GraphVisualizer:
         if not os.path.exists(output_path):
             os.makedirs(output_path)
 
+    @staticmethod
+    def _adjacency(dependencies: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, List[str]]:
+        """Convert dependencies to a deduplicated adjacency list containing every node."""
+        adjacency: Dict[str, List[str]] = {}
+        for event in GraphExporter.iter_graph(dependencies):
+            if event[0] == "node":
+                adjacency.setdefault(event[1], [])
+            else:
+                adjacency[event[1]].append(event[2])
+        return adjacency
+
+    @staticmethod
+    def _to_dependencies(adjacency: Dict[str, List[str]]) -> Dict[str, List[Tuple[str, ...]]]:
+        return {node: [tuple(child.split(":")) for child in children]
+                for node, children in adjacency.items()}
+
+    @staticmethod
+    def _induced(adjacency: Dict[str, List[str]], nodes: set) -> Dict[str, List[str]]:
+        return {node: [child for child in children if child in nodes]
+                for node, children in adjacency.items() if node in nodes}
+
+    def collapse_groups(self, dependencies: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, List[Tuple[str, ...]]]:
+        """
+        Collapse all artifacts of a groupId into a single node.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+
+        Returns:
+            Dependencies between groups, without self-loops
+        """
+        groups: Dict[str, Dict[str, None]] = {}
+        for node, children in self._adjacency(dependencies).items():
+            group = node.split(":")[0]
+            targets = groups.setdefault(group, {})
+            for child in children:
+                child_group = child.split(":")[0]
+                if child_group != group:
+                    targets[child_group] = None
+        return self._to_dependencies({group: list(targets) for group, targets in groups.items()})
+
+    @staticmethod
+    def _strongly_connected_components(adjacency: Dict[str, List[str]]) -> List[List[str]]:
+        """Tarjan's algorithm; components come out in reverse topological order."""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+
+        for start in adjacency:
+            if start in index:
+                continue
+            work = [(start, iter(adjacency[start]))]
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(adjacency[child])))
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def transitive_reduction(self, dependencies: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, List[Tuple[str, ...]]]:
+        """
+        Drop edges that are implied by longer paths.
+
+        Cycles are condensed first: edges inside a cycle are kept, and
+        between two cycles only one edge is kept, so reachability is the
+        same as in the original graph.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+
+        Returns:
+            Dependencies without redundant edges
+        """
+        adjacency = self._adjacency(dependencies)
+        components = self._strongly_connected_components(adjacency)
+        component_of = {node: i for i, component in enumerate(components) for node in component}
+
+        # Reachability as int bitsets, filled from sinks towards sources
+        reach = [0] * len(components)
+        kept = [0] * len(components)
+        for i, component in enumerate(components):
+            successors = {component_of[child] for node in component
+                          for child in adjacency[node] if component_of[child] != i}
+            reach_via = 0
+            for j in successors:
+                reach_via |= reach[j]
+            for j in successors:
+                if not (reach_via >> j) & 1:
+                    kept[i] |= 1 << j
+                reach_via |= 1 << j
+            reach[i] = reach_via
+
+        reduced: Dict[str, List[str]] = {}
+        emitted = set()
+        for node, children in adjacency.items():
+            source = component_of[node]
+            reduced[node] = []
+            for child in children:
+                target = component_of[child]
+                if source == target:
+                    reduced[node].append(child)
+                elif (kept[source] >> target) & 1 and (source, target) not in emitted:
+                    emitted.add((source, target))
+                    reduced[node].append(child)
+        return self._to_dependencies(reduced)
+
+    def top_k(self, dependencies: Dict[str, List[Tuple[str, ...]]], k: int) -> Dict[str, List[Tuple[str, ...]]]:
+        """
+        Keep the k most depended-on nodes and the edges between them.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            k: Number of nodes to keep
+
+        Returns:
+            Dependencies restricted to the selected nodes
+        """
+        adjacency = self._adjacency(dependencies)
+        in_degree = {node: 0 for node in adjacency}
+        for children in adjacency.values():
+            for child in children:
+                in_degree[child] += 1
+        ranked = sorted(in_degree, key=lambda node: (-in_degree[node], node))
+        return self._to_dependencies(self._induced(adjacency, set(ranked[:k])))
+
+    def neighborhood(self, dependencies: Dict[str, List[Tuple[str, ...]]], focus: str,
+                     depth: int) -> Dict[str, List[Tuple[str, ...]]]:
+        """
+        Keep the nodes within a number of hops of a focus artifact.
+
+        Both dependencies and dependents of the focus are followed.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            focus: Focus package in group:artifact:version format
+            depth: Maximum distance from the focus
+
+        Returns:
+            Dependencies restricted to the neighborhood
+        """
+        adjacency = self._adjacency(dependencies)
+        if focus not in adjacency:
+            raise ValueError(f"Focus package not in graph: {focus}")
+
+        neighbors: Dict[str, List[str]] = {node: list(children) for node, children in adjacency.items()}
+        for node, children in adjacency.items():
+            for child in children:
+                neighbors[child].append(node)
+
+        selected = {focus}
+        level = [focus]
+        for _ in range(depth):
+            next_level = []
+            for node in level:
+                for neighbor in neighbors[node]:
+                    if neighbor not in selected:
+                        selected.add(neighbor)
+                        next_level.append(neighbor)
+            level = next_level
+        return self._to_dependencies(self._induced(adjacency, selected))
+
+    def condense(self, dependencies: Dict[str, List[Tuple[str, ...]]], focus: Optional[str] = None,
+                 focus_depth: int = 2, top_k: Optional[int] = None, collapse_groups: bool = False,
+                 transitive: bool = False) -> Dict[str, List[Tuple[str, ...]]]:
+        """
+        Reduce a dependency graph before rendering.
+
+        Reductions are applied in the order focus neighborhood, top-k,
+        groupId collapse, transitive reduction.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            focus: Focus package for a neighborhood view
+            focus_depth: Neighborhood distance around the focus
+            top_k: Number of most depended-on nodes to keep
+            collapse_groups: Collapse artifacts by groupId
+            transitive: Apply transitive reduction
+
+        Returns:
+            Reduced dependencies
+        """
+        if focus is not None:
+            dependencies = self.neighborhood(dependencies, focus, focus_depth)
+        if top_k is not None:
+            dependencies = self.top_k(dependencies, top_k)
+        if collapse_groups:
+            dependencies = self.collapse_groups(dependencies)
+        if transitive:
+            dependencies = self.transitive_reduction(dependencies)
+        return dependencies
+
     def generate_plantuml(self, dependencies: Dict[str, List[Tuple[str, str, str]]]) -> str:
         """
         Generate PlantUML diagram from dependencies.
@@ -162,48 +1115,372 @@ class GraphVisualizer:
             "digraph Dependencies {"
         ]
         
-        # Add nodes
-        for package in dependencies.keys():
-            lines.append(f'  "{package}" [shape=component];')
-        
-        # Add edges
-        for parent, children in dependencies.items():
-            for child in children:
-                child_key = ":".join(child)
-                lines.append(f'  "{parent}" -> "{child_key}";')
-        
+        for event in GraphExporter.iter_graph(dependencies):
+            if event[0] == "node":
+                lines.append(f'  "{event[1]}" [shape=component];')
+            else:
+                lines.append(f'  "{event[1]}" -> "{event[2]}";')
+
         lines.extend([
             "}",
             "@enduml"
         ])
         return "\n".join(lines)
 
-    def visualize(self, plantuml_text: str, plantuml_path: str) -> None:
+    def visualize(self, plantuml_text: str, plantuml_path: str, output_format: str = "png",
+                  renderer: Optional["PlantUMLRenderer"] = None, name: str = "graph") -> None:
         """
         Generate visual graph using PlantUML.
-        
+
         Args:
             plantuml_text: PlantUML diagram content
             plantuml_path: Path to PlantUML JAR file
-            
+            output_format: Image format, "png" or "svg"
+            renderer: Persistent renderer to stream the diagram through
+                instead of starting a new PlantUML process
+            name: Base name of the generated files
+
         Raises:
             RuntimeError: If PlantUML execution fails
         """
-        puml_file = os.path.join(self.output_path, "graph.puml")
-        png_file = os.path.join(self.output_path, "graph.png")
-        
+        if output_format not in PlantUMLRenderer.FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        puml_file = os.path.join(self.output_path, f"{name}.puml")
+        image_file = os.path.join(self.output_path, f"{name}.{output_format}")
+
         with open(puml_file, "w") as f:
             f.write(plantuml_text)
-            
+
+        if renderer is not None:
+            renderer.render(plantuml_text, image_file, output_format)
+            logger.info(f"Graph saved to {image_file}")
+            return
+
+        command = ["java", "-jar", plantuml_path, puml_file]
+        if output_format != "png":
+            command.insert(3, f"-t{output_format}")
+
         try:
-            result = run(["java", "-jar", plantuml_path, puml_file], check=True, capture_output=True)
-            logger.info(f"Graph saved to {png_file}")
-        except (CalledProcessError, OSError) as e:
+            subprocess.run(command, check=True, capture_output=True)
+            logger.info(f"Graph saved to {image_file}")
+        except (subprocess.CalledProcessError, OSError) as e:
             error_msg = str(e)
             if hasattr(e, 'stderr') and e.stderr:
                 error_msg = e.stderr.decode('utf-8')
             raise RuntimeError(f"Failed to generate graph: {error_msg}")
 
+class GraphExporter:
+    """
+    Streams dependency graphs to Graphviz DOT, GraphML and JSON lines.
+
+    Every node is declared once and duplicate edges are dropped. Output is
+    written to the file handle as the graph is walked, so only the set of
+    declared nodes and the children of the current package are kept in memory.
+    """
+
+    FORMATS = ("dot", "graphml", "jsonl")
+
+    @staticmethod
+    def iter_graph(dependencies: Dict[str, List[Tuple[str, str, str]]]) -> Iterator[Tuple[str, ...]]:
+        """
+        Walk a dependency graph as a stream of node and edge events.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+
+        Yields:
+            ("node", package) the first time a package is seen and
+            ("edge", parent, child) once per distinct edge
+        """
+        declared = set()
+        for parent, children in dependencies.items():
+            if parent not in declared:
+                declared.add(parent)
+                yield ("node", parent)
+            # Edges of a parent only ever come from its own list
+            seen_children = set()
+            for child in children:
+                child_key = ":".join(child)
+                if child_key in seen_children:
+                    continue
+                seen_children.add(child_key)
+                if child_key not in declared:
+                    declared.add(child_key)
+                    yield ("node", child_key)
+                yield ("edge", parent, child_key)
+
+    @staticmethod
+    def _escape_dot(package: str) -> str:
+        return package.replace("\\", "\\\\").replace('"', '\\"')
+
+    def write_dot(self, dependencies: Dict[str, List[Tuple[str, str, str]]], f: TextIO) -> None:
+        """
+        Write the graph in Graphviz DOT format.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            f: Text file handle to write to
+        """
+        f.write("digraph Dependencies {\n  rankdir=LR;\n")
+        for event in self.iter_graph(dependencies):
+            if event[0] == "node":
+                f.write(f'  "{self._escape_dot(event[1])}" [shape=component];\n')
+            else:
+                f.write(f'  "{self._escape_dot(event[1])}" -> "{self._escape_dot(event[2])}";\n')
+        f.write("}\n")
+
+    def write_graphml(self, dependencies: Dict[str, List[Tuple[str, str, str]]], f: TextIO) -> None:
+        """
+        Write the graph in GraphML format.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            f: Text file handle to write to
+        """
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        f.write('  <graph id="Dependencies" edgedefault="directed">\n')
+        for event in self.iter_graph(dependencies):
+            if event[0] == "node":
+                f.write(f'    <node id={quoteattr(event[1])}/>\n')
+            else:
+                f.write(f'    <edge source={quoteattr(event[1])} target={quoteattr(event[2])}/>\n')
+        f.write("  </graph>\n</graphml>\n")
+
+    def write_jsonl(self, dependencies: Dict[str, List[Tuple[str, str, str]]], f: TextIO) -> None:
+        """
+        Write the graph as JSON lines, one node or edge object per line.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            f: Text file handle to write to
+        """
+        for event in self.iter_graph(dependencies):
+            if event[0] == "node":
+                record = {"type": "node", "id": event[1]}
+            else:
+                record = {"type": "edge", "source": event[1], "target": event[2]}
+            f.write(json.dumps(record))
+            f.write("\n")
+
+    def export(self, dependencies: Dict[str, List[Tuple[str, str, str]]], export_format: str,
+               output_file: str) -> None:
+        """
+        Export the graph to a file.
+
+        Args:
+            dependencies: Dictionary of package dependencies
+            export_format: One of "dot", "graphml" or "jsonl"
+            output_file: Path of the file to write
+        """
+        if export_format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        writer = getattr(self, f"write_{export_format}")
+        with open(output_file, "w", encoding="utf-8") as f:
+            writer(dependencies, f)
+        logger.info(f"Graph exported to {output_file}")
+
+class PlantUMLRenderer:
+    """
+    Renders PlantUML diagrams through long-lived PlantUML processes.
+
+    One process per output format is started in ``-pipe`` mode on first use
+    and every diagram is streamed through its stdin, so the JVM startup cost
+    is paid once instead of once per graph. Use as a context manager or call
+    ``close()`` to stop the processes.
+    """
+
+    FORMATS = ("png", "svg")
+    DELIMITER = b"___PLANTUML_RENDER_END___"
+
+    def __init__(self, plantuml_path: str, output_format: str = "png", java_path: str = "java"):
+        """
+        Initialize the renderer.
+
+        Args:
+            plantuml_path: Path to PlantUML JAR file
+            output_format: Default image format, "png" or "svg"
+            java_path: Java executable used to start PlantUML
+        """
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.plantuml_path = plantuml_path
+        self.output_format = output_format
+        self.java_path = java_path
+        self.timings: List[Tuple[str, float]] = []
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._stderr_files: Dict[str, object] = {}
+        self._buffers: Dict[str, bytearray] = {}
+
+    def __enter__(self) -> "PlantUMLRenderer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _process(self, output_format: str) -> subprocess.Popen:
+        """Return the running PlantUML process for a format, starting it if needed."""
+        process = self._processes.get(output_format)
+        if process is not None and process.poll() is None:
+            return process
+
+        # stderr goes to a file so an unread pipe can never block PlantUML
+        stderr_file = tempfile.TemporaryFile()
+        command = [
+            self.java_path, "-jar", self.plantuml_path, "-pipe", f"-t{output_format}",
+            "-pipedelimitor", self.DELIMITER.decode("ascii")
+        ]
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=stderr_file)
+        except OSError as e:
+            stderr_file.close()
+            raise RuntimeError(f"Failed to start PlantUML: {str(e)}")
+
+        logger.debug(f"Started PlantUML worker for {output_format}")
+        self._processes[output_format] = process
+        self._stderr_files[output_format] = stderr_file
+        self._buffers[output_format] = bytearray()
+        return process
+
+    def _read_image(self, output_format: str, process: subprocess.Popen) -> bytes:
+        """Read one rendered image from the process output up to the delimiter."""
+        buffer = self._buffers[output_format]
+        while True:
+            # Line ending printed after the previous delimiter
+            while buffer[:1] in (b"\r", b"\n"):
+                del buffer[:1]
+            index = buffer.find(self.DELIMITER)
+            if index != -1:
+                image = bytes(buffer[:index])
+                del buffer[:index + len(self.DELIMITER)]
+                return image
+            chunk = process.stdout.read1(65536)
+            if not chunk:
+                raise RuntimeError(f"Failed to generate graph: {self._error_output(output_format)}")
+            buffer.extend(chunk)
+
+    def _error_output(self, output_format: str) -> str:
+        stderr_file = self._stderr_files.get(output_format)
+        if stderr_file is None:
+            return "PlantUML process exited"
+        stderr_file.seek(0)
+        message = stderr_file.read().decode("utf-8", errors="replace").strip()
+        return message or "PlantUML process exited"
+
+    def render(self, plantuml_text: str, output_file: Optional[str] = None,
+               output_format: Optional[str] = None) -> bytes:
+        """
+        Render one diagram.
+
+        Args:
+            plantuml_text: PlantUML diagram content
+            output_file: File to write the image to
+            output_format: Image format, defaults to the renderer format
+
+        Returns:
+            Rendered image as bytes
+
+        Raises:
+            RuntimeError: If PlantUML fails or exits
+        """
+        output_format = output_format or self.output_format
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        process = self._process(output_format)
+        start = time.perf_counter()
+        try:
+            process.stdin.write(plantuml_text.rstrip("\n").encode("utf-8") + b"\n")
+            process.stdin.flush()
+        except OSError as e:
+            raise RuntimeError(f"Failed to generate graph: {self._error_output(output_format)}")
+        image = self._read_image(output_format, process)
+        elapsed = time.perf_counter() - start
+
+        label = output_file or "<memory>"
+        self.timings.append((label, elapsed))
+        logger.debug(f"Rendered {label} in {elapsed:.3f}s")
+
+        if output_file:
+            with open(output_file, "wb") as f:
+                f.write(image)
+        return image
+
+    def render_files(self, puml_files: List[str], output_format: Optional[str] = None) -> List[str]:
+        """
+        Render several PlantUML files through the same process.
+
+        Each image is written next to its source file with the extension of
+        the output format.
+
+        Args:
+            puml_files: Paths of PlantUML files
+            output_format: Image format, defaults to the renderer format
+
+        Returns:
+            Paths of the rendered images
+        """
+        output_format = output_format or self.output_format
+        outputs = []
+        for puml_file in puml_files:
+            with open(puml_file) as f:
+                plantuml_text = f.read()
+            image_file = f"{os.path.splitext(puml_file)[0]}.{output_format}"
+            self.render(plantuml_text, image_file, output_format)
+            outputs.append(image_file)
+        return outputs
+
+    def close(self) -> None:
+        """Stop all PlantUML processes."""
+        for output_format, process in self._processes.items():
+            try:
+                process.stdin.close()
+                process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+            self._stderr_files[output_format].close()
+        self._processes.clear()
+        self._stderr_files.clear()
+        self._buffers.clear()
+
+def read_packages(path: str) -> List[str]:
+    """
+    Read root packages from a batch file.
+
+    Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path: Path to the batch file
+
+    Returns:
+        Packages in group:artifact:version format
+    """
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def render_graph(visualizer: GraphVisualizer, dependencies: Dict[str, List[Tuple[str, str, str]]],
+                 name: str, args: argparse.Namespace, renderer: Optional[PlantUMLRenderer] = None) -> None:
+    """Condense, render and export one graph according to the command line options."""
+    focus = args.focus
+    if focus is not None:
+        nodes = {event[1] for event in GraphExporter.iter_graph(dependencies) if event[0] == "node"}
+        if focus not in nodes:
+            logger.warning(f"Focus package {focus} not in graph {name}, rendering full graph")
+            focus = None
+    graph = visualizer.condense(
+        dependencies, focus=focus, focus_depth=args.focus_depth, top_k=args.top_k,
+        collapse_groups=args.collapse_groups, transitive=args.transitive_reduction
+    )
+    plantuml_text = visualizer.generate_plantuml(graph)
+    visualizer.visualize(plantuml_text, args.plantuml_path, args.format, renderer, name)
+
+    exporter = GraphExporter()
+    for export_format in args.export:
+        output_file = os.path.join(args.output_path, f"{name}.{export_format}")
+        exporter.export(dependencies, export_format, output_file)
+
 def main():
     """Main entry point for the dependency visualizer."""
     parser = argparse.ArgumentParser(
@@ -212,14 +1489,51 @@ def main():
     )
     parser.add_argument("--repo-url", required=True,
                       help="URL of the Maven repository")
-    parser.add_argument("--package", required=True,
+    roots = parser.add_mutually_exclusive_group(required=True)
+    roots.add_argument("--package",
                       help="Package to analyze (format: group:artifact:version)")
+    roots.add_argument("--batch",
+                      help="File with one package per line to analyze in one session")
     parser.add_argument("--depth", type=int, default=3,
                       help="Maximum dependency depth")
     parser.add_argument("--plantuml-path", required=True,
                       help="Path to PlantUML jar file")
     parser.add_argument("--output-path", default=".",
                       help="Output directory for the graph")
+    parser.add_argument("--format", choices=PlantUMLRenderer.FORMATS, default="png",
+                      help="Image format of the rendered graph")
+    parser.add_argument("--export", choices=GraphExporter.FORMATS, action="append", default=[],
+                      help="Also export the graph in this format (can be repeated)")
+    parser.add_argument("--focus",
+                      help="Render only the neighborhood of this package (format: group:artifact:version)")
+    parser.add_argument("--focus-depth", type=int, default=2,
+                      help="Neighborhood distance around --focus")
+    parser.add_argument("--top-k", type=int,
+                      help="Render only the K most depended-on packages")
+    parser.add_argument("--collapse-groups", action="store_true",
+                      help="Collapse packages with the same groupId into one node")
+    parser.add_argument("--transitive-reduction", action="store_true",
+                      help="Drop edges implied by other dependency paths")
+    parser.add_argument("--checkpoint",
+                      help="File to periodically save the crawl state to")
+    parser.add_argument("--checkpoint-interval", type=int, default=500,
+                      help="Number of POM fetches between checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                      help="Continue the crawl saved in --checkpoint")
+    parser.add_argument("--metadata-cache",
+                      help="JSON file to keep maven-metadata.xml lookups between runs")
+    parser.add_argument("--metadata-ttl", type=float, default=86400,
+                      help="Seconds a cached maven-metadata.xml entry stays valid")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                      help="Number of processes to parse POM files in (0 parses in the main process)")
+    parser.add_argument("--retries", type=int, default=0,
+                      help="Retries for timeouts, connection errors and 429/5xx responses")
+    parser.add_argument("--stats-json",
+                      help="Write crawl telemetry to this JSON file")
+    parser.add_argument("--db",
+                      help="SQLite database to store crawl results in and reuse them from")
+    parser.add_argument("--db-max-age", type=float,
+                      help="Refetch packages stored in --db more than this many seconds ago")
     parser.add_argument("--verbose", action="store_true",
                       help="Enable verbose logging")
     
@@ -228,18 +1542,45 @@ def main():
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+
+    if args.package:
+        packages = [args.package]
+        if len(args.package.split(":")) != 3:
+            parser.error("Package must be in format 'group:artifact:version'")
+    else:
+        packages = read_packages(args.batch)
+
     try:
-        group, artifact, version = args.package.split(":")
-    except ValueError:
-        parser.error("Package must be in format 'group:artifact:version'")
-        
-    try:
-        analyzer = DependencyAnalyzer(args.repo_url, args.depth)
-        analyzer.collect_dependencies(group, artifact, version)
-        
+        store = GraphStore(args.db) if args.db else None
+        try:
+            with DependencyAnalyzer(args.repo_url, args.depth, checkpoint_path=args.checkpoint,
+                                    checkpoint_interval=args.checkpoint_interval,
+                                    metadata_cache_path=args.metadata_cache, metadata_ttl=args.metadata_ttl,
+                                    parse_workers=args.parse_workers, max_retries=args.retries,
+                                    store=store, store_max_age=args.db_max_age) as analyzer:
+                if args.resume and not analyzer.load_checkpoint():
+                    logger.warning(f"Checkpoint {args.checkpoint} not found, starting a new crawl")
+                graphs = analyzer.collect_batch(packages)
+        finally:
+            if store is not None:
+                store.close()
+        print(analyzer.stats.summary())
+        if args.stats_json:
+            analyzer.stats.write_json(args.stats_json)
         visualizer = GraphVisualizer(args.output_path)
-        plantuml_text = visualizer.generate_plantuml(analyzer.dependencies)
-        visualizer.visualize(plantuml_text, args.plantuml_path)
+
+        if args.package:
+            render_graph(visualizer, analyzer.dependencies, "graph", args)
+        else:
+            with PlantUMLRenderer(args.plantuml_path, args.format) as renderer:
+                for package, graph in graphs.items():
+                    render_graph(visualizer, graph, package.replace(":", "_"), args, renderer)
+                render_graph(visualizer, analyzer.dependencies, "graph", args, renderer)
+    except KeyboardInterrupt:
+        logger.error("Interrupted")
+        exit(130)
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         exit(1)
@@ -0,0 +1,189 @@
+import time
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+class GraphStore:
+    """
+    SQLite-backed persistent store for crawled dependency graphs.
+
+    Stores artifacts with the hash and fetch time of their POM, and the
+    dependency edges between them. Coordinates are indexed by a unique
+    constraint and edges by (child, parent) for reverse lookups. Writes are
+    buffered and inserted in one transaction per batch.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id INTEGER PRIMARY KEY,
+            group_id TEXT NOT NULL,
+            artifact_id TEXT NOT NULL,
+            version TEXT NOT NULL,
+            pom_sha256 TEXT,
+            fetched_at REAL,
+            UNIQUE (group_id, artifact_id, version)
+        );
+        CREATE TABLE IF NOT EXISTS edges (
+            parent_id INTEGER NOT NULL REFERENCES artifacts (id),
+            child_id INTEGER NOT NULL REFERENCES artifacts (id),
+            position INTEGER NOT NULL,
+            PRIMARY KEY (parent_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS edges_by_child ON edges (child_id, parent_id);
+    """
+
+    ARTIFACT_ID = "(SELECT id FROM artifacts WHERE group_id = ? AND artifact_id = ? AND version = ?)"
+
+    def __init__(self, path: str, batch_size: int = 500):
+        """
+        Open or create a store.
+
+        Args:
+            path: SQLite database file
+            batch_size: Number of packages buffered before a transaction is written
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # package key -> (pom hash, fetched_at, dependencies)
+        self._pending: Dict[str, Tuple[str, float, List[Tuple[str, str, str]]]] = {}
+
+    def __enter__(self) -> "GraphStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add_package(self, package_key: str, pom_sha256: str,
+                    dependencies: List[Tuple[str, str, str]]) -> None:
+        """
+        Record a crawled package and its dependencies.
+
+        Args:
+            package_key: Package in group:artifact:version format
+            pom_sha256: SHA-256 hex digest of the POM content
+            dependencies: List of tuples (group_id, artifact_id, version)
+        """
+        self._pending[package_key] = (pom_sha256, time.time(), list(dependencies))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered packages in one transaction."""
+        if not self._pending:
+            return
+        artifacts = set()
+        for package_key, (_, _, dependencies) in self._pending.items():
+            artifacts.add(tuple(package_key.split(":")))
+            artifacts.update(dependencies)
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO artifacts (group_id, artifact_id, version) VALUES (?, ?, ?)",
+                artifacts
+            )
+            self._conn.executemany(
+                "UPDATE artifacts SET pom_sha256 = ?, fetched_at = ? "
+                "WHERE group_id = ? AND artifact_id = ? AND version = ?",
+                [(pom_sha256, fetched_at, *package_key.split(":"))
+                 for package_key, (pom_sha256, fetched_at, _) in self._pending.items()]
+            )
+            self._conn.executemany(
+                f"DELETE FROM edges WHERE parent_id = {self.ARTIFACT_ID}",
+                [tuple(package_key.split(":")) for package_key in self._pending]
+            )
+            self._conn.executemany(
+                f"INSERT INTO edges (parent_id, child_id, position) "
+                f"VALUES ({self.ARTIFACT_ID}, {self.ARTIFACT_ID}, ?)",
+                [(*package_key.split(":"), *dependency, position)
+                 for package_key, (_, _, dependencies) in self._pending.items()
+                 for position, dependency in enumerate(dependencies)]
+            )
+        self._pending.clear()
+
+    def get_dependencies(self, package_key: str,
+                         max_age: Optional[float] = None) -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Return the stored dependencies of a crawled package.
+
+        Args:
+            package_key: Package in group:artifact:version format
+            max_age: Ignore packages fetched more than this many seconds ago
+
+        Returns:
+            List of dependencies, or None if the package was not crawled
+            (recently enough)
+        """
+        pending = self._pending.get(package_key)
+        if pending is not None:
+            return list(pending[2])
+
+        row = self._conn.execute(
+            "SELECT id, fetched_at FROM artifacts WHERE group_id = ? AND artifact_id = ? AND version = ?",
+            package_key.split(":")
+        ).fetchone()
+        if row is None or row[1] is None:
+            return None
+        if max_age is not None and time.time() - row[1] > max_age:
+            return None
+        return self._conn.execute(
+            "SELECT a.group_id, a.artifact_id, a.version FROM edges e "
+            "JOIN artifacts a ON a.id = e.child_id WHERE e.parent_id = ? ORDER BY e.position",
+            (row[0],)
+        ).fetchall()
+
+    def get_pom_hash(self, package_key: str) -> Optional[str]:
+        """Return the SHA-256 digest of the stored POM of a package."""
+        self.flush()
+        row = self._conn.execute(
+            "SELECT pom_sha256 FROM artifacts WHERE group_id = ? AND artifact_id = ? AND version = ?",
+            package_key.split(":")
+        ).fetchone()
+        return row[0] if row else None
+
+    def dependents(self, package_key: str) -> List[str]:
+        """
+        Return the packages that depend directly on a package.
+
+        Args:
+            package_key: Package in group:artifact:version format
+
+        Returns:
+            Dependent packages in group:artifact:version format
+        """
+        self.flush()
+        rows = self._conn.execute(
+            "SELECT DISTINCT p.group_id, p.artifact_id, p.version FROM edges e "
+            f"JOIN artifacts p ON p.id = e.parent_id WHERE e.child_id = {self.ARTIFACT_ID} "
+            "ORDER BY 1, 2, 3",
+            package_key.split(":")
+        ).fetchall()
+        return [":".join(row) for row in rows]
+
+    def load_graph(self) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Load every crawled package with its dependencies.
+
+        Returns:
+            Dictionary of package dependencies
+        """
+        self.flush()
+        graph: Dict[str, List[Tuple[str, str, str]]] = {}
+        for group_id, artifact_id, version in self._conn.execute(
+                "SELECT group_id, artifact_id, version FROM artifacts WHERE fetched_at IS NOT NULL"):
+            graph[f"{group_id}:{artifact_id}:{version}"] = []
+        rows = self._conn.execute(
+            "SELECT p.group_id, p.artifact_id, p.version, c.group_id, c.artifact_id, c.version "
+            "FROM edges e JOIN artifacts p ON p.id = e.parent_id JOIN artifacts c ON c.id = e.child_id "
+            "ORDER BY e.parent_id, e.position"
+        )
+        for row in rows:
+            graph[":".join(row[:3])].append(tuple(row[3:]))
+        return graph
+
+    def close(self) -> None:
+        """Write buffered packages and close the database."""
+        self.flush()
+        self._conn.close()
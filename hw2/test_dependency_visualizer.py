@@ -1,12 +1,15 @@
 import unittest
 from unittest.mock import patch, Mock
+import io
+import json
 import os
 import tempfile
 import requests
 import subprocess
 from dependency_visualizer import (
-    DependencyAnalyzer, GraphVisualizer,
-    POMFetchError, POMParseError
+    CrawlStats, DependencyAnalyzer, GraphVisualizer, GraphExporter, PlantUMLRenderer,
+    DependencyAnalyzerError, POMFetchError, POMParseError, VersionResolver,
+    VersionResolutionError, extract_dependencies, read_packages
 )
 
 class TestDependencyAnalyzer(unittest.TestCase):
@@ -54,6 +57,122 @@ class TestDependencyAnalyzer(unittest.TestCase):
         deps = self.analyzer.parse_pom(incomplete_pom)
         self.assertEqual(len(deps), 0)
 
+    @patch('time.sleep')
+    @patch('requests.get')
+    def test_fetch_retries_transient_errors(self, mock_get, mock_sleep):
+        """Test that transient errors are retried and recorded in telemetry."""
+        failed = Mock(status_code=503)
+        failed.raise_for_status.side_effect = requests.exceptions.HTTPError("503", response=failed)
+        succeeded = Mock(status_code=200, text=self.sample_pom)
+        mock_get.side_effect = [requests.exceptions.ConnectionError("reset"), failed, succeeded]
+
+        analyzer = DependencyAnalyzer("https://repo.example", 3, max_retries=2)
+        self.assertEqual(analyzer.fetch_pom("org.example", "example-lib", "1.0.0"), self.sample_pom)
+        self.assertEqual(analyzer.stats.retries, 2)
+        self.assertEqual(len(analyzer.stats.latencies), 3)
+        self.assertEqual(analyzer.stats.bytes_received, len(self.sample_pom.encode("utf-8")))
+
+        not_found = Mock(status_code=404)
+        not_found.raise_for_status.side_effect = requests.exceptions.HTTPError("404", response=not_found)
+        mock_get.side_effect = [not_found]
+        with self.assertRaises(POMFetchError):
+            analyzer.fetch_pom("org.example", "missing", "1.0.0")
+        self.assertEqual(analyzer.stats.retries, 2)
+        self.assertEqual(analyzer.stats.failures["404"], 1)
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_crawl_telemetry(self, mock_parse_pom, mock_fetch_pom):
+        """Test cache and fan-out telemetry of a crawl."""
+        graph = {
+            "org.app:one:1.0": [("org.lib", "common", "1.0")],
+            "org.app:two:1.0": [("org.lib", "common", "1.0"), ("org.lib", "extra", "1.0")],
+        }
+        mock_fetch_pom.side_effect = lambda group, artifact, version: f"{group}:{artifact}:{version}"
+        mock_parse_pom.side_effect = lambda key: graph.get(key, [])
+
+        self.analyzer.collect_batch(["org.app:one:1.0", "org.app:two:1.0"])
+        report = self.analyzer.stats.to_dict()
+        self.assertEqual(report["cache"]["pom"], {"hits": 1, "misses": 4})
+        self.assertEqual(report["fanout"]["0"], {"packages": 2, "dependencies": 3, "mean": 1.5})
+        self.assertIn("Cache pom hits/misses", self.analyzer.stats.summary())
+
+    def test_extract_dependencies_sections_and_properties(self):
+        """Test that only direct dependencies are read and properties substituted."""
+        pom = """<project>
+                <parent>
+                    <groupId>org.parent</groupId>
+                    <artifactId>parent</artifactId>
+                    <version>3.1</version>
+                </parent>
+                <artifactId>child</artifactId>
+                <properties>
+                    <lib.version>1.5</lib.version>
+                </properties>
+                <dependencyManagement>
+                    <dependencies>
+                        <dependency>
+                            <groupId>org.managed</groupId>
+                            <artifactId>managed</artifactId>
+                            <version>9.9</version>
+                        </dependency>
+                    </dependencies>
+                </dependencyManagement>
+                <dependencies>
+                    <dependency>
+                        <groupId>org.lib</groupId>
+                        <artifactId>lib</artifactId>
+                        <version>${lib.version}</version>
+                    </dependency>
+                    <dependency>
+                        <groupId>${project.groupId}</groupId>
+                        <artifactId>sibling</artifactId>
+                        <version>${project.version}</version>
+                    </dependency>
+                </dependencies>
+                <build>
+                    <plugins>
+                        <plugin>
+                            <dependencies>
+                                <dependency>
+                                    <groupId>org.plugin</groupId>
+                                    <artifactId>plugin-dep</artifactId>
+                                    <version>1.0</version>
+                                </dependency>
+                            </dependencies>
+                        </plugin>
+                    </plugins>
+                </build>
+            </project>"""
+        self.assertEqual(extract_dependencies(pom), [
+            ("org.lib", "lib", "1.5"),
+            ("org.parent", "sibling", "3.1")
+        ])
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    def test_collect_dependencies_with_parse_workers(self, mock_fetch_pom):
+        """Test crawling with POM parsing in a process pool."""
+        poms = {
+            "org.root:app:1.0": [("org.lib", "a", "1.0"), ("org.lib", "b", "1.0")],
+            "org.lib:a:1.0": [("org.lib", "b", "1.0")],
+        }
+
+        def fetch(group, artifact, version):
+            deps = "".join(
+                f"<dependency><groupId>{g}</groupId><artifactId>{a}</artifactId><version>{v}</version></dependency>"
+                for g, a, v in poms.get(f"{group}:{artifact}:{version}", [])
+            )
+            return f"<project><dependencies>{deps}</dependencies></project>"
+
+        mock_fetch_pom.side_effect = fetch
+        with DependencyAnalyzer("https://repo.example", 3, parse_workers=2) as analyzer:
+            analyzer.collect_dependencies("org.root", "app", "1.0")
+
+        self.assertEqual(analyzer.dependencies["org.root:app:1.0"], poms["org.root:app:1.0"])
+        self.assertEqual(analyzer.dependencies["org.lib:a:1.0"], poms["org.lib:a:1.0"])
+        self.assertEqual(analyzer.dependencies["org.lib:b:1.0"], [])
+        self.assertEqual(mock_fetch_pom.call_count, 3)
+
     @patch('requests.get')
     def test_fetch_pom_success(self, mock_get):
         """Test successful POM fetch."""
@@ -98,6 +217,221 @@ class TestDependencyAnalyzer(unittest.TestCase):
         # Check depth limit
         self.assertLessEqual(len(self.analyzer.processed_packages), self.analyzer.max_depth + 1)
 
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_collect_batch_shares_cache(self, mock_parse_pom, mock_fetch_pom):
+        """Test that shared artifacts are fetched once across roots."""
+        graph = {
+            "org.app:one:1.0": [("org.lib", "common", "1.0")],
+            "org.app:two:1.0": [("org.lib", "common", "1.0"), ("org.lib", "extra", "1.0")],
+            "org.lib:common:1.0": [("org.lib", "core", "1.0")],
+        }
+        mock_fetch_pom.side_effect = lambda group, artifact, version: f"{group}:{artifact}:{version}"
+        mock_parse_pom.side_effect = lambda key: graph.get(key, [])
+
+        graphs = self.analyzer.collect_batch(["org.app:one:1.0", "org.app:two:1.0"])
+
+        fetched = [":".join(call.args) for call in mock_fetch_pom.call_args_list]
+        self.assertEqual(len(fetched), len(set(fetched)))
+        self.assertEqual(fetched.count("org.lib:core:1.0"), 1)
+        self.assertEqual(set(graphs["org.app:one:1.0"]),
+                         {"org.app:one:1.0", "org.lib:common:1.0", "org.lib:core:1.0"})
+        self.assertIn("org.lib:extra:1.0", graphs["org.app:two:1.0"])
+        self.assertIn("org.lib:core:1.0", graphs["org.app:two:1.0"])
+        self.assertEqual(len(self.analyzer.dependencies), 5)
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_checkpoint_and_resume(self, mock_parse_pom, mock_fetch_pom):
+        """Test that an interrupted crawl resumes without refetching."""
+        graph = {
+            "org.root:app:1.0": [("org.lib", "a", "1.0"), ("org.lib", "b", "1.0")],
+            "org.lib:a:1.0": [("org.lib", "c", "1.0")],
+        }
+        fetched = []
+
+        def fetch(group, artifact, version):
+            key = f"{group}:{artifact}:{version}"
+            if len(fetched) == 2 and not mock_fetch_pom.resumed:
+                raise KeyboardInterrupt
+            fetched.append(key)
+            return key
+
+        mock_fetch_pom.resumed = False
+        mock_fetch_pom.side_effect = fetch
+        mock_parse_pom.side_effect = lambda key: graph.get(key, [])
+
+        temp_dir = tempfile.mkdtemp()
+        checkpoint = os.path.join(temp_dir, "crawl.json")
+        try:
+            analyzer = DependencyAnalyzer("https://repo.example", 3, checkpoint, checkpoint_interval=1)
+            with self.assertRaises(KeyboardInterrupt):
+                analyzer.collect_batch(["org.root:app:1.0"])
+            self.assertTrue(os.path.exists(checkpoint))
+            self.assertEqual(os.listdir(temp_dir), ["crawl.json"])
+
+            mock_fetch_pom.resumed = True
+            resumed = DependencyAnalyzer("https://repo.example", 3, checkpoint)
+            self.assertTrue(resumed.load_checkpoint())
+            graphs = resumed.collect_batch(["org.root:app:1.0"])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(len(fetched), len(set(fetched)))
+        self.assertEqual(set(graphs["org.root:app:1.0"]),
+                         {"org.root:app:1.0", "org.lib:a:1.0", "org.lib:b:1.0", "org.lib:c:1.0"})
+        self.assertEqual(resumed.completed_roots, ["org.root:app:1.0"])
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_resume_retries_failed_fetches(self, mock_parse_pom, mock_fetch_pom):
+        """Test that packages whose fetch failed are fetched again after resuming."""
+        graph = {
+            "org.root:app:1.0": [("org.lib", "a", "1.0"), ("org.lib", "b", "1.0")],
+            "org.lib:b:1.0": [("org.lib", "c", "1.0")],
+        }
+        fetched = []
+
+        def fetch(group, artifact, version):
+            key = f"{group}:{artifact}:{version}"
+            if key == "org.lib:b:1.0" and not mock_fetch_pom.resumed:
+                raise POMFetchError("Connection reset")
+            fetched.append(key)
+            return key
+
+        mock_fetch_pom.resumed = False
+        mock_fetch_pom.side_effect = fetch
+        mock_parse_pom.side_effect = lambda key: graph.get(key, [])
+
+        temp_dir = tempfile.mkdtemp()
+        checkpoint = os.path.join(temp_dir, "crawl.json")
+        try:
+            analyzer = DependencyAnalyzer("https://repo.example", 3, checkpoint)
+            graphs = analyzer.collect_batch(["org.root:app:1.0"])
+            self.assertNotIn("org.lib:b:1.0", graphs["org.root:app:1.0"])
+
+            mock_fetch_pom.resumed = True
+            resumed = DependencyAnalyzer("https://repo.example", 3, checkpoint)
+            self.assertTrue(resumed.load_checkpoint())
+            graphs = resumed.collect_batch(["org.root:app:1.0"])
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(fetched, ["org.root:app:1.0", "org.lib:a:1.0", "org.lib:b:1.0", "org.lib:c:1.0"])
+        self.assertEqual(set(graphs["org.root:app:1.0"]),
+                         {"org.root:app:1.0", "org.lib:a:1.0", "org.lib:b:1.0", "org.lib:c:1.0"})
+
+    def test_load_checkpoint_rejects_other_repository(self):
+        """Test that a checkpoint for another repository is not resumed."""
+        temp_dir = tempfile.mkdtemp()
+        checkpoint = os.path.join(temp_dir, "crawl.json")
+        try:
+            DependencyAnalyzer("https://repo.example", 3, checkpoint).save_checkpoint()
+            other = DependencyAnalyzer("https://other.example", 3, checkpoint)
+            with self.assertRaises(DependencyAnalyzerError):
+                other.load_checkpoint()
+            self.assertFalse(DependencyAnalyzer("https://repo.example", 3).load_checkpoint())
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir)
+
+    def test_read_packages(self):
+        """Test reading root packages from a batch file."""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("# services\norg.app:one:1.0\n\n  org.app:two:1.0\n")
+        try:
+            self.assertEqual(read_packages(f.name), ["org.app:one:1.0", "org.app:two:1.0"])
+        finally:
+            os.remove(f.name)
+
+class TestVersionResolver(unittest.TestCase):
+    def setUp(self):
+        self.metadata = """<?xml version="1.0" encoding="UTF-8"?>
+            <metadata>
+                <groupId>org.example</groupId>
+                <artifactId>lib</artifactId>
+                <versioning>
+                    <latest>2.1-SNAPSHOT</latest>
+                    <release>2.0</release>
+                    <versions>
+                        <version>1.10</version>
+                        <version>1.2</version>
+                        <version>1.9-rc1</version>
+                        <version>1.9</version>
+                        <version>2.0</version>
+                        <version>2.1-SNAPSHOT</version>
+                    </versions>
+                </versioning>
+            </metadata>"""
+        self.fetch = Mock(return_value=self.metadata)
+        self.resolver = VersionResolver("https://repo.example", self.fetch)
+
+    def test_version_ordering(self):
+        """Test Maven version ordering."""
+        key = VersionResolver.version_key
+        self.assertLess(key("1.9"), key("1.10"))
+        self.assertLess(key("1.9-rc1"), key("1.9"))
+        self.assertLess(key("2.1-SNAPSHOT"), key("2.1"))
+        self.assertEqual(key("1.0"), key("1"))
+
+    def test_resolve_ranges(self):
+        """Test resolving version ranges to the highest match."""
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "[1.2,2.0)"), "1.10")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "[1.2,2.0]"), "2.0")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "(,1.9)"), "1.9-rc1")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "[1.9]"), "1.9")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "(,1.2],[1.9,1.10)"), "1.9")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "LATEST"), "2.1-SNAPSHOT")
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "RELEASE"), "2.0")
+        self.fetch.assert_called_once_with("https://repo.example/org/example/lib/maven-metadata.xml")
+
+    def test_plain_version_needs_no_lookup(self):
+        """Test that plain versions are returned without fetching metadata."""
+        self.assertEqual(self.resolver.resolve("org.example", "lib", "1.0.0"), "1.0.0")
+        self.fetch.assert_not_called()
+        self.assertFalse(VersionResolver.is_dynamic(""))
+        self.assertFalse(VersionResolver.is_dynamic(None))
+        self.assertTrue(VersionResolver.is_dynamic("(,1.0]"))
+
+    def test_unmatched_range(self):
+        """Test that a range without matching versions raises an error."""
+        with self.assertRaises(VersionResolutionError):
+            self.resolver.resolve("org.example", "lib", "[3.0,)")
+
+    def test_persistent_cache(self):
+        """Test that metadata is reused from the cache file within the TTL."""
+        temp_dir = tempfile.mkdtemp()
+        cache_path = os.path.join(temp_dir, "metadata.json")
+        try:
+            resolver = VersionResolver("https://repo.example", self.fetch, cache_path)
+            resolver.resolve("org.example", "lib", "RELEASE")
+            resolver.save_cache()
+
+            fetch = Mock(side_effect=POMFetchError("offline"))
+            cached = VersionResolver("https://repo.example", fetch, cache_path)
+            self.assertEqual(cached.resolve("org.example", "lib", "[1.0,2.0)"), "1.10")
+            fetch.assert_not_called()
+
+            expired = VersionResolver("https://repo.example", fetch, cache_path, ttl=0)
+            with self.assertRaises(VersionResolutionError):
+                expired.resolve("org.example", "lib", "RELEASE")
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir)
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_analyzer_resolves_dependency_ranges(self, mock_parse_pom, mock_fetch_pom):
+        """Test that collected dependencies carry resolved versions."""
+        analyzer = DependencyAnalyzer("https://repo.example", 0)
+        analyzer.resolver = self.resolver
+        mock_fetch_pom.return_value = ""
+        mock_parse_pom.return_value = [("org.example", "lib", "[1.0,2.0)")]
+        analyzer.collect_dependencies("org.root", "app", "1.0")
+        self.assertEqual(analyzer.dependencies["org.root:app:1.0"], [("org.example", "lib", "1.10")])
+
 class TestGraphVisualizer(unittest.TestCase):
     def setUp(self):
         self.temp_dir = tempfile.mkdtemp()
@@ -134,6 +468,64 @@ class TestGraphVisualizer(unittest.TestCase):
         self.assertIn('"org.example:lib1:1.0.0"', plantuml)
         self.assertIn(' -> ', plantuml)
 
+    @staticmethod
+    def edges(dependencies):
+        return {(parent, ":".join(child)) for parent, children in dependencies.items() for child in children}
+
+    def test_collapse_groups(self):
+        """Test collapsing packages by groupId."""
+        dependencies = {
+            "org.a:x:1": [("org.a", "y", "1"), ("org.b", "z", "1")],
+            "org.a:y:1": [("org.b", "w", "1")]
+        }
+        collapsed = self.visualizer.collapse_groups(dependencies)
+        self.assertEqual(self.edges(collapsed), {("org.a", "org.b")})
+        self.assertIn("org.b", collapsed)
+
+    def test_transitive_reduction(self):
+        """Test that edges implied by longer paths are dropped."""
+        dependencies = {
+            "g:a:1": [("g", "b", "1"), ("g", "c", "1")],
+            "g:b:1": [("g", "c", "1")]
+        }
+        reduced = self.visualizer.transitive_reduction(dependencies)
+        self.assertEqual(self.edges(reduced), {("g:a:1", "g:b:1"), ("g:b:1", "g:c:1")})
+
+    def test_transitive_reduction_keeps_cycles(self):
+        """Test that reduction preserves reachability through cycles."""
+        dependencies = {
+            "g:a:1": [("g", "b", "1"), ("g", "c", "1")],
+            "g:b:1": [("g", "c", "1")],
+            "g:c:1": [("g", "b", "1")]
+        }
+        reduced = self.visualizer.transitive_reduction(dependencies)
+        edges = self.edges(reduced)
+        self.assertIn(("g:b:1", "g:c:1"), edges)
+        self.assertIn(("g:c:1", "g:b:1"), edges)
+        self.assertEqual(len([edge for edge in edges if edge[0] == "g:a:1"]), 1)
+
+    def test_top_k(self):
+        """Test keeping the most depended-on packages."""
+        dependencies = {
+            "g:a:1": [("g", "c", "1"), ("g", "d", "1")],
+            "g:b:1": [("g", "c", "1")],
+        }
+        reduced = self.visualizer.top_k(dependencies, 1)
+        self.assertEqual(list(reduced), ["g:c:1"])
+
+    def test_neighborhood(self):
+        """Test depth-limited neighborhood around a focus package."""
+        dependencies = {
+            "g:a:1": [("g", "b", "1")],
+            "g:b:1": [("g", "c", "1")],
+            "g:c:1": [("g", "d", "1")]
+        }
+        reduced = self.visualizer.neighborhood(dependencies, "g:b:1", 1)
+        self.assertEqual(set(reduced), {"g:a:1", "g:b:1", "g:c:1"})
+        self.assertEqual(self.edges(reduced), {("g:a:1", "g:b:1"), ("g:b:1", "g:c:1")})
+        with self.assertRaises(ValueError):
+            self.visualizer.neighborhood(dependencies, "g:x:1", 1)
+
     @patch('subprocess.run')
     def test_visualize_success(self, mock_run):
         """Test successful graph visualization."""
@@ -177,5 +569,138 @@ class TestGraphVisualizer(unittest.TestCase):
             self.visualizer.visualize(plantuml, "plantuml.jar")
         self.assertIn(error_msg, str(ctx.exception))
 
+class TestGraphExporter(unittest.TestCase):
+    def setUp(self):
+        self.exporter = GraphExporter()
+        self.dependencies = {
+            "org.example:root:1.0.0": [
+                ("org.example", "lib1", "1.0.0"),
+                ("org.example", "lib2", "1.0.0"),
+                ("org.example", "lib1", "1.0.0")
+            ],
+            "org.example:lib1:1.0.0": [
+                ("org.example", "lib2", "1.0.0")
+            ]
+        }
+
+    def test_iter_graph_declares_nodes_once(self):
+        """Test that nodes are declared once and edges deduplicated."""
+        events = list(GraphExporter.iter_graph(self.dependencies))
+        nodes = [event[1] for event in events if event[0] == "node"]
+        edges = [event[1:] for event in events if event[0] == "edge"]
+        self.assertEqual(nodes, [
+            "org.example:root:1.0.0", "org.example:lib1:1.0.0", "org.example:lib2:1.0.0"
+        ])
+        self.assertEqual(len(edges), 3)
+        self.assertEqual(len(set(edges)), 3)
+
+    def test_write_dot(self):
+        """Test Graphviz DOT export."""
+        f = io.StringIO()
+        self.exporter.write_dot(self.dependencies, f)
+        dot = f.getvalue()
+        self.assertTrue(dot.startswith("digraph Dependencies {"))
+        self.assertEqual(dot.count("[shape=component]"), 3)
+        self.assertEqual(dot.count(" -> "), 3)
+
+    def test_write_graphml(self):
+        """Test GraphML export is well-formed XML."""
+        import xml.etree.ElementTree as ET
+        f = io.StringIO()
+        self.exporter.write_graphml(self.dependencies, f)
+        root = ET.fromstring(f.getvalue().split("\n", 1)[1])
+        ns = {"g": "http://graphml.graphdrawing.org/xmlns"}
+        self.assertEqual(len(root.findall(".//g:node", ns)), 3)
+        self.assertEqual(len(root.findall(".//g:edge", ns)), 3)
+
+    def test_write_jsonl(self):
+        """Test JSON lines export."""
+        f = io.StringIO()
+        self.exporter.write_jsonl(self.dependencies, f)
+        records = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual(sum(1 for r in records if r["type"] == "node"), 3)
+        self.assertIn({"type": "edge", "source": "org.example:lib1:1.0.0",
+                       "target": "org.example:lib2:1.0.0"}, records)
+
+    def test_export_unknown_format(self):
+        """Test that unknown export formats are rejected."""
+        with self.assertRaises(ValueError):
+            self.exporter.export(self.dependencies, "csv", "graph.csv")
+
+class TestPlantUMLRenderer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        delimiter = PlantUMLRenderer.DELIMITER
+        self.process = Mock()
+        self.process.poll.return_value = None
+        self.process.stdin = io.BytesIO()
+        self.process.stdout = io.BytesIO(
+            b"<svg>first</svg>" + delimiter + b"\n<svg>second</svg>" + delimiter + b"\n"
+        )
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    @patch('subprocess.Popen')
+    def test_render_reuses_single_process(self, mock_popen):
+        """Test that several diagrams are streamed through one process."""
+        mock_popen.return_value = self.process
+        renderer = PlantUMLRenderer("plantuml.jar", "svg")
+
+        first = renderer.render("@startuml\nA -> B\n@enduml")
+        second = renderer.render("@startuml\nB -> C\n@enduml")
+
+        self.assertEqual(first, b"<svg>first</svg>")
+        self.assertEqual(second, b"<svg>second</svg>")
+        mock_popen.assert_called_once()
+        command = mock_popen.call_args[0][0]
+        self.assertIn("-pipe", command)
+        self.assertIn("-tsvg", command)
+        self.assertIn(b"A -> B", self.process.stdin.getvalue())
+        self.assertEqual(len(renderer.timings), 2)
+
+    @patch('subprocess.Popen')
+    def test_render_files(self, mock_popen):
+        """Test batch rendering of PlantUML files."""
+        mock_popen.return_value = self.process
+        puml_files = []
+        for name in ("one", "two"):
+            path = os.path.join(self.temp_dir, f"{name}.puml")
+            with open(path, "w") as f:
+                f.write("@startuml\nA -> B\n@enduml\n")
+            puml_files.append(path)
+
+        with PlantUMLRenderer("plantuml.jar", "svg") as renderer:
+            outputs = renderer.render_files(puml_files)
+
+        self.assertEqual(outputs, [os.path.join(self.temp_dir, "one.svg"),
+                                   os.path.join(self.temp_dir, "two.svg")])
+        with open(outputs[1], "rb") as f:
+            self.assertEqual(f.read(), b"<svg>second</svg>")
+
+    @patch('subprocess.Popen')
+    def test_render_process_exit(self, mock_popen):
+        """Test error when PlantUML exits without output."""
+        self.process.stdout = io.BytesIO(b"")
+        mock_popen.return_value = self.process
+        renderer = PlantUMLRenderer("plantuml.jar")
+        with self.assertRaises(RuntimeError):
+            renderer.render("@startuml\nA -> B\n@enduml")
+
+    def test_unsupported_format(self):
+        """Test that unknown output formats are rejected."""
+        with self.assertRaises(ValueError):
+            PlantUMLRenderer("plantuml.jar", "pdf")
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_repository_is_fully_crawled(self):
+        """Test crawling a small generated repository over local HTTP."""
+        from benchmark import run_benchmark
+        result = run_benchmark(artifacts=20, fanout=3, depth=2, shared_parents=2)
+        self.assertEqual(result["artifacts_crawled"], 20)
+        self.assertEqual(result["requests"], 20)
+        self.assertGreater(result["artifacts_per_sec"], 0)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from dependency_visualizer import DependencyAnalyzer
+from graph_store import GraphStore
+
+class TestGraphStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "graph.db")
+        self.store = GraphStore(self.db_path, batch_size=2)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_store_and_reload(self):
+        """Test that dependencies survive reopening the database."""
+        self.store.add_package("org.app:one:1.0", "abc", [("org.lib", "b", "2.0"), ("org.lib", "a", "1.0")])
+        self.store.add_package("org.lib:a:1.0", "def", [])
+        self.store.close()
+
+        self.store = GraphStore(self.db_path)
+        self.assertEqual(self.store.get_dependencies("org.app:one:1.0"),
+                         [("org.lib", "b", "2.0"), ("org.lib", "a", "1.0")])
+        self.assertEqual(self.store.get_dependencies("org.lib:a:1.0"), [])
+        # Known only as a dependency, never crawled
+        self.assertIsNone(self.store.get_dependencies("org.lib:b:2.0"))
+        self.assertEqual(self.store.get_pom_hash("org.app:one:1.0"), "abc")
+
+    def test_pending_packages_are_visible(self):
+        """Test that buffered packages are returned before a flush."""
+        self.store.add_package("org.app:one:1.0", "abc", [("org.lib", "a", "1.0")])
+        self.assertEqual(self.store.get_dependencies("org.app:one:1.0"), [("org.lib", "a", "1.0")])
+
+    def test_dependents_and_graph(self):
+        """Test reverse edge queries and loading the full graph."""
+        self.store.add_package("org.app:one:1.0", "a1", [("org.lib", "common", "1.0")])
+        self.store.add_package("org.app:two:1.0", "a2", [("org.lib", "common", "1.0")])
+        self.store.add_package("org.lib:common:1.0", "c", [])
+        self.assertEqual(self.store.dependents("org.lib:common:1.0"), ["org.app:one:1.0", "org.app:two:1.0"])
+        self.assertEqual(self.store.load_graph(), {
+            "org.app:one:1.0": [("org.lib", "common", "1.0")],
+            "org.app:two:1.0": [("org.lib", "common", "1.0")],
+            "org.lib:common:1.0": [],
+        })
+
+    def test_recrawl_replaces_edges(self):
+        """Test that storing a package again replaces its edges."""
+        self.store.add_package("org.app:one:1.0", "old", [("org.lib", "a", "1.0")])
+        self.store.flush()
+        self.store.add_package("org.app:one:1.0", "new", [("org.lib", "b", "1.0")])
+        self.store.flush()
+        self.assertEqual(self.store.get_dependencies("org.app:one:1.0"), [("org.lib", "b", "1.0")])
+        self.assertEqual(self.store.dependents("org.lib:a:1.0"), [])
+
+    def test_max_age(self):
+        """Test that stale packages are not returned."""
+        self.store.add_package("org.app:one:1.0", "abc", [])
+        self.store.flush()
+        self.assertEqual(self.store.get_dependencies("org.app:one:1.0", max_age=3600), [])
+        with patch("time.time", return_value=4e9):
+            self.assertIsNone(self.store.get_dependencies("org.app:one:1.0", max_age=3600))
+
+    @patch('dependency_visualizer.DependencyAnalyzer.fetch_pom')
+    @patch('dependency_visualizer.DependencyAnalyzer.parse_pom')
+    def test_analyzer_reuses_store_across_runs(self, mock_parse_pom, mock_fetch_pom):
+        """Test that a second crawl is served from the store."""
+        graph = {"org.app:one:1.0": [("org.lib", "a", "1.0")]}
+        mock_fetch_pom.side_effect = lambda group, artifact, version: f"{group}:{artifact}:{version}"
+        mock_parse_pom.side_effect = lambda key: graph.get(key, [])
+
+        DependencyAnalyzer("https://repo.example", 3, store=self.store).collect_batch(["org.app:one:1.0"])
+        self.assertEqual(mock_fetch_pom.call_count, 2)
+
+        analyzer = DependencyAnalyzer("https://repo.example", 3, store=self.store)
+        graphs = analyzer.collect_batch(["org.app:one:1.0"])
+        self.assertEqual(mock_fetch_pom.call_count, 2)
+        self.assertEqual(graphs["org.app:one:1.0"], {
+            "org.app:one:1.0": [("org.lib", "a", "1.0")],
+            "org.lib:a:1.0": [],
+        })
+        self.assertEqual(analyzer.stats.cache_hits["store"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+import gc
+import io
+import json
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from config_parser import (BinaryBackend, ConfigParser, JSONBackend, Lexer, OutputBackend, Parser,
+                           XMLStreamBackend)
+
+PHASES = ('lex', 'parse', 'evaluate', 'serialize')
+
+# Parameters of run_benchmark for --case. Flat and wide are large configs that spend nearly
+# all their time in the per-token and per-item paths of the lexer and parser
+CASES = {
+    'mixed': {'blocks': 200, 'depth': 3, 'width': 5, 'comment_density': 0.2, 'constants': 20},
+    'flat': {'blocks': 1, 'depth': 1, 'width': 20000, 'comment_density': 0.0, 'constants': 0},
+    'wide': {'blocks': 5000, 'depth': 3, 'width': 4, 'comment_density': 0.0, 'constants': 0},
+}
+
+_WORDS = ('alpha', 'beta', 'gamma', 'delta', 'server', 'client', 'cache', 'timeout', 'level', 'mode')
+
+
+def _comment(rng: random.Random, indent: str) -> str:
+    text = ' '.join(rng.sample(_WORDS, 3))
+    return f"{indent}/* {text} */" if rng.random() < 0.5 else f"REM {text}"
+
+
+def _leaf(rng: random.Random, constants: List[str]) -> str:
+    choice = rng.random()
+    if constants and choice < 0.3:
+        return f"${rng.choice(constants)}$"
+    if choice < 0.55:
+        return str(rng.randint(0, 100000))
+    if choice < 0.7:
+        return f"{rng.randint(0, 1000)}.{rng.randint(0, 99)}"
+    if choice < 0.85:
+        return f'"{rng.choice(_WORDS)}-{rng.randint(0, 999)}"'
+    return rng.choice(('true', 'false'))
+
+
+def _dict(rng: random.Random, lines: List[str], prefix: str, depth: int, width: int,
+          comment_density: float, constants: List[str], indent: str = '') -> None:
+    # Appends a dictionary written over several lines; prefix goes before 'dict('
+    lines.append(f"{indent}{prefix}dict(")
+    inner = indent + '    '
+    for key in range(1, width + 1):
+        if rng.random() < comment_density:
+            lines.append(_comment(rng, inner))
+        separator = ',' if key < width else ''
+        if depth > 1 and rng.random() < 0.5:
+            _dict(rng, lines, f"{key} = ", depth - 1, width, comment_density, constants, inner)
+            lines[-1] += separator
+        else:
+            lines.append(f"{inner}{key} = {_leaf(rng, constants)}{separator}")
+    lines.append(f"{indent})")
+
+
+def generate_config(blocks: int = 200, depth: int = 3, width: int = 5, comment_density: float = 0.2,
+                    constants: int = 20, seed: int = 0) -> str:
+    """
+    Generate a synthetic configuration.
+
+    Constants come first: numbers, strings, arithmetic expressions and
+    dictionaries that refer to earlier constants. They are followed by
+    top-level dictionaries whose values refer to the constants at random.
+
+    Args:
+        blocks: Number of top-level dictionaries
+        depth: Nesting depth of the dictionaries
+        width: Items per dictionary
+        comment_density: Probability of a comment before each item
+        constants: Number of declared constants
+        seed: Random seed for the content
+
+    Returns:
+        Configuration text
+    """
+    rng = random.Random(seed)
+    lines: List[str] = []
+    names: List[str] = []
+    for i in range(constants):
+        if rng.random() < comment_density:
+            lines.append(_comment(rng, ''))
+        name = f"const_{i}"
+        kind = i % 4
+        if kind == 0:
+            lines.append(f"{rng.randint(0, 1000)} -> {name};")
+        elif kind == 1:
+            lines.append(f'"{rng.choice(_WORDS)}" -> {name};')
+        elif kind == 2:
+            lines.append(f"({rng.randint(1, 100)} + {rng.randint(1, 100)}) * {rng.randint(2, 9)} -> {name};")
+        else:
+            _dict(rng, lines, '', min(depth, 2), width, comment_density, names)
+            lines[-1] += f" -> {name};"
+        names.append(name)
+    for _ in range(blocks):
+        _dict(rng, lines, '', depth, width, comment_density, names)
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def _backend(output_format: str) -> OutputBackend:
+    if output_format == 'json':
+        return JSONBackend(io.StringIO())
+    if output_format == 'binary':
+        return BinaryBackend(io.BytesIO())
+    return XMLStreamBackend(io.StringIO())
+
+
+def _serialize(blocks: List[Any], output_format: str) -> None:
+    backend = _backend(output_format)
+    backend.start()
+    for block in blocks:
+        backend.write_block(*block)
+    backend.end()
+
+
+def _run_phases(text: str, output_format: str, measure: Callable[[str, Callable[[], Any]], Any]) -> None:
+    # The phases ConfigParser.parse runs in one pass, split so each can be measured on its own
+    parser = ConfigParser()
+    tokens = measure('lex', lambda: list(Lexer(text).tokens()))
+    config = measure('parse', lambda: Parser(tokens).parse())
+    blocks = measure('evaluate', lambda: [block for block in map(parser.execute, config.statements)
+                                          if block is not None])
+    measure('serialize', lambda: _serialize(blocks, output_format))
+
+
+def run_benchmark(blocks: int = 200, depth: int = 3, width: int = 5, comment_density: float = 0.2,
+                  constants: int = 20, output_format: str = 'xml', repeat: int = 5, seed: int = 0) -> dict:
+    """
+    Translate a generated configuration and measure each phase of the translator.
+
+    Times are the best of ``repeat`` untraced runs with the garbage collector
+    paused. Peak memory is measured in a separate run under tracemalloc and
+    counts what a phase allocates on top of the results of the earlier phases.
+
+    Args:
+        blocks: Number of top-level dictionaries
+        depth: Nesting depth of the dictionaries
+        width: Items per dictionary
+        comment_density: Probability of a comment before each item
+        constants: Number of declared constants
+        output_format: Serialization measured in the last phase: xml, json or binary
+        repeat: Number of timed runs
+        seed: Random seed for the content
+
+    Returns:
+        Parameters and results: input size, total time and the time and
+        peak memory of every phase
+    """
+    text = generate_config(blocks, depth, width, comment_density, constants, seed)
+    times: Dict[str, float] = {}
+
+    def timed(phase: str, function: Callable[[], Any]) -> Any:
+        # Like timeit, the garbage collector does not run while a phase is timed
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        times[phase] = min(times.get(phase, elapsed), elapsed)
+        return result
+
+    for _ in range(max(repeat, 1)):
+        _run_phases(text, output_format, timed)
+
+    peaks: Dict[str, int] = {}
+
+    def traced(phase: str, function: Callable[[], Any]) -> Any:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = function()
+        peaks[phase] = tracemalloc.get_traced_memory()[1] - current
+        return result
+
+    tracemalloc.start()
+    try:
+        _run_phases(text, output_format, traced)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "parameters": {"blocks": blocks, "depth": depth, "width": width, "comment_density": comment_density,
+                       "constants": constants, "output_format": output_format, "seed": seed},
+        "input_bytes": len(text.encode('utf-8')),
+        "total_time": sum(times.values()),
+        "phases": {phase: {"time": times[phase], "peak_memory_mb": peaks[phase] / (1024 * 1024)}
+                   for phase in PHASES},
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float = 0.25) -> List[str]:
+    """
+    Compare a benchmark result with a stored baseline.
+
+    Args:
+        result: Result of run_benchmark
+        baseline: Earlier result of run_benchmark with the same parameters
+        threshold: Allowed relative growth of a phase time or peak memory
+
+    Returns:
+        One message per regressed measurement, empty if there are none
+    """
+    if result["parameters"] != baseline["parameters"]:
+        raise ValueError("Baseline was recorded with different parameters")
+    regressions = []
+    for phase in PHASES:
+        for metric in ("time", "peak_memory_mb"):
+            old = baseline["phases"][phase][metric]
+            new = result["phases"][phase][metric]
+            if new > old * (1 + threshold):
+                regressions.append(f"{phase} {metric}: {new:.4g} vs baseline {old:.4g} "
+                                   f"(+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    """Main entry point for the translator benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the configuration translator on a generated configuration",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--case", choices=sorted(CASES),
+                        help="Start from the parameters of a named case; explicit options override them")
+    parser.add_argument("--blocks", type=int, default=200, help="Number of top-level dictionaries")
+    parser.add_argument("--depth", type=int, default=3, help="Nesting depth of the dictionaries")
+    parser.add_argument("--width", type=int, default=5, help="Items per dictionary")
+    parser.add_argument("--comment-density", type=float, default=0.2, help="Probability of a comment before each item")
+    parser.add_argument("--constants", type=int, default=20, help="Number of declared constants")
+    parser.add_argument("--format", dest="output_format", choices=("binary", "json", "xml"), default="xml",
+                        help="Output format of the serialize phase")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the content")
+    parser.add_argument("--json", help="Write the result to this JSON file, e.g. to record a baseline")
+    parser.add_argument("--baseline", help="Fail if the result regresses against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    case = parser.parse_known_args()[0].case
+    if case:
+        parser.set_defaults(**CASES[case])
+    args = parser.parse_args()
+
+    result = run_benchmark(args.blocks, args.depth, args.width, args.comment_density, args.constants,
+                           args.output_format, args.repeat, args.seed)
+    print(f"{result['input_bytes'] / 1024:.0f} KB translated in {result['total_time'] * 1000:.1f} ms")
+    for phase, measurement in result["phases"].items():
+        print(f"  {phase:<10} {measurement['time'] * 1000:8.1f} ms  "
+              f"peak memory {measurement['peak_memory_mb']:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare(result, baseline, args.threshold)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
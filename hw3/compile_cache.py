@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Callable, Dict, List, Optional, TextIO, Tuple, Union
+
+# Files created by mkstemp are private; a fetched output gets the permissions open() would give it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class CompileCache:
+    """On-disk cache of translated output keyed by a hash of the input and the translator version.
+
+    Entries are evicted least recently used first once the cache grows past max_bytes.
+    The size is scanned on the first store and tracked afterwards, so the directory is
+    only walked again when the limit is crossed.
+    """
+
+    # Eviction frees space down to this fraction of max_bytes, so it does not run on every store
+    LOW_WATER = 0.8
+    # Entries hold XML, JSON or binary output; the format is part of the key
+    SUFFIX = '.out'
+
+    def __init__(self, directory: str, version: str, max_bytes: int = 100 * 1024 * 1024):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Bytes held by entries, None until the first store scans the directory
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source: Union[str, TextIO], mode: str = '') -> str:
+        # A seekable stream is hashed in chunks and rewound, so it is never held in memory whole
+        digest = hashlib.sha256(f"{self.version}\0{mode}\0".encode())
+        if isinstance(source, str):
+            digest.update(source.encode('utf-8'))
+        else:
+            start = source.tell()
+            for chunk in iter(lambda: source.read(65536), ''):
+                digest.update(chunk.encode('utf-8'))
+            source.seek(start)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def _manifest(self, entry: str) -> str:
+        return entry[:-len(self.SUFFIX)] + '.deps'
+
+    def fetch(self, key: str, output_file: str) -> bool:
+        entry = self.path(key)
+        if not os.path.exists(entry) or not self._dependencies_unchanged(entry):
+            self.misses += 1
+            return False
+        # A copy rather than a hard link: editing the output in place must not change the entry
+        self._copy(entry, output_file, 0o666 & ~_UMASK)
+        # The entry's mtime is its last use for eviction
+        os.utime(entry)
+        self.hits += 1
+        return True
+
+    def store(self, key: str, output_file: str, dependencies: Optional[Dict[str, str]] = None) -> None:
+        # dependencies maps imported files to the SHA-256 of the content the output was built from
+        entry = self.path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        manifest = self._manifest(entry)
+        if dependencies:
+            self._replace(manifest, lambda f: f.write(json.dumps(dependencies).encode('utf-8')))
+        elif os.path.exists(manifest):
+            os.remove(manifest)
+        if self._size is None:
+            self._size = self._scan()[1]
+        try:
+            replaced = os.path.getsize(entry)
+        except OSError:
+            replaced = 0
+        self._copy(output_file, entry)
+        self._size += os.path.getsize(output_file) - replaced
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _dependencies_unchanged(self, entry: str) -> bool:
+        manifest = self._manifest(entry)
+        if not os.path.exists(manifest):
+            return True
+        try:
+            with open(manifest, encoding='utf-8') as f:
+                dependencies = json.load(f)
+            for path, digest in dependencies.items():
+                with open(path, 'rb') as f:
+                    if hashlib.sha256(f.read()).hexdigest() != digest:
+                        return False
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def evict(self) -> None:
+        # Other processes may evict the same entries concurrently, so vanished files are skipped
+        entries, total = self._scan()
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * self.LOW_WATER:
+                break
+            for stale in (path, self._manifest(path)):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            total -= size
+        self._size = total
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        # (mtime, size, path) of every entry and their total size
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    def report(self) -> str:
+        return f"cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+    @classmethod
+    def _copy(cls, source: str, target: str, mode: Optional[int] = None) -> None:
+        with open(source, 'rb') as f:
+            cls._replace(target, lambda out: shutil.copyfileobj(f, out), mode)
+
+    @staticmethod
+    def _replace(target: str, write: Callable[[BinaryIO], None], mode: Optional[int] = None) -> None:
+        # Writes through the descriptor mkstemp opened, so no other process can take the
+        # temporary name, then replaces target; a failed write removes the temporary file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if mode is not None:
+                    os.chmod(temp_path, mode)
+                write(f)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'config_parser')
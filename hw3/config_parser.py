@@ -1,238 +1,1804 @@
 import argparse
+import bisect
+import copy
+import glob
+import hashlib
+import io
+import json
+import os
 import re
+import struct
 import sys
-from typing import Dict, Any
+import threading
+import time
+from collections import namedtuple
+from itertools import chain
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 import xml.etree.ElementTree as ET
-from io import StringIO
 
-class ConfigParser:
-    def __init__(self):
-        self.constants: Dict[str, Any] = {}
+from compile_cache import CompileCache, default_cache_dir
 
-    def parse(self, input_text: str) -> ET.Element:
-        # Remove comments first
-        text_without_comments = self.remove_comments(input_text)
-        
-        # Split into logical lines
-        lines = [line.strip() for line in text_without_comments.splitlines()]
-        lines = [line for line in lines if line]  # Remove empty lines
-        
-        root = ET.Element('configuration')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            if '->' in line:  # Constant declaration
-                self.handle_constant_declaration(line)
-            elif line.startswith('dict('):
-                # Collect all lines until matching closing parenthesis
-                dict_lines = [line]
-                paren_count = line.count('(') - line.count(')')
-                while paren_count > 0 and i + 1 < len(lines):
-                    i += 1
-                    dict_lines.append(lines[i])
-                    paren_count += lines[i].count('(') - lines[i].count(')')
-                dict_elem = self.handle_dict('\n'.join(dict_lines))
-                root.append(dict_elem)
-            elif line.startswith('$') and line.endswith('$'):
-                value = self.resolve_constant(line)
-                const_elem = ET.SubElement(root, 'constant')
-                const_elem.text = str(value)
-            else:
-                raise SyntaxError(f"Invalid syntax at line: {line}")
-            i += 1
-        
-        return root
-
-    def remove_comments(self, text: str) -> str:
-        # Remove REM comments
-        lines = []
-        for line in text.splitlines():
-            if not line.strip().startswith('REM'):
-                lines.append(line)
-        text = '\n'.join(lines)
-        
-        # Remove /* */ comments, but preserve them in strings
-        result = []
-        in_comment = False
-        in_string = False
-        string_char = None
-        i = 0
-        
-        while i < len(text):
-            if not in_string and text[i:i+2] == '/*':
-                in_comment = True
-                i += 2
+# Bump when the produced XML changes, so cached translations are not reused
+TRANSLATOR_VERSION = '2.1'
+
+Token = namedtuple('Token', 'kind text line column gap offset')
+BatchResult = namedtuple('BatchResult', 'input_file output_file error cached')
+
+CONFIG_SUFFIXES = ('.txt', '.cfg')
+OUTPUT_SUFFIXES = {'xml': '.xml', 'json': '.json', 'binary': '.cfgb'}
+
+NAME_PATTERN = re.compile(r'[a-zA-Z][_a-zA-Z0-9]*')
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)*')
+CONSTANT_PATTERN = re.compile(r'\$([a-zA-Z][_a-zA-Z0-9]*)\$')
+CONSTANT_PREFIX_PATTERN = re.compile(r'\$[a-zA-Z][_a-zA-Z0-9]*')
+
+# Every match is the whitespace before a token and the token itself, or trailing whitespace.
+# A line break takes the indentation of the next line with it, and that line if it is a REM line.
+# No two alternatives start with the same character except where order decides (a string before
+# an unterminated one, and everything before op), so the most frequent come first
+TOKEN_PATTERN = re.compile(r'''
+    [ \t\r\f\v]*
+    (?:
+        (?P<punct>[()=,;])
+      | (?P<number>\d+(?:\.\d+)*)
+      | (?P<newline>\n[ \t\r\f\v]*(?:REM[^\n]*)?)
+      | (?P<name>[a-zA-Z_][a-zA-Z0-9_]*)
+      | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+      | (?P<comment>/\*.*?(?:\*/|\Z))
+      | (?P<badstring>["'])
+      | (?P<arrow>->)
+      | (?P<const>\$[a-zA-Z][_a-zA-Z0-9]*\$)
+      | (?P<op>\S)
+      | (?P<end>\Z)
+    )
+''', re.VERBOSE | re.DOTALL)
+REM_PATTERN = re.compile(r'[ \t\r\f\v]*REM')
+
+
+class Lexer:
+    """Splits config text into tokens in a single pass, dropping REM lines and /* */ comments.
+
+    The source is either a string or a text stream. Streams are read in chunks of
+    chunk_size characters, and a token that may continue past the end of a chunk
+    (a comment, string, name, REM line, ...) is matched again after the next read.
+    """
+
+    def __init__(self, source: Union[str, TextIO], chunk_size: int = 65536,
+                 line: int = 1, column: int = 1, offset: int = 0, at_line_start: bool = True):
+        self.source = source
+        self.chunk_size = chunk_size
+        # Position of the first character, when the source is a slice of a larger text
+        self.start = (line, column, offset, at_line_start)
+
+    def tokens(self) -> Iterator[Token]:
+        if isinstance(self.source, str):
+            buffer, eof = self.source, True
+        else:
+            buffer, eof = '', False
+        match = TOKEN_PATTERN.match
+        rem_match = REM_PATTERN.match
+        # Tokens are built with tuple.__new__, which skips the Python-level namedtuple constructor
+        new_token = tuple.__new__
+        pos = 0
+        line, column, base, at_line_start = self.start
+        in_rem = False
+        need_more = False
+        # Whitespace before the next token, kept for bare values; line breaks become one space
+        gap = ''
+        size = len(buffer)
+        while pos < size or not eof:
+            if pos >= size or need_more:
+                chunk = self.source.read(self.chunk_size)
+                buffer = buffer[pos:] + chunk
+                size = len(buffer)
+                base += pos
+                pos = 0
+                eof = not chunk
+                need_more = False
+                continue
+
+            # A REM line on the first line; later ones are part of the line break before them
+            if in_rem or at_line_start and rem_match(buffer, pos):
+                end = buffer.find('\n', pos)
+                in_rem = end == -1
+                pos = size if in_rem else end
                 continue
-            elif not in_string and text[i:i+2] == '*/':
-                in_comment = False
-                i += 2
+            m = match(buffer, pos)
+            kind = m.lastgroup
+            start, end = m.span(kind)
+            # A number needs one more character to tell '1.' from '1.5', a line break three to see a REM
+            if not eof and (end + 1 >= size and kind != 'punct'
+                            or kind == 'newline' and end + 3 > size
+                            or kind == 'badstring'
+                            or kind == 'op' and CONSTANT_PREFIX_PATTERN.fullmatch(buffer, start)):
+                # The token may continue in the next chunk
+                need_more = True
                 continue
-            elif not in_comment and text[i] in '"\'':
-                if not in_string:
-                    in_string = True
-                    string_char = text[i]
-                elif text[i] == string_char:
-                    in_string = False
-                    string_char = None
-                result.append(text[i])
-            elif not in_comment:
-                result.append(text[i])
-            i += 1
-        
-        return ''.join(result)
-
-    def handle_constant_declaration(self, line: str) -> None:
-        value, name = map(str.strip, line.split('->'))
-        name = name.rstrip(';')
-        
-        if not re.match(r'^[a-zA-Z][_a-zA-Z0-9]*$', name):
-            raise SyntaxError(f"Invalid constant name: {name}")
-        
-        # Try to parse value as number
+            if start != pos:
+                if not at_line_start:
+                    gap += buffer[pos:start]
+                column += start - pos
+            pos = end
+            if kind == 'newline':
+                line += 1
+                column = end - start
+                gap = ' '
+            elif kind == 'badstring':
+                raise SyntaxError(f"Unterminated string at line {line}, column {column}")
+            elif kind != 'end':
+                text = buffer[start:end]
+                at_line_start = False
+                if kind != 'comment':
+                    yield new_token(Token, (kind, text, line, column, gap, base + start))
+                    gap = ''
+                if '\n' in text:
+                    line += text.count('\n')
+                    column = len(text) - text.rfind('\n')
+                else:
+                    column += end - start
+
+
+class Node:
+    __slots__ = ('line', 'column')
+
+    def __init__(self, line: int, column: int):
+        self.line = line
+        self.column = column
+
+
+class NumberNode(Node):
+    __slots__ = ('text',)
+
+    def __init__(self, text: str, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.text = text
+
+
+class StringNode(Node):
+    __slots__ = ('text',)
+
+    def __init__(self, text: str, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.text = text
+
+
+class BoolNode(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value: bool, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.value = value
+
+
+class ConstRefNode(Node):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.name = name
+
+
+class UnaryNode(Node):
+    __slots__ = ('operator', 'operand')
+
+    def __init__(self, operator: str, operand: Node, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.operator = operator
+        self.operand = operand
+
+
+class BinaryNode(Node):
+    __slots__ = ('operator', 'left', 'right')
+
+    def __init__(self, operator: str, left: Node, right: Node, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class ItemNode(Node):
+    __slots__ = ('key', 'value')
+
+    def __init__(self, key: Union[NumberNode, 'DictNode'], value: Node, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.key = key
+        self.value = value
+
+
+class DictNode(Node):
+    __slots__ = ('items',)
+
+    def __init__(self, items: List[ItemNode], line: int, column: int):
+        self.line = line
+        self.column = column
+        self.items = items
+
+
+class ConstDeclNode(Node):
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: Node, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.name = name
+        self.value = value
+
+
+class ImportNode(Node):
+    __slots__ = ('path',)
+
+    def __init__(self, path: str, line: int, column: int):
+        self.line = line
+        self.column = column
+        self.path = path
+
+
+class ConfigNode(Node):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements: List[Node]):
+        self.line = self.column = 1
+        self.statements = statements
+
+
+class ConfigDict:
+    """An evaluated dictionary: an immutable sequence of (key, value) items.
+
+    Keys are number strings or ConfigDicts; values are int, float, bool, str or ConfigDict.
+    """
+
+    __slots__ = ('items', 'shared', '_hash')
+
+    def __init__(self, items, shared: bool = False):
+        self.items = tuple(items)
+        # True for the value of a dictionary constant, which may be referenced many times
+        self.shared = shared
+        self._hash = None
+
+    def __eq__(self, other):
+        return isinstance(other, ConfigDict) and self.items == other.items
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.items)
+        return self._hash
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return f"ConfigDict({list(self.items)!r})"
+
+
+class LazyDict:
+    """A dictionary constant, built on first use and then reused.
+
+    The constants it refers to are bound when it is declared, so a later
+    rebinding does not change it; only building the ConfigDict is deferred.
+    """
+
+    __slots__ = ('node', 'scope', 'constants', 'value')
+
+    def __init__(self, node: DictNode, scope: 'ConfigParser', constants: Dict[str, Any]):
+        self.node = node
+        self.scope = scope
+        self.constants = constants
+        self.value: Optional[ConfigDict] = None
+
+    def resolve(self) -> ConfigDict:
+        if self.value is None:
+            self.value = self.scope.evaluate_dict(self.node, shared=True, constants=self.constants)
+        return self.value
+
+    def __repr__(self):
+        return 'dict(...)'
+
+
+def nested_too_deeply(node: Node) -> SyntaxError:
+    # For a block whose evaluation or output ran out of stack, e.g. in a recursive backend
+    return SyntaxError(f"Dictionaries nested too deeply at line {node.line}, column {node.column}")
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def number_value(text: str) -> Union[int, float, str]:
+    # Dictionary values keep their source text unless a number prints back the same
+    for convert in (int, float):
         try:
-            value = int(value)
+            value = convert(text)
         except ValueError:
+            continue
+        return value if str(value) == text else text
+    return text
+
+
+def value_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'True' if value else 'False'
+    return str(value)
+
+
+class Parser:
+    """Recursive-descent parser producing an AST from a token stream.
+
+    Grammar:
+        config     := statement*
+        statement  := ('import' | 'include') STRING ';'? | expr ['->' NAME ';'?]
+        expr       := term (('+' | '-') term)*
+        term       := unary (('*' | '/') unary)*
+        unary      := '-' unary | NUMBER | STRING | CONST | 'true' | 'false' | dict | '(' expr ')'
+        dict       := 'dict' '(' [item (',' item)* ','?] ')'
+        item       := (NUMBER | dict) '=' (dict | STRING | CONST | bare)
+    """
+
+    def __init__(self, tokens: Iterator[Token]):
+        self._tokens = iter(tokens)
+        self._current: Optional[Token] = next(self._tokens, None)
+        self._last: Optional[Token] = None
+
+    def _advance(self) -> Token:
+        token = self._current
+        self._last = token
+        self._current = next(self._tokens, None)
+        return token
+
+    def _error(self, message: str, token: Optional[Token] = None) -> SyntaxError:
+        token = token or self._current or self._last
+        if token is None:
+            return SyntaxError(message)
+        return SyntaxError(f"{message} at line {token.line}, column {token.column}")
+
+    def _expect(self, kind: str, text: Optional[str] = None) -> Token:
+        token = self._current
+        if token is None or token.kind != kind or (text is not None and token.text != text):
+            found = 'end of input' if token is None else repr(token.text)
+            raise self._error(f"Expected {text or kind}, found {found}")
+        return self._advance()
+
+    def _at(self, kind: str, text: Optional[str] = None) -> bool:
+        token = self._current
+        return token is not None and token.kind == kind and (text is None or token.text == text)
+
+    def parse(self) -> ConfigNode:
+        return ConfigNode(list(self.statements()))
+
+    def statements(self) -> Iterator[Node]:
+        while self._current is not None:
+            yield self.statement()
+
+    def spans(self) -> Iterator[Tuple[Node, int, int]]:
+        # Statements with the source offsets of their first and last characters (end exclusive)
+        while self._current is not None:
+            start = self._current.offset
+            statement = self.statement()
+            yield statement, start, self._last.offset + len(self._last.text)
+
+    def statement(self) -> Node:
+        token = self._current
+        try:
+            return self._statement(token)
+        except RecursionError:
+            # Dictionaries are parsed without recursion, but parentheses and unary minus are not
+            raise self._error("Expression nested too deeply", token) from None
+
+    def _statement(self, token: Token) -> Node:
+        if token.kind == 'name' and token.text in ('import', 'include'):
+            self._advance()
+            path = self._expect('string')
+            if self._at('punct', ';'):
+                self._advance()
+            return ImportNode(path.text[1:-1], token.line, token.column)
+
+        value = self.expression()
+        if not self._at('arrow'):
+            # A dictionary block, or a value written out as <constant>
+            return value
+        self._advance()
+        name = self._advance() if self._current is not None else None
+        if name is None or name.kind != 'name' or not NAME_PATTERN.fullmatch(name.text):
+            raise self._error(f"Invalid constant name: {name.text if name else ''}", name)
+        if self._at('punct', ';'):
+            self._advance()
+        return ConstDeclNode(name.text, value, token.line, token.column)
+
+    def _at_operator(self, operators: str) -> bool:
+        # A binary operator continues an expression only on the line of its left operand,
+        # so '-5 -> x' on the next line still starts a new statement
+        token = self._current
+        return (token is not None and token.kind == 'op' and token.text in operators
+                and token.line == self._last.line)
+
+    def expression(self) -> Node:
+        left = self.term()
+        while self._at_operator('+-'):
+            operator = self._advance()
+            left = BinaryNode(operator.text, left, self.term(), operator.line, operator.column)
+        return left
+
+    def term(self) -> Node:
+        left = self.unary()
+        while self._at_operator('*/'):
+            operator = self._advance()
+            left = BinaryNode(operator.text, left, self.unary(), operator.line, operator.column)
+        return left
+
+    def unary(self) -> Node:
+        token = self._current
+        if token is not None and token.kind == 'op' and token.text == '-':
+            self._advance()
+            return UnaryNode('-', self.unary(), token.line, token.column)
+        return self.primary()
+
+    def primary(self) -> Node:
+        token = self._current
+        if token is None:
+            raise self._error("Unexpected end of input in expression")
+        if self._at('name', 'dict'):
+            return self.dict()
+        if self._at('punct', '('):
+            self._advance()
+            value = self.expression()
+            self._expect('punct', ')')
+            return value
+        self._advance()
+        if token.kind == 'const':
+            return ConstRefNode(token.text[1:-1], token.line, token.column)
+        if token.kind == 'number':
+            return NumberNode(token.text, token.line, token.column)
+        if token.kind == 'string':
+            return self._scalar(token.text[1:-1], token)
+        if token.kind == 'name' and token.text.lower() in ('true', 'false'):
+            return BoolNode(token.text.lower() == 'true', token.line, token.column)
+        raise self._error(f"Invalid syntax: {token.text}", token)
+
+    def dict(self) -> DictNode:
+        # Nested dictionaries are parsed with an explicit stack instead of recursion, so the
+        # nesting depth is not bounded by the interpreter's recursion limit.
+        # A frame is [dict token, items, item token, key]; key is None until it is parsed
+        advance = self._advance
+        stack = [[self._open_dict(), [], None, None]]
+        closed = None
+        while True:
+            frame = stack[-1]
+            if closed is not None:
+                node, closed = closed, None
+                if frame[3] is not None:
+                    self._end_item(frame, node)
+                    continue
+                frame[3] = node
+            else:
+                # Tokens are checked in place rather than with _at, once per token of every item
+                token = self._current
+                if token is not None and token.kind == 'punct' and token.text == ')':
+                    advance()
+                    closed = DictNode(frame[1], frame[0].line, frame[0].column)
+                    stack.pop()
+                    if not stack:
+                        return closed
+                    continue
+                frame[2] = token
+                if token is not None and token.kind == 'name' and token.text == 'dict':
+                    stack.append([self._open_dict(), [], None, None])
+                    continue
+                frame[3] = self.key()
+
+            token = self._current
+            if token is None or token.kind != 'punct' or token.text != '=':
+                raise self._error("Expected '=' after dictionary key")
+            advance()
+            token = self._current
+            if token is not None and token.kind == 'name' and token.text == 'dict':
+                stack.append([self._open_dict(), [], None, None])
+                continue
+            if token is not None and token.kind == 'number':
+                # The common case of a number value, without the checks of value()
+                advance()
+                following = self._current
+                if following is not None and following.kind == 'punct' and following.text in (',', ')'):
+                    self._end_item(frame, NumberNode(token.text, token.line, token.column))
+                else:
+                    self._end_item(frame, self._bare_value(token))
+                continue
+            self._end_item(frame, self.value())
+
+    def _open_dict(self) -> Token:
+        start = self._expect('name', 'dict')
+        self._expect('punct', '(')
+        return start
+
+    def _end_item(self, frame: list, value: Node) -> None:
+        token = frame[2]
+        frame[1].append(ItemNode(frame[3], value, token.line, token.column))
+        frame[2] = frame[3] = None
+        token = self._current
+        if token is not None and token.kind == 'punct':
+            if token.text == ',':
+                self._advance()
+                return
+            if token.text == ')':
+                return
+        raise self._error("Expected ',' or ')' in dictionary")
+
+    def key(self) -> NumberNode:
+        token = self._current
+        if token is None:
+            raise self._error("Unexpected end of input in dictionary")
+        if token.kind == 'number':
+            self._advance()
             try:
-                value = float(value)
+                float(token.text)
             except ValueError:
-                # If not a number, check if it's a dictionary
-                if value.startswith('dict('):
-                    value = self.handle_dict(value)
-                else:
-                    raise SyntaxError(f"Invalid constant value: {value}")
-        
-        self.constants[name] = value
+                raise self._error(f"Invalid key: {token.text}. Must be a number or dictionary", token)
+            return NumberNode(token.text, token.line, token.column)
+        if token.kind == 'punct':
+            raise self._error("Empty key or value not allowed", token)
+        raise self._error(f"Invalid key type: {token.text}. Key must be a number or dictionary", token)
+
+    def value(self) -> Node:
+        token = self._current
+        if token is None or token.kind == 'punct':
+            raise self._error("Empty key or value not allowed", token)
+        if token.kind == 'const':
+            self._advance()
+            return ConstRefNode(token.text[1:-1], token.line, token.column)
+        if token.kind == 'string':
+            self._advance()
+            return self._scalar(token.text[1:-1], token)
+        if token.kind == 'arrow':
+            raise self._error("Invalid value: ->", token)
+
+        self._advance()
+        following = self._current
+        if following is not None and following.kind == 'punct' and following.text in (',', ')'):
+            # The common case: a single number or word
+            if token.kind == 'number':
+                return NumberNode(token.text, token.line, token.column)
+            return self._scalar(token.text, token)
+        return self._bare_value(token)
+
+    def _bare_value(self, token: Token) -> Node:
+        # A bare value runs until the next ',' or ')' and keeps its source spacing;
+        # token is its first token, already consumed
+        parts = [token.text]
+        while self._current is not None and self._current.kind not in ('punct', 'string', 'const', 'arrow'):
+            token_part = self._advance()
+            parts.append(token_part.gap + token_part.text)
+        if self._current is not None and self._current.kind != 'punct':
+            raise self._error(f"Unexpected {self._current.text!r} in value")
+        if self._at('punct', '(') or self._at('punct', '=') or self._at('punct', ';'):
+            raise self._error(f"Unexpected {self._current.text!r} in value")
+        text = ''.join(parts)
+        if NUMBER_PATTERN.fullmatch(text):
+            return NumberNode(text, token.line, token.column)
+        return self._scalar(text, token)
+
+    def _scalar(self, text: str, token: Token) -> Node:
+        constant = CONSTANT_PATTERN.fullmatch(text)
+        if constant:
+            return ConstRefNode(constant.group(1), token.line, token.column)
+        if text.lower() in ('true', 'false'):
+            return BoolNode(text.lower() == 'true', token.line, token.column)
+        return StringNode(text, token.line, token.column)
+
 
-    def handle_dict(self, text: str) -> ET.Element:
-        if not text.startswith('dict(') or not text.rstrip().endswith(')'):
-            raise SyntaxError(f"Invalid dictionary syntax: {text}")
-        
-        # Extract content between dict( and )
-        content = text[5:-1].strip()
-        
+class Module:
+    __slots__ = ('path', 'stamp', 'digest', 'config', 'imports', 'constants', 'dependencies')
+
+    def __init__(self, path: str, stamp: Tuple[int, int], digest: str, config: ConfigNode):
+        self.path = path
+        self.stamp = stamp
+        self.digest = digest
+        self.config = config
+        self.imports = [resolve_import(os.path.dirname(path), statement.path)
+                        for statement in config.statements if isinstance(statement, ImportNode)]
+        # Filled in on first use: module constants and path -> digest of every module they came from
+        self.constants: Optional[Dict[str, Any]] = None
+        self.dependencies: Dict[str, str] = {}
+
+
+def resolve_import(base_dir: Optional[str], path: str) -> str:
+    return os.path.abspath(os.path.join(base_dir or os.getcwd(), path))
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModuleCache:
+    """Imported config modules, parsed once per process and reloaded only when their file changes.
+
+    The imports of a module are parsed concurrently; constants are evaluated once per module.
+    """
+
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+        self._modules: Dict[str, Module] = {}
+        self._lock = threading.RLock()
+
+    def _fresh(self, path: str) -> Optional[Module]:
+        module = self._modules.get(path)
+        try:
+            if module is not None and module.stamp == _file_stamp(path):
+                return module
+        except OSError:
+            pass
+        return None
+
+    def _read(self, path: str) -> Module:
+        stamp = _file_stamp(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        # The digest is of the raw bytes, as CompileCache checks it; the text gets
+        # the newline translation of a file opened in text mode
+        text = io.StringIO(data.decode('utf-8'), newline=None).read()
+        try:
+            config = Parser(Lexer(text).tokens()).parse()
+        except SyntaxError as e:
+            raise SyntaxError(f"{path}: {e}") from None
+        return Module(path, stamp, hashlib.sha256(data).hexdigest(), config)
+
+    def load(self, paths: List[str]) -> None:
+        # Parses the modules and everything they import, a level of independent files at a time.
+        # Missing files are left for get() to report at the import that names them
+        pending = sorted({path for path in paths if self._fresh(path) is None and os.path.isfile(path)})
+        if not pending:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending:
+                modules = list(executor.map(self._read, pending))
+                with self._lock:
+                    for module in modules:
+                        self._modules[module.path] = module
+                pending = sorted({path for module in modules for path in module.imports
+                                  if self._fresh(path) is None and os.path.isfile(path)})
+
+    def get(self, path: str, import_chain: Tuple[str, ...] = ()) -> Module:
+        if path in import_chain:
+            raise SyntaxError("Import cycle: " + " -> ".join(import_chain + (path,)))
+        with self._lock:
+            module = self._fresh(path)
+            if module is None:
+                module = self._modules[path] = self._read(path)
+                self.load(module.imports)
+            if module.constants is None or not self._current(module):
+                parser = ConfigParser(os.path.dirname(path), self, import_chain + (path,))
+                for statement in module.config.statements:
+                    if isinstance(statement, (ConstDeclNode, ImportNode)):
+                        parser.execute(statement)
+                module.constants = parser.constants
+                module.dependencies = {path: module.digest, **parser.dependencies}
+            return module
+
+    def _current(self, module: Module) -> bool:
+        for path, digest in module.dependencies.items():
+            dependency = self._fresh(path)
+            if dependency is None or dependency.digest != digest:
+                return False
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._modules.clear()
+
+
+MODULES = ModuleCache()
+
+
+class OutputBackend:
+    """Receives the evaluated top-level blocks of a document: ('dict', ConfigDict) or ('constant', value)."""
+
+    def start(self) -> None:
+        pass
+
+    def write_block(self, kind: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def end(self) -> Any:
+        return None
+
+
+class _XMLBackend(OutputBackend):
+    def __init__(self, shared_dicts: bool = False):
+        self.shared_dicts = shared_dicts
+        # id() of each shared dictionary written so far -> (dictionary, element id)
+        self._emitted: Dict[int, Tuple[ConfigDict, str]] = {}
+
+    def shared_ref(self, value: ConfigDict) -> Tuple[Optional[str], bool]:
+        # With shared_dicts, a dictionary constant is written once with an id and
+        # referenced by <dict ref="..."/> afterwards. Returns (id, first occurrence)
+        if not self.shared_dicts or not value.shared:
+            return None, False
+        emitted = self._emitted.get(id(value))
+        if emitted is not None:
+            return emitted[1], False
+        ref = f"d{len(self._emitted) + 1}"
+        # The value is kept so its id() is not reused while the document is written
+        self._emitted[id(value)] = (value, ref)
+        return ref, True
+
+
+class ElementTreeBackend(_XMLBackend):
+    def start(self) -> None:
+        self.root = ET.Element('configuration')
+        self._emitted.clear()
+
+    def write_block(self, kind: str, value: Any) -> None:
+        if kind == 'dict':
+            self.root.append(self.build_dict(value))
+        else:
+            const_elem = ET.SubElement(self.root, 'constant')
+            self.build_value(value, const_elem)
+
+    def end(self) -> ET.Element:
+        return self.root
+
+    def build_dict(self, config_dict: ConfigDict) -> ET.Element:
         dict_elem = ET.Element('dict')
-        
-        if not content:
-            return dict_elem
-        
-        # First, normalize line endings and remove extra whitespace
-        content = ' '.join(line.strip() for line in content.splitlines())
-        
-        # Split content into key-value pairs
-        pairs = []
-        current = []
-        paren_count = 0
-        quote_char = None
-        in_value = False
-        key = None
-        
-        i = 0
-        while i < len(content):
-            char = content[i]
-            
-            # Handle quotes
-            if char in '"\'':
-                if quote_char is None:
-                    quote_char = char
-                elif char == quote_char and (i == 0 or content[i-1] != '\\'):
-                    quote_char = None
-                current.append(char)
-            # Handle nested structures when not in quotes
-            elif quote_char is None:
-                if char == '=' and not in_value and paren_count == 0:
-                    key = ''.join(current).strip()
-                    # Validate key type - must be a number or dict
-                    if not (key.startswith('dict(') or key.replace('.', '').isdigit()):
-                        raise SyntaxError(f"Invalid key type: {key}. Key must be a number or dictionary")
-                    current = []
-                    in_value = True
-                elif char == '(':
-                    paren_count += 1
-                    current.append(char)
-                elif char == ')':
-                    paren_count -= 1
-                    current.append(char)
-                elif char == ',' and paren_count == 0 and in_value:
-                    value = ''.join(current).strip()
-                    pairs.append((key, value))
-                    current = []
-                    in_value = False
+        self._fill(config_dict, dict_elem)
+        return dict_elem
+
+    def build_value(self, value: Any, parent: ET.Element) -> None:
+        if isinstance(value, ConfigDict):
+            dict_elem = self._dict_element(value, parent)
+            if dict_elem is not None:
+                self._fill(value, dict_elem)
+        else:
+            parent.text = value_text(value)
+
+    def _dict_element(self, value: ConfigDict, parent: ET.Element) -> Optional[ET.Element]:
+        # The element to fill with a dictionary value, None for a reference to a shared one
+        ref, first = self.shared_ref(value)
+        if ref is None:
+            return ET.SubElement(parent, 'dict')
+        if first:
+            return ET.SubElement(parent, 'dict', {'id': ref})
+        ET.SubElement(parent, 'dict', {'ref': ref})
+        return None
+
+    def _fill(self, config_dict: ConfigDict, dict_elem: ET.Element) -> None:
+        # Nested dictionaries are filled from a stack of generators, one per open
+        # dictionary, so deep nesting does not hit the recursion limit
+        stack = [self._items(config_dict, dict_elem)]
+        while stack:
+            nested = next(stack[-1], None)
+            if nested is None:
+                stack.pop()
+            else:
+                stack.append(self._items(*nested))
+
+    def _items(self, config_dict: ConfigDict, dict_elem: ET.Element) -> Iterator[Tuple[ConfigDict, ET.Element]]:
+        # Adds the items of a dictionary, yielding each nested dictionary and its element to fill in place
+        for key, value in config_dict.items:
+            if isinstance(key, ConfigDict):
+                item_elem = ET.SubElement(dict_elem, 'item')
+                yield key, ET.SubElement(item_elem, 'dict')
+            else:
+                item_elem = ET.SubElement(dict_elem, 'item', {'name': key})
+            if isinstance(value, ConfigDict):
+                nested = self._dict_element(value, item_elem)
+                if nested is not None:
+                    yield value, nested
+            else:
+                item_elem.text = value_text(value)
+
+
+class XMLStreamBackend(_XMLBackend):
+    """Writes each block as soon as it is evaluated, without building a tree."""
+
+    def __init__(self, output: TextIO, shared_dicts: bool = False):
+        super().__init__(shared_dicts)
+        # Imported here: xml.sax pulls in urllib, which a plain translation does not need
+        from xml.sax.saxutils import XMLGenerator
+        self.writer = XMLGenerator(output, encoding='utf-8', short_empty_elements=True)
+
+    def start(self) -> None:
+        self.writer.startDocument()
+        self.writer.startElement('configuration', {})
+        self._emitted.clear()
+
+    def write_block(self, kind: str, value: Any) -> None:
+        if kind == 'dict':
+            self.write_dict(value)
+        else:
+            self.writer.startElement('constant', {})
+            self.write_value(value)
+            self.writer.endElement('constant')
+
+    def end(self) -> None:
+        self.writer.endElement('configuration')
+        self.writer.endDocument()
+
+    def write_dict(self, config_dict: ConfigDict, attrs: Optional[Dict[str, str]] = None) -> None:
+        # Nested dictionaries are written from a stack of generators, one per open
+        # <dict>, so deep nesting does not hit the recursion limit
+        stack = [self._dict_events(config_dict, attrs)]
+        while stack:
+            nested = next(stack[-1], None)
+            if nested is None:
+                stack.pop()
+            else:
+                stack.append(self._dict_events(*nested))
+
+    def write_value(self, value: Any) -> None:
+        for nested in self._value_events(value):
+            self.write_dict(*nested)
+
+    def _dict_events(self, config_dict: ConfigDict,
+                     attrs: Optional[Dict[str, str]]) -> Iterator[Tuple[ConfigDict, Optional[Dict[str, str]]]]:
+        # Writes a dictionary, yielding each nested one and its attributes to be written in place
+        writer = self.writer
+        writer.startElement('dict', attrs or {})
+        for key, value in config_dict.items:
+            if isinstance(key, ConfigDict):
+                writer.startElement('item', {})
+                # Element text comes before the key dictionary, as in the tree backend
+                if isinstance(value, ConfigDict):
+                    yield key, None
+                    yield from self._value_events(value)
                 else:
-                    current.append(char)
-            # Add character if in quotes
+                    writer.characters(value_text(value))
+                    yield key, None
             else:
-                current.append(char)
-            
-            i += 1
-        
-        if current and in_value:
-            value = ''.join(current).strip()
-            pairs.append((key, value))
-        
-        # Process each key-value pair
-        for key, value in pairs:
-            if not key or not value:
-                raise SyntaxError("Empty key or value not allowed")
-            
-            # Handle dictionary key
-            if key.startswith('dict('):
-                key_dict = self.handle_dict(key)
-                # Create a unique name for the dictionary key
-                dict_key = ET.SubElement(dict_elem, 'item')
-                dict_key.append(key_dict)
+                writer.startElement('item', {'name': key})
+                yield from self._value_events(value)
+            writer.endElement('item')
+        writer.endElement('dict')
+
+    def _value_events(self, value: Any) -> Iterator[Tuple[ConfigDict, Optional[Dict[str, str]]]]:
+        if isinstance(value, ConfigDict):
+            ref, first = self.shared_ref(value)
+            if ref is None:
+                yield value, None
+            elif first:
+                yield value, {'id': ref}
             else:
-                # Handle number key
+                self.writer.startElement('dict', {'ref': ref})
+                self.writer.endElement('dict')
+        else:
+            self.writer.characters(value_text(value))
+
+
+class NativeBackend(OutputBackend):
+    """Collects the blocks as Python objects.
+
+    Dictionaries become dicts whose number keys are int or float (when they print back
+    the same) and whose dictionary keys stay ConfigDict, which is hashable. With
+    native=False the ConfigDict values are returned as they are. A dictionary constant
+    referenced several times becomes one shared dict.
+    """
+
+    def __init__(self, native: bool = True):
+        self.native = native
+        self.blocks: List[Any] = []
+        # id() of each converted ConfigDict -> (ConfigDict, dict)
+        self._converted: Dict[int, Tuple[ConfigDict, dict]] = {}
+
+    def write_block(self, kind: str, value: Any) -> None:
+        self.blocks.append(self.convert(value) if self.native else value)
+
+    def end(self) -> List[Any]:
+        return self.blocks
+
+    def convert(self, value: Any) -> Any:
+        if not isinstance(value, ConfigDict):
+            return value
+        converted = self._converted.get(id(value))
+        if converted is not None:
+            return converted[1]
+        result = {key if isinstance(key, ConfigDict) else number_value(key): self.convert(item)
+                  for key, item in value.items}
+        self._converted[id(value)] = (value, result)
+        return result
+
+
+class JSONBackend(OutputBackend):
+    """Writes {"configuration": [{"dict": {...}} | {"constant": value}, ...]} block by block.
+
+    Dictionaries are JSON objects keyed by the key text; a dictionary with dictionary keys
+    is written as {"$items": [[key, value], ...]}. Shared dictionaries are expanded.
+    """
+
+    def __init__(self, output: TextIO):
+        self.output = output
+        self._first = True
+
+    def start(self) -> None:
+        self.output.write('{"configuration": [')
+        self._first = True
+
+    def write_block(self, kind: str, value: Any) -> None:
+        if not self._first:
+            self.output.write(',')
+        self._first = False
+        self.output.write('\n')
+        self.output.write(json.dumps({kind: self.encode(value)}, ensure_ascii=False))
+
+    def end(self) -> None:
+        self.output.write('\n]}\n')
+
+    def encode(self, value: Any) -> Any:
+        if not isinstance(value, ConfigDict):
+            return value
+        if any(isinstance(key, ConfigDict) for key, _ in value.items):
+            return {'$items': [[self.encode(key), self.encode(item)] for key, item in value.items]}
+        return {key: self.encode(item) for key, item in value.items}
+
+
+def _from_json(value: Any, raw: bool = False) -> Any:
+    # raw=True rebuilds the ConfigDict of a dictionary key
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1 and '$items' in value:
+        pairs = [(_from_json(key, True) if isinstance(key, dict) else key, item) for key, item in value['$items']]
+    else:
+        pairs = value.items()
+    if raw:
+        return ConfigDict((key, _from_json(item, True)) for key, item in pairs)
+    return {key if isinstance(key, ConfigDict) else number_value(key): _from_json(item) for key, item in pairs}
+
+
+def read_json(fp: TextIO) -> List[Any]:
+    # The blocks of a JSON translation, as returned by ConfigParser.load()
+    return [_from_json(next(iter(block.values()))) for block in json.load(fp)['configuration']]
+
+
+BINARY_MAGIC = b'CFGB\x01'
+(_FALSE, _TRUE, _INT, _FLOAT, _STRING, _DICT, _SHARED_DICT, _DICT_REF) = range(8)
+
+
+class BinaryBackend(OutputBackend):
+    """Writes a compact binary translation.
+
+    Layout: magic, then the blocks (a kind byte, 0 for dict and 1 for constant, and a
+    tagged value each), then the block count and the string table as varints, and the
+    offset of the table as an 8-byte little-endian integer. Strings are stored once in
+    the table and referenced by index; integers are zigzag varints. A shared dictionary
+    constant is written once and referenced by index afterwards.
+    """
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+
+    def start(self) -> None:
+        self.output.write(BINARY_MAGIC)
+        self._offset = len(BINARY_MAGIC)
+        self._blocks = 0
+        self._strings: Dict[str, int] = {}
+        # id() of each shared dictionary written so far -> (dictionary, index)
+        self._shared: Dict[int, Tuple[ConfigDict, int]] = {}
+
+    def write_block(self, kind: str, value: Any) -> None:
+        buffer = bytearray((0 if kind == 'dict' else 1,))
+        self.encode(value, buffer)
+        self.output.write(buffer)
+        self._offset += len(buffer)
+        self._blocks += 1
+
+    def end(self) -> None:
+        table = bytearray()
+        _write_varint(table, self._blocks)
+        _write_varint(table, len(self._strings))
+        for string in self._strings:
+            data = string.encode('utf-8')
+            _write_varint(table, len(data))
+            table += data
+        self.output.write(table)
+        self.output.write(struct.pack('<Q', self._offset))
+
+    def encode(self, value: Any, buffer: bytearray) -> None:
+        # Nested dictionaries are written with a stack of iterators over their keys and
+        # values, so any depth the parser accepts can be written and read back
+        stack = [iter((value,))]
+        while stack:
+            for value in stack[-1]:
+                if isinstance(value, bool):
+                    buffer.append(_TRUE if value else _FALSE)
+                elif isinstance(value, int):
+                    buffer.append(_INT)
+                    _write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+                elif isinstance(value, float):
+                    buffer.append(_FLOAT)
+                    buffer += struct.pack('<d', value)
+                elif isinstance(value, str):
+                    buffer.append(_STRING)
+                    _write_varint(buffer, self._strings.setdefault(value, len(self._strings)))
+                else:
+                    if value.shared:
+                        shared = self._shared.get(id(value))
+                        if shared is not None:
+                            buffer.append(_DICT_REF)
+                            _write_varint(buffer, shared[1])
+                            continue
+                        self._shared[id(value)] = (value, len(self._shared))
+                        buffer.append(_SHARED_DICT)
+                    else:
+                        buffer.append(_DICT)
+                    _write_varint(buffer, len(value.items))
+                    stack.append(chain.from_iterable(value.items))
+                    break
+            else:
+                stack.pop()
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class _BinaryReader:
+    def __init__(self, data: bytes):
+        if not data.startswith(BINARY_MAGIC) or len(data) < len(BINARY_MAGIC) + 8:
+            raise ValueError("Not a binary config translation")
+        self.data = data
+        self.pos = struct.unpack_from('<Q', data, len(data) - 8)[0]
+        self.blocks = self.varint()
+        self.strings = []
+        for _ in range(self.varint()):
+            length = self.varint()
+            self.strings.append(data[self.pos:self.pos + length].decode('utf-8'))
+            self.pos += length
+        self.keys: List[Any] = [None] * len(self.strings)
+        # Offsets of shared dictionaries, the index of each offset, and their decoded dicts
+        self.shared_offsets: List[int] = []
+        self.shared_indexes: Dict[int, int] = {}
+        self.shared_values: Dict[int, dict] = {}
+
+    def varint(self) -> int:
+        data = self.data
+        result = shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read(self) -> List[Any]:
+        self.pos = len(BINARY_MAGIC)
+        result = []
+        for _ in range(self.blocks):
+            self.pos += 1
+            result.append(self.value())
+        return result
+
+    def value(self, raw: bool = False) -> Any:
+        # Nested dictionaries are read with an explicit stack, like Parser.dict. A frame is
+        # [raw, items left, items, key, shared index to record, position to return to];
+        # key is _MISSING until the key of the current item is read. Raw dictionaries are
+        # ConfigDicts of raw values, as dictionary keys need them
+        stack: List[list] = []
+        value = self.scalar(raw, stack)
+        if value is not _MISSING:
+            return value
+        data, strings, keys = self.data, self.strings, self.keys
+        while True:
+            frame = stack[-1]
+            raw, items = frame[0], frame[2]
+            # Items are read in place until one opens a dictionary
+            remaining, key = frame[1], frame[3]
+            while remaining:
+                if key is _MISSING:
+                    if not raw and data[self.pos] == _STRING:
+                        # Keys of plain dicts are numbers where the text reads back as one
+                        self.pos += 1
+                        index = self.varint()
+                        key = keys[index]
+                        if key is None:
+                            key = keys[index] = number_value(strings[index])
+                    else:
+                        key = self.scalar(True, stack)
+                        if key is _MISSING:
+                            break
+                if data[self.pos] == _STRING:
+                    self.pos += 1
+                    value = strings[self.varint()]
+                else:
+                    value = self.scalar(raw, stack)
+                    if value is _MISSING:
+                        break
+                if raw:
+                    items.append((key, value))
+                else:
+                    items[key] = value
+                remaining -= 1
+                key = _MISSING
+            frame[1], frame[3] = remaining, key
+            if not remaining:
+                # The dictionary is complete
+                stack.pop()
+                if raw:
+                    value = ConfigDict(items)
+                    # Hashed while its keys' hashes are cached, so a deep key is not hashed recursively
+                    hash(value)
+                else:
+                    value = items
+                if frame[4] is not None:
+                    value = self.shared_values.setdefault(frame[4], value)
+                if frame[5] is not None:
+                    self.pos = frame[5]
+                if not stack:
+                    return value
+                parent = stack[-1]
+                if parent[3] is _MISSING:
+                    parent[3] = value
+                    continue
+                if parent[0]:
+                    parent[2].append((parent[3], value))
+                else:
+                    parent[2][parent[3]] = value
+                parent[1] -= 1
+                parent[3] = _MISSING
+
+    def scalar(self, raw: bool, stack: List[list]) -> Any:
+        # Reads a value that is not a dictionary; a dictionary is opened on the stack
+        # and _MISSING returned
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == _STRING:
+            return self.strings[self.varint()]
+        if tag == _INT:
+            value = self.varint()
+            return value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if tag == _TRUE or tag == _FALSE:
+            return tag == _TRUE
+        if tag == _FLOAT:
+            self.pos += 8
+            return struct.unpack_from('<d', self.data, self.pos - 8)[0]
+        index = returns = None
+        if tag == _DICT_REF:
+            index = self.varint()
+            if not raw and index in self.shared_values:
+                return self.shared_values[index]
+            # Dictionary keys need a ConfigDict, and a definition first read inside a
+            # key has no dict yet, so the definition is decoded again
+            returns, self.pos = self.pos, self.shared_offsets[index]
+        elif tag == _SHARED_DICT:
+            # A definition decoded again keeps its index, and so do those nested in it
+            index = self.shared_indexes.get(self.pos)
+            if index is None:
+                index = self.shared_indexes[self.pos] = len(self.shared_offsets)
+                self.shared_offsets.append(self.pos)
+        stack.append([raw, self.varint(), [] if raw else {}, _MISSING, None if raw else index, returns])
+        return _MISSING
+
+
+def read_binary(data: bytes) -> List[Any]:
+    # The blocks of a binary translation, as returned by ConfigParser.load()
+    return _BinaryReader(data).read()
+
+
+def read_output(path: str) -> List[Any]:
+    # Reads a JSON or binary translation
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(BINARY_MAGIC):
+        return read_binary(data)
+    return read_json(io.StringIO(data.decode('utf-8')))
+
+
+class ConfigParser:
+    def __init__(self, base_dir: Optional[str] = None, modules: Optional[ModuleCache] = None,
+                 import_chain: Tuple[str, ...] = (), shared_dicts: bool = False):
+        self.constants: Dict[str, Any] = {}
+        self.shared_dicts = shared_dicts
+        # Imports are resolved against base_dir (the working directory by default)
+        self.base_dir = base_dir
+        self.modules = modules or MODULES
+        self.import_chain = import_chain
+        # Path -> SHA-256 of every module imported so far, directly or not
+        self.dependencies: Dict[str, str] = {}
+
+    def parse_ast(self, source: Union[str, TextIO]) -> ConfigNode:
+        return Parser(Lexer(source).tokens()).parse()
+
+    def statements(self, source: Union[str, TextIO]) -> Iterator[Node]:
+        return Parser(Lexer(source).tokens()).statements()
+
+    def parse(self, source: Union[str, TextIO]) -> ET.Element:
+        return self.emit(self.parse_ast(source))
+
+    def loads(self, text: str, native: bool = True) -> List[Any]:
+        # The top-level dictionaries and constant values, without building any XML
+        return self.emit(self.parse_ast(text), NativeBackend(native))
+
+    def load(self, fp: TextIO, native: bool = True) -> List[Any]:
+        return self.emit(self.parse_ast(fp), NativeBackend(native))
+
+    def translate(self, source: Union[str, TextIO], output: TextIO) -> None:
+        self.write(source, XMLStreamBackend(output, self.shared_dicts))
+
+    def write(self, source: Union[str, TextIO], backend: OutputBackend) -> Any:
+        # Hands each top-level block to the backend as soon as it is parsed
+        return self.run(self.statements(source), backend)
+
+    def emit(self, config: ConfigNode, backend: Optional[OutputBackend] = None) -> Any:
+        # Independent imports are loaded together before the statements run
+        self.modules.load([resolve_import(self.base_dir, statement.path)
+                           for statement in config.statements if isinstance(statement, ImportNode)])
+        return self.run(config.statements, backend or ElementTreeBackend(self.shared_dicts))
+
+    def run(self, statements: Iterable[Node], backend: OutputBackend) -> Any:
+        backend.start()
+        for statement in statements:
+            try:
+                block = self.execute(statement)
+                if block is not None:
+                    backend.write_block(*block)
+            except RecursionError:
+                raise nested_too_deeply(statement) from None
+        return backend.end()
+
+    def execute(self, statement: Node) -> Optional[Tuple[str, Any]]:
+        # Returns the block a statement produces, if any
+        if isinstance(statement, ConstDeclNode):
+            self.define(statement.name, self.evaluate(statement.value))
+        elif isinstance(statement, ImportNode):
+            self.import_module(statement)
+        elif isinstance(statement, DictNode):
+            return 'dict', self.evaluate_dict(statement)
+        else:
+            return 'constant', self.force(self.evaluate(statement))
+        return None
+
+    def import_module(self, statement: ImportNode) -> None:
+        # Imported constants become visible as if declared at the import
+        path = resolve_import(self.base_dir, statement.path)
+        try:
+            module = self.modules.get(path, self.import_chain)
+        except OSError as e:
+            raise SyntaxError(f"Cannot import {statement.path}: {e.strerror} "
+                              f"at line {statement.line}, column {statement.column}") from None
+        for name, value in module.constants.items():
+            self.define(name, value)
+        self.dependencies.update(module.dependencies)
+
+    def define(self, name: str, value: Any) -> None:
+        self.constants[name] = value
+
+    def evaluate(self, node: Node) -> Any:
+        # Folds a constant expression; dictionaries are left as LazyDict until used,
+        # with the constants they refer to already bound
+        if isinstance(node, NumberNode):
+            try:
+                return int(node.text)
+            except ValueError:
                 try:
-                    float(key)  # Validate that key is a number
+                    return float(node.text)
                 except ValueError:
-                    raise SyntaxError(f"Invalid key: {key}. Must be a number or dictionary")
-                dict_key = ET.SubElement(dict_elem, 'item', {'name': key})
-            
-            # Handle value
-            if value.startswith('dict('):
-                nested_dict = self.handle_dict(value)
-                dict_key.append(nested_dict)
+                    raise SyntaxError(f"Invalid constant value: {node.text} at line {node.line}, column {node.column}")
+        if isinstance(node, StringNode):
+            return node.text
+        if isinstance(node, BoolNode):
+            return node.value
+        if isinstance(node, ConstRefNode):
+            return self.resolve_constant(node)
+        if isinstance(node, DictNode):
+            return LazyDict(node, self, self.bind(node))
+        if isinstance(node, UnaryNode):
+            operand = self.evaluate(node.operand)
+            if not is_number(operand):
+                raise SyntaxError(f"Invalid operand for unary -: {value_text(operand)!r} "
+                                  f"at line {node.line}, column {node.column}")
+            return -operand
+        return self.evaluate_binary(node)
+
+    def evaluate_binary(self, node: BinaryNode) -> Any:
+        left = self.evaluate(node.left)
+        right = self.evaluate(node.right)
+        position = f"at line {node.line}, column {node.column}"
+        if node.operator == '+' and (isinstance(left, str) or isinstance(right, str)) \
+                and not isinstance(left, LazyDict) and not isinstance(right, LazyDict):
+            return value_text(left) + value_text(right)
+        if not is_number(left) or not is_number(right):
+            raise SyntaxError(f"Invalid operands for {node.operator}: {value_text(left)!r} and "
+                              f"{value_text(right)!r} {position}")
+        if node.operator == '+':
+            return left + right
+        if node.operator == '-':
+            return left - right
+        if node.operator == '*':
+            return left * right
+        if right == 0:
+            raise SyntaxError(f"Division by zero {position}")
+        return left / right
+
+    def resolve_constant(self, node: ConstRefNode, constants: Optional[Dict[str, Any]] = None) -> Any:
+        constants = self.constants if constants is None else constants
+        if node.name not in constants:
+            raise SyntaxError(f"Undefined constant: {node.name} at line {node.line}, column {node.column}")
+        return constants[node.name]
+
+    def bind(self, node: DictNode) -> Dict[str, Any]:
+        # The current values of the constants a dictionary refers to, in source order
+        # so the first undefined one is reported
+        constants: Dict[str, Any] = {}
+        stack: List[Node] = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ConstRefNode):
+                if node.name not in constants:
+                    constants[node.name] = self.resolve_constant(node)
+            elif isinstance(node, DictNode):
+                for item in reversed(node.items):
+                    stack.append(item.value)
+                    stack.append(item.key)
+        return constants
+
+    def force(self, value: Any) -> Any:
+        return value.resolve() if isinstance(value, LazyDict) else value
+
+    def evaluate_dict(self, node: DictNode, shared: bool = False,
+                      constants: Optional[Dict[str, Any]] = None) -> ConfigDict:
+        # Nested dictionaries are evaluated with an explicit stack, like Parser.dict.
+        # Constants are looked up in constants, the current scope by default.
+        # A frame is [node, index of the current item, items, key]; key is None until
+        # the key of the current item is evaluated
+        stack = [[node, 0, [], None]]
+        closed = None
+        while True:
+            frame = stack[-1]
+            if closed is not None:
+                value, closed = closed, None
+                if frame[3] is None:
+                    frame[3] = value
+                else:
+                    frame[2].append((frame[3], value))
+                    frame[1] += 1
+                    frame[3] = None
+                    continue
+            node, index, items = frame[0], frame[1], frame[2]
+            if index == len(node.items):
+                stack.pop()
+                if not stack:
+                    return ConfigDict(items, shared)
+                closed = ConfigDict(items)
+                continue
+            item = node.items[index]
+            if frame[3] is None:
+                if isinstance(item.key, DictNode):
+                    stack.append([item.key, 0, [], None])
+                    continue
+                frame[3] = item.key.text
+            if isinstance(item.value, DictNode):
+                stack.append([item.value, 0, [], None])
+                continue
+            items.append((frame[3], self.item_value(item.value, constants)))
+            frame[1] += 1
+            frame[3] = None
+
+    def item_value(self, node: Node, constants: Optional[Dict[str, Any]] = None) -> Any:
+        if isinstance(node, NumberNode):
+            return number_value(node.text)
+        if isinstance(node, ConstRefNode):
+            return self.force(self.resolve_constant(node, constants))
+        if isinstance(node, BoolNode):
+            return node.value
+        return node.text
+
+
+def expand_shared(root: ET.Element) -> ET.Element:
+    # Replaces every <dict ref="..."/> written with shared_dicts by a copy of its dictionary, in place
+    definitions: Dict[str, ET.Element] = {}
+
+    def expand(element: ET.Element) -> None:
+        for index, child in enumerate(list(element)):
+            ref = child.get('ref') if child.tag == 'dict' else None
+            if ref is not None:
+                if ref not in definitions:
+                    raise SyntaxError(f"Unknown dictionary reference: {ref}")
+                replacement = copy.deepcopy(definitions[ref])
+                replacement.tail = child.tail
+                element[index] = replacement
             else:
-                # Remove quotes if present
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                elif value.startswith("'") and value.endswith("'"):
-                    value = value[1:-1]
-                
-                # Handle constant reference
-                if value.startswith('$') and value.endswith('$'):
-                    value = str(self.resolve_constant(value))
-                elif value.lower() == 'true':
-                    value = 'True'
-                elif value.lower() == 'false':
-                    value = 'False'
-                
-                dict_key.text = value
-        
-        return dict_elem
+                expand(child)
+                if child.tag == 'dict' and 'id' in child.attrib:
+                    definitions[child.attrib.pop('id')] = child
+
+    expand(root)
+    return root
+
+
+def _constant_refs(node: Node) -> frozenset:
+    # Names of the constants a statement refers to
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ConstRefNode):
+            names.add(node.name)
+        elif isinstance(node, DictNode):
+            for item in node.items:
+                stack.append(item.key)
+                stack.append(item.value)
+        elif isinstance(node, (UnaryNode, ConstDeclNode)):
+            stack.append(node.operand if isinstance(node, UnaryNode) else node.value)
+        elif isinstance(node, BinaryNode):
+            stack.append(node.left)
+            stack.append(node.right)
+    return frozenset(names)
+
+
+class _Block:
+    __slots__ = ('start', 'end', 'node', 'refs', 'values', 'fragment')
+
+    def __init__(self, node: Node, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.node = node
+        self.refs = _constant_refs(node)
+        # Values of refs and the serialized XML of the block from the last translation
+        self.values: Dict[str, Any] = {}
+        self.fragment: Optional[str] = None
+
+    def moved(self, delta: int) -> '_Block':
+        block = copy.copy(self)
+        block.start += delta
+        block.end += delta
+        return block
+
+
+_MISSING = object()
+
+
+class IncrementalTranslator:
+    """Re-translates a changing config text into an XML file, reusing unchanged top-level blocks.
+
+    Only the blocks around the region where the new text differs from the previous one
+    are parsed again. Declarations are re-executed on every update, and an output block
+    is evaluated and serialized again only if its text changed or one of the constants
+    it refers to has a different value.
+    """
+
+    def __init__(self, output_file: str, base_dir: Optional[str] = None):
+        self.output_file = output_file
+        self.base_dir = base_dir
+        self.modules = MODULES
+        self.text: Optional[str] = None
+        self.blocks: List[_Block] = []
+        self.dependencies: Dict[str, str] = {}
+
+    def update(self, text: str) -> int:
+        # Returns the number of blocks parsed again. On a syntax error the output and
+        # the previous state are kept
+        blocks, reparsed = self._reparse(text)
+        try:
+            fragments, dependencies = self._evaluate(blocks)
+        except SyntaxError:
+            # Blocks that were not parsed again keep stale line numbers; report the error
+            # as a full parse does
+            ConfigParser(self.base_dir, self.modules).parse(text)
+            raise
+        self.text = text
+        self.blocks = blocks
+        self.dependencies = dependencies
+
+        temp_path = f"{self.output_file}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n<configuration>")
+            f.writelines(fragments)
+            f.write('</configuration>')
+        os.replace(temp_path, self.output_file)
+        return reparsed
+
+    def _reparse(self, text: str) -> Tuple[List[_Block], int]:
+        old = self.text
+        if old == text:
+            return list(self.blocks), 0
+        count = len(self.blocks)
+        if old is None:
+            first = last = 0
+        else:
+            prefix = _common_prefix(old, text)
+            suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+            # The block before the edit may absorb it (e.g. an added '-> name'), and so
+            # may the first block after it
+            first = max(bisect.bisect_left([block.start for block in self.blocks], prefix) - 1, 0)
+            last = min(bisect.bisect_right([block.end for block in self.blocks], len(old) - suffix) + 1, count)
+        delta = len(text) - len(old or '')
+        # A block on the line where the region ends may continue its last expression
+        while 0 < last < count and '\n' not in old[self.blocks[last - 1].end:self.blocks[last].start]:
+            last += 1
+
+        start = self.blocks[first].start if 0 < first < count else 0
+        while True:
+            end = self.blocks[last - 1].end + delta if last < count else len(text)
+            try:
+                region = self._parse_region(text, start, end)
+                # A comment, string or REM line opened by the edit runs past the region
+                if last == count or (region and region[-1].end == end):
+                    break
+            except SyntaxError:
+                if last == count:
+                    raise
+            last = count
+
+        blocks = self.blocks[:first] + region
+        # Blocks are moved by copying, so a failed update leaves the previous state intact
+        blocks.extend(block.moved(delta) for block in self.blocks[last:])
+        return blocks, len(region)
+
+    @staticmethod
+    def _parse_region(text: str, start: int, end: int) -> List[_Block]:
+        line = text.count('\n', 0, start) + 1
+        line_start = text.rfind('\n', 0, start) + 1
+        lexer = Lexer(text[start:end], line=line, column=start - line_start + 1, offset=start,
+                      at_line_start=not text[line_start:start].strip())
+        return [_Block(node, node_start, node_end) for node, node_start, node_end in Parser(lexer.tokens()).spans()]
+
+    def _evaluate(self, blocks: List[_Block]) -> Tuple[List[str], Dict[str, str]]:
+        parser = ConfigParser(self.base_dir, self.modules)
+        fragments = []
+        # (id of old value, id of new value) -> equal, for dictionaries compared this update
+        compared: Dict[Tuple[int, int], bool] = {}
+
+        def same(old: Any, new: Any) -> bool:
+            if old is new:
+                return True
+            if type(old) is not type(new):
+                return False
+            if isinstance(new, ConfigDict):
+                key = (id(old), id(new))
+                if key not in compared:
+                    compared[key] = old == new
+                return compared[key]
+            return old == new
+
+        for block in blocks:
+            node = block.node
+            if isinstance(node, (ConstDeclNode, ImportNode)):
+                parser.execute(node)
+                continue
+            values = {name: parser.force(parser.constants.get(name, _MISSING)) for name in block.refs}
+            if block.fragment is None or any(not same(block.values.get(name, _MISSING), value)
+                                             for name, value in values.items()):
+                backend = ElementTreeBackend()
+                backend.start()
+                try:
+                    backend.write_block(*parser.execute(node))
+                    block.fragment = ET.tostring(backend.root[0], encoding='unicode')
+                except RecursionError:
+                    raise nested_too_deeply(node) from None
+            block.values = values
+            fragments.append(block.fragment)
+        return fragments, parser.dependencies
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Binary search with slice comparisons, which run at C speed
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def watch(input_file: str, output_file: str, interval: float = 0.5) -> None:
+    # Polls the input and the modules it imports, and updates the output after every change
+    translator = IncrementalTranslator(output_file, os.path.dirname(input_file))
+    stamps = None
+    while True:
+        current = {}
+        for path in [input_file, *translator.dependencies]:
+            try:
+                current[path] = _file_stamp(path)
+            except OSError:
+                current[path] = None
+        if current != stamps:
+            stamps = current
+            try:
+                with open(input_file, encoding='utf-8') as f:
+                    text = f.read()
+                started = time.perf_counter()
+                reparsed = translator.update(text)
+                print(f"Updated {output_file}: parsed {reparsed} of {len(translator.blocks)} block(s) "
+                      f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+            except (SyntaxError, OSError) as e:
+                print(f"Error: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def cache_key(cache: CompileCache, source: Union[str, TextIO], stream: bool = False, base_dir: Optional[str] = None,
+              shared_dicts: bool = False, output_format: str = 'xml') -> str:
+    # Relative imports depend on the directory the input is translated from
+    mode = f"{'stream' if stream else 'tree'}{'-shared' if shared_dicts else ''}"
+    if output_format != 'xml':
+        mode = output_format
+    return cache.key(source, f"{mode}\0{os.path.abspath(base_dir or os.getcwd())}")
+
+
+def translate_file(source: Union[str, TextIO], output_file: str, stream: bool = False,
+                   cache: Optional[CompileCache] = None, base_dir: Optional[str] = None,
+                   shared_dicts: bool = False, output_format: str = 'xml') -> bool:
+    # Returns True if the output was taken from the cache
+    key = None
+    if cache is not None and not isinstance(source, str) and not source.seekable():
+        # A pipe cannot be hashed and then read again without holding it in memory,
+        # which would undo chunked input, so it is translated without the cache
+        cache = None
+    if cache is not None:
+        key = cache_key(cache, source, stream, base_dir, shared_dicts, output_format)
+        if cache.fetch(key, output_file):
+            return True
+
+    # Write next to the output and replace it, so a failed translation keeps the old file
+    temp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        config_parser = ConfigParser(base_dir, shared_dicts=shared_dicts)
+        if output_format == 'json':
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                config_parser.write(source, JSONBackend(f))
+        elif output_format == 'binary':
+            with open(temp_path, 'wb') as f:
+                config_parser.write(source, BinaryBackend(f))
+        elif stream:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                config_parser.translate(source, f)
+        else:
+            output = config_parser.parse(source)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                tree = ET.ElementTree(output)
+                try:
+                    tree.write(f, encoding='unicode', xml_declaration=True)
+                except RecursionError:
+                    # ElementTree serializes recursively; the streaming writer does not
+                    raise SyntaxError("Dictionaries nested too deeply to write as a tree, use --stream") from None
+        if cache is not None:
+            cache.store(key, temp_path, config_parser.dependencies)
+        os.replace(temp_path, output_file)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return False
+
+
+def collect_batch(inputs: List[str], output_dir: str, suffix: str = '.xml') -> List[Tuple[str, str]]:
+    # Pairs every input file with its output path, mirroring the layout below each directory or glob base
+    jobs = []
+    seen = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            base = pattern
+            files = sorted(os.path.join(dirpath, filename)
+                           for dirpath, _, filenames in os.walk(pattern)
+                           for filename in filenames if filename.endswith(CONFIG_SUFFIXES))
+        elif glob.has_magic(pattern):
+            base = pattern
+            while glob.has_magic(base):
+                base = os.path.dirname(base)
+            files = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            base = os.path.dirname(pattern)
+            files = [pattern]
+        for path in files:
+            if os.path.abspath(path) in seen:
+                continue
+            seen.add(os.path.abspath(path))
+            relative = os.path.splitext(os.path.relpath(path, base or '.'))[0] + suffix
+            jobs.append((path, os.path.join(output_dir, relative)))
+    return jobs
+
+
+def _translate_job(job: Tuple[str, str, Dict[str, Any], Optional[Tuple[str, int]]]) -> BatchResult:
+    # options are keyword arguments of translate_file
+    input_file, output_file, options, cache_args = job
+    cache = CompileCache(cache_args[0], TRANSLATOR_VERSION, cache_args[1]) if cache_args else None
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(input_file, encoding='utf-8') as f:
+            cached = translate_file(f, output_file, cache=cache, base_dir=os.path.dirname(input_file), **options)
+        return BatchResult(input_file, output_file, None, cached)
+    except (SyntaxError, OSError, UnicodeDecodeError) as e:
+        return BatchResult(input_file, output_file, str(e), False)
+    except Exception as e:
+        # Anything else is a translator bug on this file, the rest of the batch still runs
+        return BatchResult(input_file, output_file, f"{type(e).__name__}: {e}", False)
+
+
+def translate_batch(inputs: List[str], output_dir: str, workers: Optional[int] = None, stream: bool = False,
+                    cache_dir: Optional[str] = None, cache_size: int = 100 * 1024 * 1024,
+                    shared_dicts: bool = False, output_format: str = 'xml') -> List[BatchResult]:
+    # A failed file is reported in its result and does not stop the others
+    cache_args = (cache_dir, cache_size) if cache_dir else None
+    options = {'stream': stream, 'shared_dicts': shared_dicts, 'output_format': output_format}
+    jobs = [(input_file, output_file, options, cache_args)
+            for input_file, output_file in collect_batch(inputs, output_dir, OUTPUT_SUFFIXES[output_format])]
+    if workers == 1 or len(jobs) <= 1:
+        return [_translate_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(_translate_job, jobs, chunksize=chunksize))
 
-    def resolve_constant(self, line: str) -> Any:
-        name = line[1:-1]  # Remove $
-        if name not in self.constants:
-            raise SyntaxError(f"Undefined constant: {name}")
-        return self.constants[name]
 
 def main():
     parser = argparse.ArgumentParser(description='Convert custom config language to XML.')
-    parser.add_argument('output_file', type=str, help='Output XML file path')
+    parser.add_argument('output_file', type=str, help='Output XML file path (output directory with --batch)')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help='Translate config files from these directories, globs or files instead of stdin')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --batch (default: number of CPUs)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write each top-level block as it is parsed instead of building the whole tree')
+    parser.add_argument('--watch', metavar='INPUT_FILE',
+                        help='Translate INPUT_FILE and translate it again whenever it or an imported module changes')
+    parser.add_argument('--interval', type=float, default=0.5, help='Polling interval for --watch in seconds')
+    parser.add_argument('--format', choices=sorted(OUTPUT_SUFFIXES), default='xml', dest='output_format',
+                        help='Output format; json and binary can be read back with read_output()')
+    parser.add_argument('--shared-dicts', action='store_true',
+                        help='Write a repeated dictionary constant once and refer to it by id afterwards')
+    parser.add_argument('--no-cache', action='store_true', help='Always translate, without the compile cache')
+    parser.add_argument('--cache-dir', default=default_cache_dir(), help='Compile cache directory')
+    parser.add_argument('--cache-size', type=float, default=100, help='Compile cache size limit in MB')
     args = parser.parse_args()
 
+    if args.watch:
+        if args.output_format != 'xml' or args.shared_dicts:
+            parser.error('--watch writes plain XML only')
+        try:
+            watch(args.watch, args.output_file, args.interval)
+        except KeyboardInterrupt:
+            pass
+        return
+
     try:
-        input_text = sys.stdin.read()
-        config_parser = ConfigParser()
-        output = config_parser.parse(input_text)
-        
-        with open(args.output_file, 'w') as f:
-            tree = ET.ElementTree(output)
-            tree.write(f, encoding='unicode', xml_declaration=True)
+        cache_size = int(args.cache_size * 1024 * 1024)
+        if args.batch:
+            results = translate_batch(args.batch, args.output_file, args.workers, args.stream,
+                                      None if args.no_cache else args.cache_dir, cache_size, args.shared_dicts,
+                                      args.output_format)
+            failed = [result for result in results if result.error]
+            for result in failed:
+                print(f"Error: {result.input_file}: {result.error}", file=sys.stderr)
+            print(f"Translated {len(results) - len(failed)} of {len(results)} file(s) to {args.output_file}")
+            if not args.no_cache:
+                hits = sum(result.cached for result in results)
+                print(f"cache: {hits} hit(s), {len(results) - len(failed) - hits} miss(es)")
+            sys.exit(1 if failed else 0)
+
+        cache = None
+        if not args.no_cache:
+            cache = CompileCache(args.cache_dir, TRANSLATOR_VERSION, cache_size)
+        # Input is read in chunks and with --stream blocks are written while stdin
+        # is still open. A file redirected to stdin is hashed for the cache first,
+        # a pipe is translated without it
+        translate_file(sys.stdin, args.output_file, args.stream, cache, shared_dicts=args.shared_dicts,
+                       output_format=args.output_format)
         print(f"Successfully wrote output to {args.output_file}")
+        if cache is not None:
+            print(cache.report())
     except SyntaxError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from compile_cache import CompileCache
+from config_parser import cache_key, translate_file
+
+
+class TestCompileCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = CompileCache(os.path.join(self.temp_dir, 'cache'), '1.0')
+        self.output_file = os.path.join(self.temp_dir, 'out.xml')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_output(self):
+        with open(self.output_file, encoding='utf-8') as f:
+            return f.read()
+
+    def test_hit_skips_parsing(self):
+        """Тест на повторную трансляцию без разбора."""
+        config = 'dict(1 = "a")'
+        self.assertFalse(translate_file(config, self.output_file, cache=self.cache))
+        expected = self.read_output()
+        os.remove(self.output_file)
+
+        with patch('config_parser.ConfigParser.parse') as mock_parse:
+            self.assertTrue(translate_file(config, self.output_file, cache=self.cache))
+            mock_parse.assert_not_called()
+        self.assertEqual(self.read_output(), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_input_version_and_mode(self):
+        """Тест на ключ кэша: вход, версия транслятора и режим вывода."""
+        key = self.cache.key('dict(1 = 2)')
+        self.assertNotEqual(key, self.cache.key('dict(1 = 3)'))
+        self.assertNotEqual(key, self.cache.key('dict(1 = 2)', 'stream'))
+        self.assertNotEqual(key, CompileCache(self.cache.directory, '2.0').key('dict(1 = 2)'))
+
+    def test_output_rewrite_keeps_entry(self):
+        """Тест на то, что перезапись результата не меняет запись в кэше."""
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        translate_file('dict(1 = 3)', self.output_file)
+        entry = self.cache.path(cache_key(self.cache, 'dict(1 = 2)'))
+        with open(entry, encoding='utf-8') as f:
+            self.assertIn('<item name="1">2</item>', f.read())
+
+    def test_output_edit_keeps_entry(self):
+        """Тест на то, что правка результата на месте не портит запись в кэше."""
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        with open(self.output_file, 'a', encoding='utf-8') as f:
+            f.write('<!-- edited -->')
+        entry = self.cache.path(cache_key(self.cache, 'dict(1 = 2)'))
+        with open(entry, encoding='utf-8') as f:
+            self.assertNotIn('edited', f.read())
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        self.assertNotIn('edited', self.read_output())
+
+    def test_stream_source(self):
+        """Тест на кэширование входа из файла без чтения его целиком."""
+        config = 'dict(1 = 2)'
+        source = StringIO(config)
+        self.assertEqual(self.cache.key(source), self.cache.key(config))
+        self.assertEqual(source.tell(), 0)
+        self.assertFalse(translate_file(source, self.output_file, cache=self.cache))
+        self.assertTrue(translate_file(StringIO(config), self.output_file, cache=self.cache))
+        self.assertIn('<item name="1">2</item>', self.read_output())
+
+        # Канал нельзя прочитать дважды, поэтому он транслируется без кэша
+        pipe = StringIO('dict(1 = 3)')
+        pipe.seekable = lambda: False
+        with patch('config_parser.cache_key') as mock_key:
+            self.assertFalse(translate_file(pipe, self.output_file, cache=self.cache))
+            mock_key.assert_not_called()
+        self.assertIn('<item name="1">3</item>', self.read_output())
+
+    def test_entries_are_format_neutral(self):
+        """Тест на имена записей кэша, не зависящие от формата вывода."""
+        self.output_file = os.path.join(self.temp_dir, 'out.json')
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache, output_format='json')
+        entry = self.cache.path(cache_key(self.cache, 'dict(1 = 2)', output_format='json'))
+        self.assertTrue(entry.endswith('.out'))
+        self.assertTrue(translate_file('dict(1 = 2)', self.output_file, cache=self.cache, output_format='json'))
+        self.assertEqual(self.cache._scan()[0][0][2], entry)
+
+    def test_failed_copy_removes_temp_file(self):
+        """Тест на удаление временного файла при ошибке записи в кэш."""
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        with patch('shutil.copyfileobj', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['cache', 'out.xml'])
+        entry = self.cache.path(cache_key(self.cache, 'dict(1 = 2)'))
+        self.assertEqual(os.listdir(os.path.dirname(entry)), [os.path.basename(entry)])
+
+    def test_failed_translation_is_not_cached(self):
+        """Тест на то, что ошибки не попадают в кэш и не портят результат."""
+        translate_file('dict(1 = 2)', self.output_file, cache=self.cache)
+        with self.assertRaises(SyntaxError):
+            translate_file('dict(1 = )', self.output_file, cache=self.cache)
+        self.assertIn('<item name="1">2</item>', self.read_output())
+        self.assertFalse(os.path.exists(self.cache.path(cache_key(self.cache, 'dict(1 = )'))))
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['cache', 'out.xml'])
+
+    def test_eviction(self):
+        """Тест на вытеснение давно использованных записей при превышении размера."""
+        self.cache.max_bytes = 250
+        for value in range(3):
+            translate_file(f'dict(1 = {value})', self.output_file, cache=self.cache)
+            entry = self.cache.path(cache_key(self.cache, f'dict(1 = {value})'))
+            os.utime(entry, (time.time() - 100 + value, time.time() - 100 + value))
+        self.assertFalse(os.path.exists(self.cache.path(cache_key(self.cache, 'dict(1 = 0)'))))
+        self.assertTrue(os.path.exists(self.cache.path(cache_key(self.cache, 'dict(1 = 2)'))))
+
+    def test_eviction_runs_past_limit_only(self):
+        """Тест на то, что каталог кэша обходится только при превышении размера."""
+        with patch.object(CompileCache, 'evict', autospec=True, side_effect=CompileCache.evict) as mock_evict:
+            for value in range(20):
+                translate_file(f'dict(1 = {value})', self.output_file, cache=self.cache)
+            mock_evict.assert_not_called()
+            self.cache.max_bytes = self.cache._size - 1
+            translate_file('dict(1 = 20)', self.output_file, cache=self.cache)
+            self.assertEqual(mock_evict.call_count, 1)
+        # Вытеснение освобождает место с запасом
+        self.assertLessEqual(self.cache._size, self.cache.max_bytes * CompileCache.LOW_WATER)
+
+    def test_changed_import_invalidates_entry(self):
+        """Тест на промах кэша после изменения импортированного модуля."""
+        module = os.path.join(self.temp_dir, 'shared.cfg')
+        with open(module, 'w', encoding='utf-8') as f:
+            f.write('1 -> value')
+        config = 'import "shared.cfg"\ndict(1 = $value$)'
+        translate_file(config, self.output_file, cache=self.cache, base_dir=self.temp_dir)
+        with open(module, 'w', encoding='utf-8') as f:
+            f.write('2 -> value')
+        self.assertFalse(translate_file(config, self.output_file, cache=self.cache, base_dir=self.temp_dir))
+        self.assertIn('<item name="1">2</item>', self.read_output())
+        self.assertTrue(translate_file(config, self.output_file, cache=self.cache, base_dir=self.temp_dir))
+
+    def test_crlf_import_hits(self):
+        """Тест на попадание в кэш при импорте файла с переводами строк CRLF."""
+        with open(os.path.join(self.temp_dir, 'ports.cfg'), 'wb') as f:
+            f.write(b'8080 -> port\r\n')
+        config = 'import "ports.cfg"\ndict(1 = $port$)'
+        self.assertFalse(translate_file(config, self.output_file, cache=self.cache, base_dir=self.temp_dir))
+        self.assertIn('<item name="1">8080</item>', self.read_output())
+        self.assertTrue(translate_file(config, self.output_file, cache=self.cache, base_dir=self.temp_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
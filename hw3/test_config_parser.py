@@ -1,7 +1,13 @@
+import os
+import shutil
+import tempfile
 import unittest
+import unittest.mock
 import xml.etree.ElementTree as ET
-from io import StringIO
-from config_parser import ConfigParser
+from io import BytesIO, StringIO
+from config_parser import (BinaryBackend, ConfigDict, ConfigParser, IncrementalTranslator, JSONBackend, Lexer,
+                           ModuleCache,
+                           expand_shared, read_binary, read_json, read_output, translate_batch, translate_file)
 
 
 class TestConfigParser(unittest.TestCase):
@@ -227,5 +233,451 @@ class TestConfigParser(unittest.TestCase):
             self.normalize_xml(expected_xml)
         )
 
+    def test_error_positions(self):
+        """Тест на указание строки и столбца в сообщениях об ошибках."""
+        config = """
+        dict(
+            123 = "value",
+            key = "value"
+        )
+        """
+        with self.assertRaisesRegex(SyntaxError, "line 4, column 13"):
+            self.parser.parse(config)
+
+        with self.assertRaisesRegex(SyntaxError, "Unterminated string at line 1"):
+            self.parser.parse("dict(1 = 'value)")
+
+        with self.assertRaisesRegex(SyntaxError, "Undefined constant: missing at line 2"):
+            self.parser.parse("dict(\n  1 = $missing$\n)")
+
+    def test_dict_constants(self):
+        """Тест на многострочные словари-константы и константы верхнего уровня."""
+        config = """
+        dict(
+            1 = "a",
+            2 = 3.5
+        ) -> defaults
+        /* комментарий
+           на несколько строк */ 7 -> answer;
+        dict(
+            10 = $defaults$,
+            dict(1 = 2) = $answer$,
+        )
+        $answer$
+        """
+        root = self.parser.parse(config)
+        expected_xml = '''<configuration>
+    <dict>
+        <item name="10">
+            <dict>
+                <item name="1">a</item>
+                <item name="2">3.5</item>
+            </dict>
+        </item>
+        <item>7<dict><item name="1">2</item></dict></item>
+    </dict>
+    <constant>7</constant>
+</configuration>'''
+
+        self.assertEqual(
+            self.normalize_xml(ET.tostring(root, encoding='unicode')),
+            self.normalize_xml(expected_xml)
+        )
+
+    def test_deep_nesting(self):
+        """Тест на глубоко вложенные словари."""
+        depth = 200
+        config = "dict(1 = " * depth + '"leaf"' + ")" * depth
+        root = self.parser.parse(config)
+        node = root
+        for _ in range(depth):
+            node = node.find('dict/item')
+        self.assertEqual(node.text, 'leaf')
+
+        # Глубже предела рекурсии: словари разбираются и пишутся потоком без рекурсии
+        depth = 3000
+        config = "5 -> x\n" + "dict(1 = " * depth + "$x$" + ")" * depth + "\n"
+        output = StringIO()
+        ConfigParser().translate(config, output)
+        self.assertEqual(output.getvalue().count('<dict>'), depth)
+        self.assertEqual(len(list(self.parser.parse(config).iter('dict'))), depth)
+        # Рекурсивный вывод сообщает о слишком глубокой вложенности с позицией блока
+        with self.assertRaisesRegex(SyntaxError, "nested too deeply at line 2, column 1"):
+            ConfigParser().write(config, JSONBackend(StringIO()))
+        with self.assertRaisesRegex(SyntaxError, "nested too deeply at line 1, column 1"):
+            self.parser.parse("(" * depth + "1" + ")" * depth + " -> y")
+
+        # Двоичный формат пишется и читается без рекурсии, в том числе словари в ключах
+        output = BytesIO()
+        ConfigParser().write(config + "dict(" * depth + "1 = 2" + ") = 3" * (depth - 1) + ")", BinaryBackend(output))
+        value, keyed = read_binary(output.getvalue())
+        for _ in range(depth):
+            value = value[1]
+        self.assertEqual(value, 5)
+        key = next(iter(keyed))
+        for _ in range(depth - 2):
+            key = key.items[0][0]
+        self.assertEqual(key, ConfigDict([('1', 2)]))
+
+    def test_streaming_translation(self):
+        """Тест на потоковую запись XML: результат совпадает с parse()."""
+        config = """
+        dict(1 = "a & b", 2 = 3) -> base
+        5 -> answer;
+        dict(
+            10 = $base$,
+            dict(1 = 2) = $answer$,
+            dict(3 = 4) = dict(),
+            11 = true
+        )
+        $answer$
+        $base$
+        """
+        output = StringIO()
+        self.parser.translate(config, output)
+        self.assertTrue(output.getvalue().startswith('<?xml'))
+        self.assertEqual(
+            ET.canonicalize(output.getvalue().split('?>', 1)[1]),
+            ET.canonicalize(ET.tostring(ConfigParser().parse(config), encoding='unicode'))
+        )
+
+    def test_chunked_input(self):
+        """Тест на чтение входа частями: комментарии и лексемы на границах частей."""
+        config = """REM заголовок
+        dict(1 = "a b", 2 = 'x') -> base /* комментарий
+        на две строки */ 5 -> answer;
+        dict(
+            10 = $base$, 11 = hello   world,
+            12 = -3.5, 13 = "$answer$"
+        )
+        REM конец"""
+        expected = list(Lexer(config).tokens())
+        for chunk_size in range(1, 10):
+            self.assertEqual(list(Lexer(StringIO(config), chunk_size=chunk_size).tokens()), expected)
+        self.assertEqual(
+            ET.tostring(ConfigParser().parse(StringIO(config)), encoding='unicode'),
+            ET.tostring(self.parser.parse(config), encoding='unicode')
+        )
+
+    def test_tokens_before_end_of_input(self):
+        """Тест на выдачу лексем до того, как вход прочитан полностью."""
+        class Source:
+            def __init__(self):
+                self.chunks = ["dict(1 = 2)\n", "dict(3 = 4)\n"]
+
+            def read(self, size):
+                if not self.chunks:
+                    raise AssertionError("input read too far")
+                return self.chunks.pop(0)
+
+        statements = self.parser.statements(Source())
+        self.assertEqual(next(statements).items[0].value.text, '2')
+
+    def test_batch_translation(self):
+        """Тест на пакетную трансляцию каталога: структура каталогов и ошибки по файлам."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source_dir = os.path.join(temp_dir, 'configs')
+        os.makedirs(os.path.join(source_dir, 'nested'))
+        files = {
+            'a.txt': 'dict(1 = 2)',
+            os.path.join('nested', 'b.cfg'): '5 -> x\ndict(1 = $x$)',
+            os.path.join('nested', 'bad.txt'): 'dict(key = 1)',
+            'notes.md': 'не конфигурация',
+        }
+        for name, text in files.items():
+            with open(os.path.join(source_dir, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        output_dir = os.path.join(temp_dir, 'out')
+        results = translate_batch([source_dir, os.path.join(source_dir, '*.txt')], output_dir, workers=2)
+        self.assertEqual(len(results), 3)
+        errors = {os.path.relpath(r.input_file, source_dir): r.error for r in results if r.error}
+        self.assertEqual(list(errors), [os.path.join('nested', 'bad.txt')])
+        self.assertIn('Invalid key type', errors[os.path.join('nested', 'bad.txt')])
+
+        root = ET.parse(os.path.join(output_dir, 'nested', 'b.xml')).getroot()
+        self.assertEqual(root.find('dict/item').text, '5')
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'a.xml')))
+        self.assertFalse(os.path.exists(os.path.join(output_dir, 'nested', 'bad.xml')))
+
+        # Непредвиденная ошибка на одном файле не прерывает пакет
+        original = translate_file
+
+        def translate(source, output_file, **options):
+            if source.name.endswith('a.txt'):
+                raise RecursionError('maximum recursion depth exceeded')
+            return original(source, output_file, **options)
+
+        with unittest.mock.patch('config_parser.translate_file', side_effect=translate):
+            results = translate_batch([source_dir], os.path.join(temp_dir, 'again'), workers=1)
+        errors = {os.path.relpath(r.input_file, source_dir): r.error for r in results if r.error}
+        self.assertEqual(sorted(errors), ['a.txt', os.path.join('nested', 'bad.txt')])
+        self.assertEqual(errors['a.txt'], 'RecursionError: maximum recursion depth exceeded')
+        self.assertTrue(os.path.exists(os.path.join(temp_dir, 'again', 'nested', 'b.xml')))
+
+    def write_modules(self, modules):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        for name, text in modules.items():
+            with open(os.path.join(temp_dir, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        return temp_dir
+
+    def test_import_constants(self):
+        """Тест на импорт констант из общих модулей."""
+        temp_dir = self.write_modules({
+            'ports.cfg': '8080 -> port;\n9090 -> admin_port;',
+            'hosts.cfg': 'include "ports.cfg"\ndict(1 = "localhost", 2 = $port$) -> server',
+            'unused.cfg': '1 -> unused',
+        })
+        config = """
+        import "hosts.cfg";
+        import "ports.cfg"
+        dict(
+            1 = $server$,
+            2 = $admin_port$
+        )
+        """
+        modules = ModuleCache()
+        parser = ConfigParser(temp_dir, modules)
+        root = parser.parse(config)
+        self.assertEqual(root.find('dict/item[@name="1"]/dict/item[@name="2"]').text, '8080')
+        self.assertEqual(root.find('dict/item[@name="2"]').text, '9090')
+        self.assertEqual(sorted(os.path.basename(path) for path in parser.dependencies), ['hosts.cfg', 'ports.cfg'])
+
+        # Модули разбираются один раз на процесс
+        with unittest.mock.patch.object(ModuleCache, '_read', side_effect=AssertionError):
+            ConfigParser(temp_dir, modules).parse(config)
+
+    def test_import_errors(self):
+        """Тест на циклический импорт и отсутствующие модули."""
+        temp_dir = self.write_modules({
+            'a.cfg': 'import "b.cfg"\n1 -> a',
+            'b.cfg': 'import "a.cfg"\n2 -> b',
+        })
+        with self.assertRaisesRegex(SyntaxError, "Import cycle: .*a.cfg -> .*b.cfg -> .*a.cfg"):
+            ConfigParser(temp_dir, ModuleCache()).parse('import "a.cfg"')
+        with self.assertRaisesRegex(SyntaxError, "Cannot import missing.cfg.* at line 1, column 1"):
+            ConfigParser(temp_dir, ModuleCache()).parse('import "missing.cfg"')
+
+    def test_constant_expressions(self):
+        """Тест на вычисление константных выражений при объявлении."""
+        config = """
+        8000 -> base;
+        $base$ + 80 -> port
+        (1 + 2) * 3 / 2 -> ratio
+        "http://" + "localhost:" + $port$ -> url
+        dict(1 = 2)
+        -5 -> offset
+        dict(
+            1 = $url$,
+            2 = $ratio$,
+            3 = $offset$
+        )
+        $port$ - 1
+        """
+        root = self.parser.parse(config)
+        self.assertEqual(self.parser.constants['port'], 8080)
+        self.assertEqual(self.parser.constants['url'], 'http://localhost:8080')
+        self.assertEqual([item.text for item in root[1]], ['http://localhost:8080', '4.5', '-5'])
+        self.assertEqual(root.find('constant').text, '8079')
+
+        for config, message in [('1 / 0 -> x', 'Division by zero'),
+                                ('dict(1 = 2) + 1 -> x', 'Invalid operands for \\+'),
+                                ('"a" * 2 -> x', 'Invalid operands for \\*'),
+                                ('(1 + 2 -> x', "Expected \\)")]:
+            with self.assertRaisesRegex(SyntaxError, message):
+                ConfigParser().parse(config)
+
+    def test_dict_constants_resolved_once(self):
+        """Тест на ленивое вычисление словарей-констант и повторное использование результата."""
+        config = "5 -> size\ndict(1 = $size$, 2 = dict(3 = 4)) -> big\n"
+        config += "dict(\n" + ",\n".join(f"{i} = $big$" for i in range(100)) + "\n)\n"
+        with unittest.mock.patch.object(ConfigParser, 'evaluate_dict', autospec=True,
+                                        side_effect=ConfigParser.evaluate_dict) as evaluate_dict:
+            root = self.parser.parse(config)
+        # Верхний словарь и константа big, вложенные словари вычисляются в том же вызове
+        self.assertEqual(evaluate_dict.call_count, 2)
+        self.assertEqual(len(root.findall('dict/item/dict')), 100)
+
+        # Константы связываются при объявлении словаря, переопределение его не меняет
+        root = ConfigParser().parse("1 -> x\ndict(1 = $x$) -> d\n2 -> x\ndict(1 = $d$, 2 = $x$)")
+        self.assertEqual([item.text for item in root.iter('item') if item.text], ['1', '2'])
+
+        # Неопределённые константы и ссылки вперёд обнаруживаются при объявлении
+        with self.assertRaisesRegex(SyntaxError, 'Undefined constant: nope at line 1, column 10'):
+            ConfigParser().parse("dict(1 = $nope$) -> d")
+        with self.assertRaisesRegex(SyntaxError, 'Undefined constant: later at line 1'):
+            ConfigParser().parse("dict(1 = $later$) -> d\n1 -> later\ndict(1 = $d$)")
+
+    def test_shared_dicts(self):
+        """Тест на однократную запись повторяющихся словарей-констант."""
+        config = """
+        dict(1 = "a", 2 = dict(3 = 4)) -> common
+        dict(1 = $common$, 2 = $common$) -> pair
+        dict(
+            1 = $pair$,
+            2 = $common$,
+            3 = dict(5 = 6)
+        )
+        $pair$
+        """
+        shared = ConfigParser(shared_dicts=True).parse(config)
+        self.assertEqual(len(shared.findall('.//dict[@id]')), 2)
+        self.assertEqual([element.get('ref') for element in shared.iter('dict') if element.get('ref')],
+                         ['d2', 'd2', 'd1'])
+        self.assertLess(len(ET.tostring(shared)), len(ET.tostring(self.parser.parse(config))))
+
+        # Потоковая запись даёт тот же документ, а раскрытие ссылок — обычный вывод
+        output = StringIO()
+        ConfigParser(shared_dicts=True).translate(config, output)
+        self.assertEqual(ET.canonicalize(output.getvalue().split('?>', 1)[1]),
+                         ET.canonicalize(ET.tostring(shared, encoding='unicode')))
+        self.assertEqual(ET.tostring(expand_shared(shared)), ET.tostring(ConfigParser().parse(config)))
+
+    def test_loads_native_objects(self):
+        """Тест на загрузку конфигурации в объекты Python без построения XML."""
+        config = """
+        dict(1 = "a", 2 = 3.5) -> common
+        8080 -> port
+        dict(
+            1 = "localhost",
+            2 = $port$,
+            3 = true,
+            4 = 1.0.0,
+            5 = $common$,
+            6 = $common$,
+            dict(7 = 8) = "ключ-словарь"
+        )
+        $port$
+        """
+        with unittest.mock.patch('xml.etree.ElementTree.Element', side_effect=AssertionError):
+            blocks = self.parser.loads(config)
+        self.assertEqual(blocks, [{
+            1: 'localhost',
+            2: 8080,
+            3: True,
+            4: '1.0.0',
+            5: {1: 'a', 2: 3.5},
+            6: {1: 'a', 2: 3.5},
+            ConfigDict([('7', 8)]): 'ключ-словарь',
+        }, 8080])
+        self.assertIs(blocks[0][5], blocks[0][6])
+
+        blocks = ConfigParser().load(StringIO(config), native=False)
+        self.assertIsInstance(blocks[0], ConfigDict)
+        self.assertEqual(blocks[0].items[0], ('1', 'localhost'))
+
+    def test_json_and_binary_output(self):
+        """Тест на вывод в JSON и двоичном формате и обратное чтение."""
+        config = """
+        dict(1 = "a", 2 = 3.5, 3 = dict(4 = true)) -> common
+        dict(
+            1 = "localhost",
+            2 = -12345678901234567890,
+            3 = false,
+            4 = 1.0.0,
+            5 = $common$,
+            6 = $common$,
+            dict(7 = $common$) = "ключ-словарь"
+        )
+        "http://" + "host" -> url
+        $url$
+        """
+        expected = ConfigParser().loads(config)
+
+        output = StringIO()
+        ConfigParser().write(config, JSONBackend(output))
+        self.assertEqual(read_json(StringIO(output.getvalue())), expected)
+
+        output = BytesIO()
+        ConfigParser().write(config, BinaryBackend(output))
+        blocks = read_binary(output.getvalue())
+        self.assertEqual(blocks, expected)
+        self.assertIs(blocks[0][5], blocks[0][6])
+
+        xml_output = StringIO()
+        ConfigParser().translate(config, xml_output)
+        self.assertLess(len(output.getvalue()), len(xml_output.getvalue().encode('utf-8')))
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        for output_format in ('json', 'binary'):
+            path = os.path.join(temp_dir, 'out.' + output_format)
+            translate_file(config, path, output_format=output_format)
+            self.assertEqual(read_output(path), expected)
+
+        # Общий словарь, впервые записанный внутри ключа, а затем использованный как значение
+        config = "dict(1 = 2) -> c\ndict(1 = $c$) -> e\ndict(dict(1 = $e$) = 5, 2 = $c$, 3 = $e$)"
+        output = BytesIO()
+        ConfigParser().write(config, BinaryBackend(output))
+        blocks = read_binary(output.getvalue())
+        self.assertEqual(blocks, ConfigParser().loads(config))
+        self.assertIs(blocks[0][3][1], blocks[0][2])
+
+    def test_incremental_translation(self):
+        """Тест на повторную трансляцию после правок с разбором только изменённых блоков."""
+        temp_dir = self.write_modules({'ports.cfg': '8080 -> port'})
+        output_file = os.path.join(temp_dir, 'out.xml')
+        translator = IncrementalTranslator(output_file, temp_dir)
+        blocks = ['import "ports.cfg"', '1 -> a', 'dict(1 = $a$)'] + [f'dict(1 = {i}, 2 = "x")' for i in range(20)]
+        text = '\n'.join(blocks)
+        self.assertEqual(translator.update(text), 23)
+
+        edits = [
+            ('dict(1 = 5, 2 = "x")', 'dict(1 = 5, 2 = "y")'),  # правка одного блока
+            ('1 -> a', '2 -> a'),  # изменилась константа, на которую ссылается блок
+            ('dict(1 = 7, 2 = "x")', 'dict(1 = 7, 2 = "x")\n- 1'),  # выражение продолжилось на другой строке
+            ('dict(1 = 9, 2 = "x")', 'dict(1 = 9, 2 = "x") -> b\ndict(1 = $b$, 2 = $port$)'),
+            ('dict(1 = 3, 2 = "x")\n', ''),  # удаление блока
+        ]
+        for old, new in edits:
+            text = text.replace(old, new)
+            reparsed = translator.update(text)
+            self.assertLessEqual(reparsed, 4)
+            with open(output_file, encoding='utf-8') as f:
+                incremental = ET.canonicalize(f.read().split('?>', 1)[1])
+            expected = ConfigParser(temp_dir).parse(text)
+            self.assertEqual(incremental, ET.canonicalize(ET.tostring(expected, encoding='unicode')))
+
+        # Синтаксическая ошибка не портит результат и состояние
+        with self.assertRaisesRegex(SyntaxError, 'line 7'):
+            translator.update(text.replace('dict(1 = 4, 2 = "x")', 'dict(1 = 4, 2 = )'))
+        self.assertEqual(translator.update(text), 0)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_config_is_translated(self):
+        """Тест на трансляцию сгенерированной конфигурации и сравнение с базовыми замерами."""
+        from benchmark import PHASES, compare, generate_config, run_benchmark
+        config = generate_config(blocks=10, depth=3, width=4, comment_density=0.5, constants=8)
+        self.assertIn('REM', config)
+        self.assertEqual(len(ConfigParser().parse(config).findall('dict')), 10)
+
+        result = run_benchmark(blocks=10, depth=3, width=4, constants=8, repeat=1)
+        self.assertEqual(list(result['phases']), list(PHASES))
+        self.assertEqual(compare(result, result), [])
+
+        baseline = {'parameters': result['parameters'],
+                    'phases': {phase: {'time': 0.0001, 'peak_memory_mb': 1000.0} for phase in PHASES}}
+        baseline['phases']['lex']['time'] = 1000.0
+        self.assertEqual([message.split(':')[0] for message in compare(result, baseline)],
+                         ['parse time', 'evaluate time', 'serialize time'])
+        with self.assertRaises(ValueError):
+            compare(run_benchmark(blocks=5, repeat=1), baseline)
+
+    def test_large_cases(self):
+        """Тест на именованные случаи большого плоского и широкого вложенного конфига."""
+        from benchmark import CASES, generate_config, run_benchmark
+        flat = ConfigParser().parse(generate_config(**dict(CASES['flat'], width=300)))
+        self.assertEqual(len(flat.findall('dict/item')), 300)
+        wide = ConfigParser().parse(generate_config(**dict(CASES['wide'], blocks=50)))
+        self.assertEqual(len(wide.findall('dict')), 50)
+        self.assertTrue(wide.findall('dict/item/dict/item/dict'))
+        result = run_benchmark(**dict(CASES['wide'], blocks=20), repeat=1)
+        self.assertEqual(result['parameters']['width'], 4)
+
+
 if __name__ == '__main__':
     unittest.main()
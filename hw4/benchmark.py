@@ -0,0 +1,166 @@
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Callable, Dict
+
+from assembler import Assembler
+from interpreter import INSTRUCTION_SIZE, Interpreter
+
+def generate_program(instructions: int, addresses: int = 1024, base: int = 0, seed: int = 0,
+                     shape: str = 'random') -> bytes:
+    """
+    Generate a binary program.
+
+    A 'random' program picks every instruction and operand at random. A
+    'vector' program splits the range into four vectors A, B, C and D and
+    repeats element-wise passes over them: load A and B, C = A <= B,
+    copy C to D and read D[i] from the address held in A[i].
+
+    Args:
+        instructions: Number of instructions
+        addresses: Size of the address range the program works on
+        base: First address of the range
+        seed: Random seed for the program
+        shape: 'random' or 'vector'
+
+    Returns:
+        Assembled program
+    """
+    rng = random.Random(seed)
+    assembler = Assembler()
+    address = lambda: base + rng.randrange(addresses)
+    program = bytearray()
+    if shape == 'vector':
+        size = max(addresses // 4, 1)
+        a, b, c, d = (base + size * i for i in range(4))
+        passes = [
+            lambda i: assembler.pack_instruction(2, a + i, rng.randrange(0x10000)),
+            lambda i: assembler.pack_instruction(2, b + i, rng.randrange(0x10000)),
+            lambda i: assembler.pack_instruction(6, c + i, a + i, b + i),
+            lambda i: assembler.pack_instruction(3, c + i, d + i),
+            lambda i: assembler.pack_instruction(4, d + i, a + i),
+        ]
+        for position in range(instructions):
+            element = position % size
+            program += bytes(passes[position // size % len(passes)](element))
+        return bytes(program)
+    for _ in range(instructions):
+        choice = rng.random()
+        if choice < 0.4:
+            # Constants are valid offsets into the range, so READ stays inside it
+            packed = assembler.pack_instruction(2, address(), base + rng.randrange(min(addresses, 0x10000)))
+        elif choice < 0.6:
+            packed = assembler.pack_instruction(3, address(), address())
+        elif choice < 0.75:
+            packed = assembler.pack_instruction(4, address(), address())
+        else:
+            packed = assembler.pack_instruction(6, address(), address(), address())
+        program += bytes(packed)
+    return bytes(program)
+
+# An engine runs a binary program and returns the time it spent decoding it up front
+
+def _stream(interpreter: Interpreter, data: bytes) -> float:
+    # The original path: unpack and execute one 11-byte instruction at a time on dict memory
+    interpreter.memory = {}
+    for offset in range(0, len(data) - INSTRUCTION_SIZE + 1, INSTRUCTION_SIZE):
+        interpreter.execute_instruction(*interpreter.unpack_instruction(data[offset:offset + INSTRUCTION_SIZE]))
+    return 0.0
+
+def _decoded(interpreter: Interpreter, data: bytes) -> float:
+    start = time.perf_counter()
+    program = interpreter.decode(data)
+    decode_time = time.perf_counter() - start
+    interpreter.execute(program)
+    return decode_time
+
+def _vector(interpreter: Interpreter, data: bytes) -> float:
+    import vector
+    start = time.perf_counter()
+    program = vector.decode(data)
+    decode_time = time.perf_counter() - start
+    vector.execute(interpreter, program)
+    return decode_time
+
+ENGINES: Dict[str, Callable[[Interpreter, bytes], float]] = {
+    'stream': _stream,
+    'decoded': _decoded,
+    'vector': _vector,
+}
+
+def run_benchmark(instructions: int = 200000, addresses: int = 1024, engine: str = 'decoded',
+                  repeat: int = 3, seed: int = 0, shape: str = 'random') -> dict:
+    """
+    Run a generated program and measure the interpreter.
+
+    Args:
+        instructions: Number of instructions
+        addresses: Size of the address range the program works on
+        engine: 'stream' for per-instruction decoding on dict memory, 'decoded' to decode
+            the whole program first and run it on paged memory, 'vector' to run it in
+            vector steps with NumPy
+        repeat: Number of runs, the best one is reported
+        seed: Random seed for the program
+        shape: Kind of generated program, see generate_program
+
+    Returns:
+        Parameters and results of the fastest run: wall time including
+        decoding, time spent decoding, instructions/sec overall and without
+        decoding, the size of the VM memory after the run and the memory itself
+    """
+    data = generate_program(instructions, addresses, seed=seed, shape=shape)
+    best = None
+    for _ in range(max(repeat, 1)):
+        interpreter = Interpreter()
+        start = time.perf_counter()
+        decode_time = ENGINES[engine](interpreter, data)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, decode_time)
+    wall_time, decode_time = best
+
+    # Memory is measured in a separate run, tracing slows the interpreter down
+    tracemalloc.start()
+    try:
+        interpreter = Interpreter()
+        before = tracemalloc.get_traced_memory()[0]
+        ENGINES[engine](interpreter, data)
+        memory_bytes = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    execute_time = wall_time - decode_time
+    return {
+        "parameters": {"instructions": instructions, "addresses": addresses, "engine": engine,
+                       "seed": seed, "shape": shape},
+        "wall_time": wall_time,
+        "decode_time": decode_time,
+        "instructions_per_sec": instructions / wall_time if wall_time else 0.0,
+        "execute_instructions_per_sec": instructions / execute_time if execute_time else 0.0,
+        "memory_kb": memory_bytes / 1024,
+        "memory": interpreter.memory,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the interpreter on a generated program',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--instructions', type=int, default=200000, help='Number of instructions')
+    parser.add_argument('--addresses', type=int, default=1024, help='Size of the address range')
+    parser.add_argument('--engine', choices=sorted(ENGINES), action='append',
+                        help='Engine to measure, may be repeated (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the program')
+    parser.add_argument('--shape', choices=('random', 'vector'), default='random', help='Kind of generated program')
+    args = parser.parse_args()
+
+    for engine in args.engine or list(ENGINES):
+        result = run_benchmark(args.instructions, args.addresses, engine, args.repeat, args.seed, args.shape)
+        print(f"{engine:<8} {result['wall_time']:.3f}s ({result['decode_time']:.3f}s decoding), "
+              f"{result['instructions_per_sec'] / 1e6:.2f}M instructions/sec, "
+              f"{result['execute_instructions_per_sec'] / 1e6:.2f}M without decoding, "
+              f"memory {result['memory_kb']:.0f} KB")
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,61 @@
 import csv
-from typing import List, Tuple, Optional
+from array import array
+from typing import Iterator, List, Tuple, Optional
+
+from memory import PagedMemory
+
+INSTRUCTION_SIZE = 11
+
+# Opcode of every first byte, the valid opcodes, and the mask of C and D for each opcode
+_OPCODES = bytes(byte & 0x7 for byte in range(256))
+_VALID_OPCODES = bytes((2, 3, 4, 6))
+_C_MASKS = [0xFFFFFFF] * 8
+_C_MASKS[2] = 0xFFFF
+_D_MASKS = [0] * 8
+_D_MASKS[6] = 0xFFFFFFF
+# Cells executed from one list instead of the page table, and the number of
+# instructions above them after which execution goes back to the pages
+DENSE_SIZE = 1 << 16
+SPILL_LIMIT = 1024
+
+def _interleave(columns: List[bytes], count: int, width: int = 8) -> bytearray:
+    """Rows of width bytes whose k-th byte comes from columns[k], zero-padded"""
+    rows = bytearray(width * count)
+    for k, column in enumerate(columns):
+        rows[k::width] = column
+    return rows
+
+def _repeat(word: int, count: int) -> int:
+    """word in each of count 64-bit lanes of one integer"""
+    return int.from_bytes(word.to_bytes(8, 'little') * count, 'little')
+
+def _opcode_masks(opcodes: bytes, masks: List[int], count: int) -> int:
+    """masks[opcode] in the 64-bit lane of every instruction"""
+    tables = [bytes((mask >> 8 * k) & 0xFF for mask in masks) * 32 for k in range(4)]
+    return int.from_bytes(_interleave([opcodes.translate(table) for table in tables], count), 'little')
+
+def _unpack_words(value: int, count: int, target: array):
+    """Append the count 64-bit lanes of value to target, narrowing them to its item size"""
+    words = value.to_bytes(8 * count, 'little')
+    if target.itemsize < 8:
+        words = _interleave([words[k::8] for k in range(target.itemsize)], count, target.itemsize)
+    target.frombytes(words)
+
+class Program:
+    """Decoded program stored as parallel arrays of opcodes and operands"""
+
+    def __init__(self):
+        self.opcodes = array('B')
+        self.b = array('L')
+        self.c = array('L')
+        self.d = array('L')  # 0 for instructions without a D operand
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
 
 class Interpreter:
     def __init__(self):
-        self.memory = {}  # Using a dict as sparse memory
+        self.memory = PagedMemory()
         
     def unpack_instruction(self, bytes_data: bytes) -> Tuple[int, int, int, int]:
         """Unpack 11-byte instruction into opcode and operands"""
@@ -46,20 +98,143 @@ class Interpreter:
         else:
             raise ValueError(f"Unknown opcode: {opcode}")
 
-    def run(self, input_file: str, output_file: str, start_addr: int, end_addr: int):
-        """Run the program and save results"""
-        # Read and execute program
+    def decode(self, data: bytes) -> Program:
+        """
+        Decode a whole binary into a Program, ignoring a trailing partial instruction.
+
+        Fields are extracted column-wise: the bytes of all instructions are
+        regrouped into 8-byte words by slice assignment, the words form one
+        large integer, and every field is a shift and a repeated mask of it.
+        """
+        count = len(data) // INSTRUCTION_SIZE
+        size = count * INSTRUCTION_SIZE
+        columns = [data[k:size:INSTRUCTION_SIZE] for k in range(INSTRUCTION_SIZE)]
+        opcodes = columns[0].translate(_OPCODES)
+        if opcodes.translate(None, _VALID_OPCODES):
+            index = next(i for i, opcode in enumerate(opcodes) if opcode not in _VALID_OPCODES)
+            raise ValueError(f"Unknown opcode: {opcodes[index]} in instruction {index}")
+
+        # Bits 0-63 of every instruction, then bits 64-87
+        low = int.from_bytes(_interleave(columns[:8], count), 'little')
+        high = int.from_bytes(_interleave(columns[8:], count), 'little')
+        field = _repeat(0xFFFFFFF, count)
+        program = Program()
+        program.opcodes.frombytes(opcodes)
+        _unpack_words((low >> 3) & field, count, program.b)
+        # LOAD has a 16-bit C, LE alone has a D made of bits 59-63 and 64-86
+        _unpack_words((low >> 31) & _opcode_masks(opcodes, _C_MASKS, count), count, program.c)
+        d = ((low & _repeat(0x1F << 59, count)) >> 59) | (high << 5)
+        _unpack_words(d & _opcode_masks(opcodes, _D_MASKS, count), count, program.d)
+        return program
+
+    def load(self, input_file: str) -> Program:
+        """Read and decode a binary program file"""
         with open(input_file, 'rb') as f:
-            while True:
-                instruction = f.read(11)
-                if not instruction or len(instruction) < 11:
-                    break
-                opcode, b, c, d = self.unpack_instruction(instruction)
-                self.execute_instruction(opcode, b, c, d)
+            return self.decode(f.read())
+
+    def execute(self, program: Program):
+        """Execute a decoded program"""
+        instructions = zip(program.opcodes, program.b, program.c, program.d)
+        self._execute_dense(instructions)
+        # Whatever the dense loop left, if the program mostly works above DENSE_SIZE
+        self._execute_paged(instructions)
+
+    def _execute_dense(self, instructions: Iterator[Tuple[int, int, int, int]]):
+        """
+        Execute on a list holding the first DENSE_SIZE cells, then copy them back to pages.
+
+        A list indexes faster than the page table. An instruction that touches a
+        higher address raises IndexError before it changes anything and is run
+        again on accessors that go to the list or the pages; after SPILL_LIMIT
+        such instructions the rest is left to the paged loop.
+        """
+        memory = self.memory
+        cells = memory.read_pages(DENSE_SIZE >> memory.page_bits)
+        size = len(cells)
+        bits, mask = memory.page_bits, memory.mask
+        pages, zero, page = memory.pages.get, memory.zero_page, memory.page
+
+        def get(addr):
+            return cells[addr] if 0 <= addr < size else pages(addr >> bits, zero)[addr & mask]
+
+        def put(addr, value):
+            if addr < size:
+                cells[addr] = value
+            else:
+                (pages(addr >> bits) or page(addr >> bits))[addr & mask] = value
+
+        def load(b, c, d):
+            cells[b] = c
+
+        def write(b, c, d):
+            cells[c] = cells[b]
+
+        def read(b, c, d):
+            addr = cells[c]
+            # A negative address would index from the end; no page holds one
+            cells[b] = cells[addr] if addr >= 0 else 0
+
+        def less_equal(b, c, d):
+            cells[b] = 1 if cells[c] <= cells[d] else 0
+
+        handlers = [None, None, load, write, read, None, less_equal, None]
+        spilled = [None, None,
+                   lambda b, c, d: put(b, c),
+                   lambda b, c, d: put(c, get(b)),
+                   lambda b, c, d: put(b, get(get(c))),
+                   None,
+                   lambda b, c, d: put(b, 1 if get(c) <= get(d) else 0),
+                   None]
+        spills = 0
+        while spills < SPILL_LIMIT:
+            try:
+                for opcode, b, c, d in instructions:
+                    handlers[opcode](b, c, d)
+                break
+            except IndexError:
+                spilled[opcode](b, c, d)
+                spills += 1
+        memory.write_pages(cells)
+
+    def _execute_paged(self, instructions: Iterator[Tuple[int, int, int, int]]):
+        # Paging is inlined: reads of untouched pages hit the zero page,
+        # writes allocate the page on first touch
+        bits, mask = self.memory.page_bits, self.memory.mask
+        pages, zero, page = self.memory.pages.get, self.memory.zero_page, self.memory.page
+
+        def load(b, c, d):
+            (pages(b >> bits) or page(b >> bits))[b & mask] = c
+
+        def write(b, c, d):
+            (pages(c >> bits) or page(c >> bits))[c & mask] = pages(b >> bits, zero)[b & mask]
+
+        def read(b, c, d):
+            addr = pages(c >> bits, zero)[c & mask]
+            (pages(b >> bits) or page(b >> bits))[b & mask] = pages(addr >> bits, zero)[addr & mask]
+
+        def less_equal(b, c, d):
+            value = 1 if pages(c >> bits, zero)[c & mask] <= pages(d >> bits, zero)[d & mask] else 0
+            (pages(b >> bits) or page(b >> bits))[b & mask] = value
+
+        # Handlers indexed by opcode; decode() has already rejected unknown opcodes
+        handlers = [None, None, load, write, read, None, less_equal, None]
+        for opcode, b, c, d in instructions:
+            handlers[opcode](b, c, d)
+
+    def run(self, input_file: str, output_file: str, start_addr: int, end_addr: int, vectorized: bool = False):
+        """Run the program and save results"""
+        if vectorized:
+            # NumPy is only needed for the vectorized engine
+            import vector
+            with open(input_file, 'rb') as f:
+                vector.execute(self, vector.decode(f.read()))
+        else:
+            # Decode the whole program once, then execute it
+            self.execute(self.load(input_file))
 
         # Write results
         with open(output_file, 'w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(['address', 'value'])
-            for addr in range(start_addr, end_addr + 1):
-                writer.writerow([addr, self.memory.get(addr, 0)])
+            values = self.memory.read_range(start_addr, end_addr + 1)
+            writer.writerows(zip(range(start_addr, end_addr + 1), values))
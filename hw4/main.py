@@ -18,6 +18,8 @@ def main():
     int_parser.add_argument('output', help='Output results file (CSV format)')
     int_parser.add_argument('start_addr', type=int, help='Start address of memory range to output')
     int_parser.add_argument('end_addr', type=int, help='End address of memory range to output')
+    int_parser.add_argument('--vectorized', action='store_true',
+                            help='Execute independent instructions together with NumPy')
     
     args = parser.parse_args()
     
@@ -34,7 +36,7 @@ def main():
     elif args.command == 'run':
         interpreter = Interpreter()
         try:
-            interpreter.run(args.input, args.output, args.start_addr, args.end_addr)
+            interpreter.run(args.input, args.output, args.start_addr, args.end_addr, args.vectorized)
             print(f"Successfully executed {args.input}")
             print(f"Results written to {args.output}")
         except Exception as e:
@@ -0,0 +1,74 @@
+from array import array
+from typing import Dict, List
+
+PAGE_BITS = 10
+ADDRESS_BITS = 28
+
+class PagedMemory:
+    """Sparse VM memory made of fixed-size array('q') pages allocated on first write"""
+
+    def __init__(self, page_bits: int = PAGE_BITS):
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self.mask = self.page_size - 1
+        # Page table: page number -> page. Untouched pages read as the shared zero page,
+        # which is never written
+        self.pages: Dict[int, array] = {}
+        self.zero_page = array('q', bytes(8 * self.page_size))
+
+    def page(self, number: int) -> array:
+        """Return a writable page, allocating it on first touch"""
+        page = self.pages.get(number)
+        if page is None:
+            page = self.pages[number] = array('q', self.zero_page)
+        return page
+
+    def get(self, addr: int, default: int = 0) -> int:
+        page = self.pages.get(addr >> self.page_bits)
+        return default if page is None else page[addr & self.mask]
+
+    def __getitem__(self, addr: int) -> int:
+        return self.pages.get(addr >> self.page_bits, self.zero_page)[addr & self.mask]
+
+    def __setitem__(self, addr: int, value: int):
+        if not 0 <= addr < 1 << ADDRESS_BITS:
+            raise IndexError(f"Address out of range: {addr}")
+        self.page(addr >> self.page_bits)[addr & self.mask] = value
+
+    def read_range(self, start: int, end: int) -> List[int]:
+        """Read addresses start..end-1 a page at a time"""
+        values: List[int] = []
+        addr = start
+        while addr < end:
+            number = addr >> self.page_bits
+            offset = addr & self.mask
+            count = min(self.page_size - offset, end - addr)
+            page = self.pages.get(number)
+            if page is None:
+                values.extend([0] * count)
+            else:
+                values.extend(page[offset:offset + count])
+            addr += count
+        return values
+
+    def read_pages(self, count: int) -> List[int]:
+        """Pages 0..count-1 as one list, which indexes faster than array pages"""
+        values = [0] * (count << self.page_bits)
+        for number, page in self.pages.items():
+            if number < count:
+                start = number << self.page_bits
+                values[start:start + self.page_size] = page
+        return values
+
+    def write_pages(self, values: List[int]):
+        """Copy a list made by read_pages back; a page that holds only zeros stays unallocated"""
+        for number in range(len(values) >> self.page_bits):
+            start = number << self.page_bits
+            page = values[start:start + self.page_size]
+            if number in self.pages or any(page):
+                self.pages[number] = array('q', page)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by allocated pages"""
+        return len(self.pages) * self.page_size * self.zero_page.itemsize
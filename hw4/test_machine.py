@@ -1,6 +1,7 @@
 import unittest
 from assembler import Assembler
 from interpreter import Interpreter
+from memory import PagedMemory
 import os
 
 class TestMachine(unittest.TestCase):
@@ -86,5 +87,93 @@ class TestMachine(unittest.TestCase):
         os.remove("test_program.log")
         os.remove("result.csv")
 
+    def test_decoded_program_matches_unpacking(self):
+        """Test that decoding a whole program gives the same fields and results as unpacking one by one"""
+        from benchmark import generate_program
+        data = generate_program(2000, addresses=64, seed=1)
+        program = self.interpreter.decode(data + b'\x02')  # trailing partial instruction is ignored
+        self.assertEqual(len(program), 2000)
+        reference = Interpreter()
+        reference.memory = {}  # the original dict memory
+        for i in range(len(program)):
+            opcode, b, c, d = self.interpreter.unpack_instruction(data[i * 11:(i + 1) * 11])
+            self.assertEqual((program.opcodes[i], program.b[i], program.c[i], program.d[i]), (opcode, b, c, d or 0))
+            reference.execute_instruction(opcode, b, c, d)
+        self.interpreter.execute(program)
+        self.assertEqual(self.interpreter.memory.read_range(0, 64), [reference.memory.get(addr, 0) for addr in range(64)])
+
+    def test_execution_across_dense_range(self):
+        """Test that programs touching addresses on both sides of the dense range match the dict memory"""
+        from unittest.mock import patch
+        from benchmark import generate_program
+        from interpreter import DENSE_SIZE
+        data = generate_program(3000, addresses=64, base=DENSE_SIZE - 32, seed=3)
+        reference = Interpreter()
+        reference.memory = {DENSE_SIZE - 1: 5, DENSE_SIZE + 1: -7}
+        for i in range(0, len(data), 11):
+            reference.execute_instruction(*reference.unpack_instruction(data[i:i + 11]))
+        expected = [reference.memory.get(addr, 0) for addr in range(DENSE_SIZE - 32, DENSE_SIZE + 32)]
+        # With a small limit the rest of the program goes back to the paged loop
+        for spill_limit in (1024, 10):
+            interpreter = Interpreter()
+            interpreter.memory[DENSE_SIZE - 1] = 5
+            interpreter.memory[DENSE_SIZE + 1] = -7
+            with patch('interpreter.SPILL_LIMIT', spill_limit):
+                interpreter.execute(interpreter.decode(data))
+            self.assertEqual(interpreter.memory.read_range(DENSE_SIZE - 32, DENSE_SIZE + 32), expected)
+            # Pages below the touched range hold only zeros and stay unallocated
+            self.assertEqual(sorted(interpreter.memory.pages), [(DENSE_SIZE >> 10) - 1, DENSE_SIZE >> 10])
+
+    def test_unknown_opcode(self):
+        """Test that decoding rejects an unknown opcode"""
+        data = bytes(self.assembler.pack_instruction(2, 1, 1)) + bytes(self.assembler.pack_instruction(5, 1, 1))
+        with self.assertRaisesRegex(ValueError, "Unknown opcode: 5 in instruction 1"):
+            self.interpreter.decode(data)
+
+    def test_paged_memory(self):
+        """Test that paged memory allocates pages on first write and reads ranges across pages"""
+        memory = PagedMemory(page_bits=4)
+        self.assertEqual(memory[0xFFFFFFF], 0)
+        self.assertEqual(memory.nbytes, 0)
+        memory[14] = 7
+        memory[17] = 9
+        memory[0xFFFFFFF] = 1
+        self.assertEqual(len(memory.pages), 3)
+        self.assertEqual(memory.read_range(13, 19), [0, 7, 0, 0, 9, 0])
+        self.assertEqual(memory.read_range(40, 42), [0, 0])
+        self.assertEqual(memory.get(0xFFFFFFF), 1)
+        self.assertEqual(memory.zero_page.count(0), 16)
+        with self.assertRaises(IndexError):
+            memory[1 << 28] = 1
+
+    def test_vectorized_engine_matches_scalar(self):
+        """Test that NumPy execution in vector steps gives the same memory as the scalar engine"""
+        import vector
+        from unittest.mock import patch
+        from benchmark import generate_program
+        for shape, addresses in (('random', 8), ('random', 300), ('vector', 400)):
+            data = generate_program(3000, addresses=addresses, seed=2, shape=shape)
+            program = vector.decode(data)
+            scalar = Interpreter()
+            scalar.execute(scalar.decode(data))
+            self.assertEqual(program.opcodes, self.interpreter.decode(data).opcodes)
+            # Without the fallback every instruction runs in a vector step
+            for min_width in (vector.MIN_WIDTH, 4, 0):
+                with patch('vector.MIN_WIDTH', min_width):
+                    vectorized = Interpreter()
+                    vector.execute(vectorized, program)
+                self.assertEqual(vectorized.memory.read_range(0, addresses), scalar.memory.read_range(0, addresses))
+
+    def test_vectorized_engine_falls_back_up_front(self):
+        """Test that a program with narrow vector steps goes to the scalar engine whole"""
+        import vector
+        from unittest.mock import patch
+        from benchmark import generate_program
+        for shape in ('random', 'vector'):
+            program = vector.decode(generate_program(20000, addresses=4096, seed=2, shape=shape))
+            with patch.object(Interpreter, 'execute') as execute:
+                vector.execute(Interpreter(), program)
+            execute.assert_called_once_with(program)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,234 @@
+from array import array
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from interpreter import INSTRUCTION_SIZE, Interpreter, Program
+from memory import PagedMemory
+
+LOAD, WRITE, READ, LE = 2, 3, 4, 6
+
+# Below this average number of instructions per vector step, after at least
+# MIN_LEVELS steps, the remaining instructions are handed to the scalar engine.
+# The first MIN_WIDTH * MIN_LEVELS instructions are checked before anything runs
+MIN_WIDTH = 256
+MIN_LEVELS = 16
+
+def decode(data: bytes) -> Program:
+    """Decode a whole binary into a Program with NumPy, ignoring a trailing partial instruction"""
+    count = len(data) // INSTRUCTION_SIZE
+    raw = np.frombuffer(data, dtype=np.uint8, count=count * INSTRUCTION_SIZE).reshape(count, INSTRUCTION_SIZE)
+    # Bits 0-63 of every instruction, then bits 64-87
+    low = np.ascontiguousarray(raw[:, :8]).view('<u8').ravel()
+    high = raw[:, 8].astype(np.uint64) | (raw[:, 9].astype(np.uint64) << 8) | (raw[:, 10].astype(np.uint64) << 16)
+
+    opcodes = (low & 0x7).astype(np.uint8)
+    unknown = ~np.isin(opcodes, (LOAD, WRITE, READ, LE))
+    if unknown.any():
+        index = int(np.argmax(unknown))
+        raise ValueError(f"Unknown opcode: {opcodes[index]} in instruction {index}")
+    c = (low >> 31) & 0xFFFFFFF
+    c[opcodes == LOAD] &= 0xFFFF
+    d = np.where(opcodes == LE, ((low >> 59) | (high << 5)) & 0xFFFFFFF, 0)
+
+    program = Program()
+    program.opcodes.frombytes(opcodes.tobytes())
+    for target, values in ((program.b, (low >> 3) & 0xFFFFFFF), (program.c, c), (program.d, d)):
+        target.frombytes(values.astype(f'u{target.itemsize}').tobytes())
+    return program
+
+def _fields(program: Program) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    def view(values: array) -> np.ndarray:
+        return np.frombuffer(values, dtype=f'u{values.itemsize}').astype(np.int64)
+    return np.frombuffer(program.opcodes, dtype=np.uint8), view(program.b), view(program.c), view(program.d)
+
+def _read_conflicts(is_read: np.ndarray, low_dest: np.ndarray) -> np.ndarray:
+    """For every instruction, the last earlier one it must follow by the READ rules, or -1"""
+    index = np.arange(len(is_read))
+    last_read = np.maximum.accumulate(np.where(is_read, index, -1))
+    last_low_write = np.maximum.accumulate(np.where(low_dest, index, -1))
+    conflicts = np.full(len(is_read), -1, dtype=np.int64)
+    conflicts[1:] = np.maximum(np.where(is_read[1:], last_low_write[:-1], -1),
+                               np.where(low_dest[1:], last_read[:-1], -1))
+    return conflicts
+
+def _steps(dest: np.ndarray, source: np.ndarray, d: np.ndarray, size: int,
+           read_conflicts: np.ndarray) -> Iterator[Tuple[int, int]]:
+    """
+    Runs of instructions in program order, each ending before the first
+    instruction that depends on one inside it. Addresses are compact, below
+    size; size stands for no access, e.g. the D of an instruction other than LE.
+    """
+    n = len(dest)
+    # The first position in the current run that writes and that reads every address
+    first_write = np.full(size + 1, n)
+    first_read = np.full(size + 1, n)
+    start = 0
+    while start < n:
+        # The run grows in doubling chunks until an instruction depends on an earlier one in it
+        end = stop = start
+        chunk = MIN_WIDTH or 1
+        while end < n:
+            stop = min(end + chunk, n)
+            positions = np.arange(end, stop)
+            run_dest, run_source, run_d = dest[end:stop], source[end:stop], d[end:stop]
+            np.minimum.at(first_write, run_dest, positions)
+            np.minimum.at(first_read, run_source, positions)
+            np.minimum.at(first_read, run_d, positions)
+            # Read after write, write after write, write after read, the READ rules
+            blocked = ((first_write[run_source] < positions) | (first_write[run_d] < positions)
+                       | (first_write[run_dest] < positions) | (first_read[run_dest] < positions)
+                       | (read_conflicts[end:stop] >= start))
+            if blocked.any():
+                end += int(blocked.argmax())
+                break
+            end = stop
+            chunk *= 2
+        yield start, end
+        first_write[dest[start:stop]] = n
+        first_read[source[start:stop]] = n
+        first_read[d[start:stop]] = n
+        start = end
+
+def _narrow(dest: np.ndarray, source: np.ndarray, d: np.ndarray, read_conflicts: np.ndarray) -> bool:
+    """Whether the first MIN_WIDTH * MIN_LEVELS instructions take more than MIN_LEVELS steps"""
+    count = min(len(dest), MIN_WIDTH * MIN_LEVELS)
+    addresses, compact = np.unique(np.concatenate((dest[:count], source[:count], d[:count])),
+                                   return_inverse=True)
+    steps = 0
+    for _ in _steps(*compact.reshape(3, count), len(addresses), read_conflicts[:count]):
+        steps += 1
+        if steps * MIN_WIDTH > count:
+            return True
+    return False
+
+def _unique(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct values and their counts"""
+    values = np.sort(values)
+    starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    return values[starts], np.diff(np.concatenate((starts, [len(values)])))
+
+def _value_range(memory: PagedMemory, constants: np.ndarray) -> Tuple[int, int]:
+    """Bounds of every value the program can hold: LOAD constants, LE results and what memory holds"""
+    low, high = 0, int(constants.max()) if len(constants) else 0
+    for page in memory.pages.values():
+        values = np.frombuffer(page, dtype=np.int64)
+        low, high = min(low, int(values.min())), max(high, int(values.max()))
+    return low, max(high, 1)
+
+def _gather(memory: PagedMemory, addresses: np.ndarray) -> np.ndarray:
+    values = np.zeros(len(addresses), dtype=np.int64)
+    numbers = addresses >> memory.page_bits
+    for number in memory.pages.keys() & set(_unique(numbers)[0].tolist()):
+        selected = numbers == number
+        values[selected] = np.frombuffer(memory.pages[number], dtype=np.int64)[addresses[selected] & memory.mask]
+    return values
+
+def _scatter(memory: PagedMemory, addresses: np.ndarray, values: np.ndarray):
+    numbers = addresses >> memory.page_bits
+    order = np.argsort(numbers, kind='stable')
+    numbers, addresses, values = numbers[order], addresses[order], values[order]
+    bounds = np.flatnonzero(np.diff(numbers)) + 1
+    for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(numbers)]))):
+        page = np.frombuffer(memory.page(int(numbers[start])), dtype=np.int64)
+        page[addresses[start:end] & memory.mask] = values[start:end]
+
+def execute(interpreter: Interpreter, program: Program):
+    """
+    Execute a decoded program in vector steps with NumPy gather/scatter.
+
+    The ISA has no control flow, so instructions that do not depend on
+    each other through a static address (read after write, write after
+    read, write after write) can run at once. The program is split in
+    program order into the longest runs without such a dependency inside,
+    and every run is one vectorized step.
+
+    READ loads from an address held in memory, which is known only at run
+    time. Every value is a LOAD constant, an LE result or a copy of one,
+    so that address is at most the largest such value. A READ therefore
+    follows every earlier write below that bound, and a later write below
+    the bound follows every earlier READ.
+
+    A program whose steps would be narrow runs on the scalar engine: this
+    is checked before anything runs, for the READ rules over the whole
+    program and for every dependency over a prefix. If the steps turn
+    narrow later, the rest of the program runs on the scalar engine from
+    there.
+    """
+    n = len(program)
+    if n == 0:
+        return
+    memory = interpreter.memory
+    opcodes, b, c, d = _fields(program)
+    is_load, is_write, is_read, is_le = (opcodes == LOAD), (opcodes == WRITE), (opcodes == READ), (opcodes == LE)
+    has_read = bool(is_read.any())
+    low, high = _value_range(memory, c[is_load])
+    dest = np.where(is_write, c, b)
+    source = np.where(is_write | is_load, b, c)  # LOAD reads nothing, its C is a constant
+    low_dest = has_read & (dest <= high)
+    read_conflicts = _read_conflicts(is_read, low_dest)
+    # An instruction that must follow the one just before it starts a step,
+    # which bounds the number of steps without finding them
+    forced = 1 + np.count_nonzero(read_conflicts[1:] == np.arange(n - 1))
+    # -1 for no access, which no instruction writes
+    reads, reads_d = np.where(is_load, -1, source), np.where(is_le, d, -1)
+    if has_read and low < 0 or forced * MIN_WIDTH > n or _narrow(dest, reads, reads_d, read_conflicts):
+        interpreter.execute(program)
+        return
+
+    # Memory is compacted to the addresses the program uses. With READ, all of
+    # 0..high are included, so a value used as an address is its own index
+    used = [b, c[~is_load], d[is_le]]
+    top = max(max(int(x.max()) for x in used if len(x)), high if has_read else 0)
+    if top < 8 * n + 0x10000:
+        # Dense enough for a direct lookup table
+        table = np.zeros(top + 1, dtype=bool)
+        for x in used:
+            table[x] = True
+        table[:high + 1] |= has_read
+        addresses = np.flatnonzero(table)
+        compact = np.cumsum(table) - 1
+        compact_dest, compact_source, compact_d = compact[dest], compact[source], compact[d]
+    else:
+        addresses = _unique(np.concatenate(used + ([np.arange(high + 1)] if has_read else [])))[0]
+        compact_dest, compact_source, compact_d = (np.searchsorted(addresses, x) for x in (dest, source, d))
+    values = _gather(memory, addresses)
+    size = len(addresses)
+    steps = _steps(compact_dest, np.where(is_load, size, compact_source), np.where(is_le, compact_d, size),
+                   size, read_conflicts)
+
+    done = count = 0
+    for start, end in steps:
+        if count >= MIN_LEVELS and done < MIN_WIDTH * count:
+            break
+        # All reads of a step happen before its writes; instructions of one
+        # step never touch each other's destinations
+        step_opcodes, step_source = opcodes[start:end], compact_source[start:end]
+        results = np.empty(end - start, dtype=np.int64)
+        kind = step_opcodes == LOAD
+        results[kind] = c[start:end][kind]
+        kind = step_opcodes == WRITE
+        results[kind] = values[step_source[kind]]
+        kind = step_opcodes == READ
+        results[kind] = values[values[step_source[kind]]]
+        kind = step_opcodes == LE
+        results[kind] = values[step_source[kind]] <= values[compact_d[start:end][kind]]
+        values[compact_dest[start:end]] = results
+        done = end
+        count += 1
+
+    # Only written addresses go back, so untouched pages stay unallocated
+    written = np.zeros(len(addresses), dtype=bool)
+    written[compact_dest[:done]] = True
+    _scatter(memory, addresses[written], values[written])
+    if done < n:
+        # Steps too narrow to pay for themselves; the rest runs in program order
+        interpreter.execute(_subset(program, np.arange(done, n)))
+
+def _subset(program: Program, positions: np.ndarray) -> Program:
+    subset = Program()
+    for source, target in ((program.opcodes, subset.opcodes), (program.b, subset.b),
+                           (program.c, subset.c), (program.d, subset.d)):
+        values = np.frombuffer(source, dtype=f'u{source.itemsize}')[positions]
+        target.frombytes(values.tobytes())
+    return subset